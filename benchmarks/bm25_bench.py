@@ -0,0 +1,124 @@
+"""
+Benchmark for the KnowledgeRetriever keyword fallback.
+
+Builds a synthetic book-sized corpus (chunks of cinematography/screenwriting
+prose), then compares top-k latency of the BM25 inverted index with the
+previous linear keyword scan, batched search_many throughput, plus index build and save/load times.
+
+    python benchmarks/bm25_bench.py --docs 50000 --queries 500
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.rag.bm25 import BM25Index
+from src.rag.data import SEED_KNOWLEDGE, KnowledgeItem
+
+CATEGORIES = ["Cinematography", "Screenwriting", "General"]
+QUERIES = [
+    "lighting camera angle cinematic",
+    "three act structure plot point",
+    "hero journey mentor threshold",
+    "low key lighting noir shadows",
+    "dolly zoom lens focal length",
+    "character arc internal conflict",
+]
+
+def synthetic_corpus(docs: int, seed: int):
+    """Chunks of ~150 words drawn from the seed knowledge vocabulary plus filler words."""
+    rng = random.Random(seed)
+    vocabulary = sorted({word.strip(".,:()").lower() for item in SEED_KNOWLEDGE for word in item.content.split()})
+    vocabulary += [word for query in QUERIES for word in query.split()]
+    vocabulary += [f"term{i}" for i in range(20000)]
+    return [
+        KnowledgeItem(
+            category=rng.choice(CATEGORIES),
+            title=f"Book {i // 400} excerpt {i}",
+            author="Synthetic",
+            content=" ".join(rng.choice(vocabulary) for _ in range(150)),
+            tags=[],
+        )
+        for i in range(docs)
+    ]
+
+def legacy_search(items, query: str, category: str = None, top_k: int = 3):
+    """The pre-index fallback: substring checks per term per item."""
+    results = []
+    query_terms = set(query.lower().split())
+    for item in items:
+        if category and item.category != category:
+            continue
+        score = 0
+        content_lower = item.content.lower()
+        title_lower = item.title.lower()
+        for term in query_terms:
+            if term in title_lower:
+                score += 3
+            elif term in content_lower:
+                score += 1
+            elif term in [t.lower() for t in item.tags]:
+                score += 2
+        if score > 0:
+            results.append((score, item))
+    results.sort(key=lambda x: x[0], reverse=True)
+    return results[:top_k]
+
+def latencies(fn, queries):
+    samples = []
+    for query, category in queries:
+        started = time.perf_counter()
+        fn(query, category)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1 if len(samples) > 1 else 0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 fallback index against the legacy keyword scan.")
+    parser.add_argument("--docs", type=int, default=30000, help="Synthetic chunks in the corpus.")
+    parser.add_argument("--queries", type=int, default=300, help="Queries to time.")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--legacy-queries", type=int, default=20, help="Queries to time on the (slow) legacy scan.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    items = synthetic_corpus(args.docs, args.seed)
+    rng = random.Random(args.seed)
+    queries = [(rng.choice(QUERIES), rng.choice(CATEGORIES + [None])) for _ in range(args.queries)]
+
+    started = time.perf_counter()
+    index = BM25Index.build(items)
+    build_s = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bm25_index.npz"
+        started = time.perf_counter()
+        index.save(path)
+        save_s = time.perf_counter() - started
+        size_mb = path.stat().st_size / 2**20
+        started = time.perf_counter()
+        index = BM25Index.load(path)
+        load_s = time.perf_counter() - started
+
+    bm25_p50, bm25_p99 = latencies(lambda q, c: index.search(q, category=c, top_k=args.top_k), queries)
+    started = time.perf_counter()
+    for category in CATEGORIES + [None]:
+        index.search_many([q for q, c in queries if c == category], category=category, top_k=args.top_k)
+    batch_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    legacy_p50, legacy_p99 = latencies(lambda q, c: legacy_search(items, q, category=c, top_k=args.top_k),
+                                       queries[:args.legacy_queries])
+
+    print(f"Corpus:       {args.docs} chunks, {len(index.terms)} terms")
+    print(f"Build:        {build_s:.2f}s   save {save_s:.2f}s   load {load_s:.2f}s   ({size_mb:.1f} MiB on disk)")
+    print(f"BM25 top-{args.top_k}:   p50 {bm25_p50:.3f}ms   p99 {bm25_p99:.3f}ms   ({len(queries)} queries)")
+    print(f"BM25 batched: {batch_ms:.3f}ms per query   (search_many, one batch per category)")
+    print(f"Legacy scan:  p50 {legacy_p50:.3f}ms   p99 {legacy_p99:.3f}ms   ({min(len(queries), args.legacy_queries)} queries)")
+    print(f"Speedup:      {legacy_p50 / bm25_p50:.0f}x (p50)")
+
+if __name__ == "__main__":
+    main()
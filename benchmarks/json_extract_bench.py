@@ -0,0 +1,75 @@
+"""
+Micro-benchmark for JSON extraction from LLM responses.
+
+Compares src.utils.extract_json (single-pass scanner, orjson when installed)
+with the previous regex + first-'{'/last-'}' slicing on DOP-sized shot lists,
+clean and wrapped in the prose/markdown that models actually return.
+
+    python benchmarks/json_extract_bench.py --shots 10 100 1000
+"""
+import argparse
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.llm import MockLLM
+from src.utils import JSONExtractionError, extract_json, orjson
+
+def legacy_parse(response: str):
+    """The pre-scanner safe_json_parse, minus logging."""
+    cleaned = re.sub(r"```json\s*", "", response)
+    cleaned = re.sub(r"```", "", cleaned)
+    start = cleaned.find("{")
+    end = cleaned.rfind("}")
+    if start != -1 and end != -1:
+        cleaned = cleaned[start:end + 1]
+    try:
+        return json.loads(cleaned.strip())
+    except json.JSONDecodeError:
+        return {}
+
+def scanner_parse(response: str):
+    try:
+        return extract_json(response)
+    except JSONExtractionError:
+        return {}
+
+def shot_list(shots: int) -> str:
+    return json.dumps({"shots": [MockLLM._mock_shot(i) for i in range(1, shots + 1)]}, indent=2)
+
+def variants(shots: int):
+    body = shot_list(shots)
+    return {
+        "clean": body,
+        "fenced": f"Here is the shot list:\n```json\n{body}\n```\nLet me know if you need changes.",
+        "prose braces": f"I kept the {{character}} triggers as requested.\n{body}\nNote: {{lens}} values are in mm.",
+        "two objects": f"{body}\n\nAlternative:\n{body}",
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction from LLM responses.")
+    parser.add_argument("--shots", type=int, nargs="+", default=[10, 100, 1000], help="Shot list sizes to test.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats (best is reported).")
+    args = parser.parse_args()
+
+    print(f"decoder: {'orjson ' + orjson.__version__ if orjson else 'json (stdlib)'}")
+    print(f"{'shots':>6} {'response':<14} {'size':>9} {'legacy':>11} {'scanner':>11} {'speedup':>8}  ok(legacy/scanner)")
+    for shots in args.shots:
+        expected = json.loads(shot_list(shots))
+        for name, response in variants(shots).items():
+            number = max(1, 2000 // shots)
+            timings = {}
+            for label, fn in (("legacy", legacy_parse), ("scanner", scanner_parse)):
+                timings[label] = min(timeit.repeat(lambda: fn(response), number=number, repeat=args.repeat)) / number
+            ok = ["yes" if fn(response) == expected else "NO" for fn in (legacy_parse, scanner_parse)]
+            print(f"{shots:>6} {name:<14} {len(response) / 1024:>7.1f}KB "
+                  f"{timings['legacy'] * 1e6:>9.1f}us {timings['scanner'] * 1e6:>9.1f}us "
+                  f"{timings['legacy'] / timings['scanner']:>7.2f}x  {ok[0]}/{ok[1]}")
+    print("\nok=NO means the parser returned {} or the wrong object, which costs a full LLM retry in the pipeline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Offline load test for the full production pipeline.
+
+Runs the real Orchestrator (DAG scheduling, validator, checkpoints, two-stage
+media pipeline) against MockLLM and the mock media backends, so scheduling and
+caching changes can be measured on a laptop with no keys and no network.
+
+    python benchmarks/pipeline_bench.py --projects 4 --concurrency 2 --shots 12
+    python benchmarks/pipeline_bench.py --llm-latency 1.5 --llm-sigma 0.5 --video-latency 20 --media-failure 0.1
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import Config
+from src.utils import logger
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process, in MiB (0 where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+@contextmanager
+def config_overrides(values: Dict[str, Any]):
+    """Sets Config attributes for the duration of the block, then restores the originals."""
+    saved = {name: getattr(Config, name) for name in values}
+    for name, value in values.items():
+        setattr(Config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(Config, name, value)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline AiFlix pipeline benchmark (mock LLM + mock media).")
+    parser.add_argument("--projects", type=int, default=1, help="Concepts to produce.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Projects in flight at once.")
+    parser.add_argument("--feature", action="store_true", help="Run each project in multi-scene feature mode.")
+    parser.add_argument("--scenes", type=int, default=None, help="Feature mode: scenes per project (mock outline has 3).")
+    parser.add_argument("--shots", type=int, default=8, help="Shots per shot list.")
+    parser.add_argument("--speculative", type=int, default=0, help="Speculative DOP candidates (0 = serial loop).")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Median mock LLM latency (s).")
+    parser.add_argument("--llm-sigma", type=float, default=0.0, help="Log-normal spread of LLM latency (0 = fixed).")
+    parser.add_argument("--llm-failure", type=float, default=0.0, help="Fraction of LLM calls that fail.")
+    parser.add_argument("--image-latency", type=float, default=2.0, help="Median mock anchor render time (s).")
+    parser.add_argument("--video-latency", type=float, default=8.0, help="Median mock clip render time (s).")
+    parser.add_argument("--media-sigma", type=float, default=0.0, help="Log-normal spread of media latency.")
+    parser.add_argument("--media-failure", type=float, default=0.0, help="Fraction of media calls that fail.")
+    parser.add_argument("--image-concurrency", type=int, default=None, help="Override AIFLIX_IMAGE_CONCURRENCY.")
+    parser.add_argument("--video-concurrency", type=int, default=None, help="Override AIFLIX_VIDEO_CONCURRENCY.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency/failure sampling.")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report peak Python heap (slows the run).")
+    parser.add_argument("--trace", type=str, default=None, metavar="PATH", help="Write a Chrome trace of the run.")
+    parser.add_argument("--json", type=str, default=None, metavar="PATH", help="Write the report as JSON.")
+    parser.add_argument("--verbose", action="store_true", help="Keep pipeline INFO logging.")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+
+    # Isolated workspace: no cached LLM responses, checkpoints or render manifests from earlier runs
+    workspace = Path(tempfile.mkdtemp(prefix="aiflix-bench-"))
+    overrides = {
+        "OUTPUT_DIR": workspace,
+        "CHECKPOINT_DIR": workspace / "checkpoints",
+        "STATE_DB_PATH": workspace / "aiflix.db",
+        "RAG_CACHE_DIR": workspace / "rag_cache",
+        "SHOT_RETRY_DELAY": 0,
+    }
+    if args.image_concurrency:
+        overrides["IMAGE_CONCURRENCY"] = args.image_concurrency
+    if args.video_concurrency:
+        overrides["VIDEO_CONCURRENCY"] = args.video_concurrency
+        overrides["ANCHOR_QUEUE_SIZE"] = 2 * args.video_concurrency
+
+    with config_overrides(overrides):
+        from src.agents.orchestrator import Orchestrator
+        from src.batch import run_batch
+        from src.llm import MockLLM
+        from src.media.engine import VisualEngine
+        from src.tracing import get_tracer
+
+        if args.trace:
+            get_tracer().enable()
+
+        llm = MockLLM(latency=args.llm_latency, latency_sigma=args.llm_sigma, failure_rate=args.llm_failure,
+                      shot_count=args.shots, seed=args.seed)
+        engine = VisualEngine(provider="mock")
+        for i, generator in enumerate((engine.image_gen, engine.video_gen)):
+            generator.latency = args.image_latency if i == 0 else args.video_latency
+            generator.latency_sigma = args.media_sigma
+            generator.failure_rate = args.media_failure
+            generator._random.seed(args.seed + i + 1)
+
+        orchestrator = Orchestrator(llm_provider=llm, speculative_candidates=args.speculative, visual_engine=engine)
+        jobs = [
+            {"concept": f"Benchmark concept {i}", "feature": args.feature, "max_scenes": args.scenes}
+            for i in range(args.projects)
+        ]
+
+        if args.tracemalloc:
+            tracemalloc.start()
+        started = time.perf_counter()
+        summary = run_batch(orchestrator, jobs, workers=args.concurrency, root=workspace / "projects")
+        wall_time = time.perf_counter() - started
+        heap_peak = tracemalloc.get_traced_memory()[1] / 2**20 if args.tracemalloc else None
+        if args.tracemalloc:
+            tracemalloc.stop()
+
+        media_calls = engine.image_gen.calls + engine.video_gen.calls
+        media_failures = engine.image_gen.failures + engine.video_gen.failures
+        report = {
+            "projects": summary["projects"],
+            "projects_failed": summary["failed"],
+            "shots_produced": summary["shots"],
+            "wall_time_s": round(wall_time, 3),
+            "shots_per_minute": round(summary["shots"] / wall_time * 60, 2) if wall_time else 0.0,
+            "llm_calls": llm.calls,
+            "llm_failure_rate": round(llm.failures / llm.calls, 4) if llm.calls else 0.0,
+            "media_calls": media_calls,
+            "media_failure_rate": round(media_failures / media_calls, 4) if media_calls else 0.0,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "peak_python_heap_mb": round(heap_peak, 1) if heap_peak is not None else None,
+            "config": vars(args),
+        }
+
+        print(f"Projects:        {report['projects'] - report['projects_failed']}/{report['projects']} succeeded")
+        print(f"Shots produced:  {report['shots_produced']}")
+        print(f"Wall clock:      {report['wall_time_s']:.2f}s")
+        print(f"Throughput:      {report['shots_per_minute']:.1f} shots/min")
+        print(f"LLM calls:       {report['llm_calls']} ({report['llm_failure_rate']:.1%} failed)")
+        print(f"Media calls:     {report['media_calls']} ({report['media_failure_rate']:.1%} failed)")
+        print(f"Peak RSS:        {report['peak_rss_mb']:.1f} MiB")
+        if heap_peak is not None:
+            print(f"Peak heap:       {report['peak_python_heap_mb']:.1f} MiB")
+
+        if args.trace:
+            get_tracer().export_chrome(Path(args.trace))
+            print(f"\n{get_tracer().format_summary()}")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,229 @@
+import argparse
+import multiprocessing
 import os
-import chromadb
-from chromadb.config import Settings
-from pypdf import PdfReader
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 from tqdm import tqdm
-from src.config import Config, logger
+from src.config import Config
+from src.rag.bm25 import BM25Index
+from src.rag.data import KnowledgeItem
+from src.rag.retriever import bump_ingest_generation
+from src.utils import logger
 
-def ingest_books():
+# Simple chunking strategy: 1000 characters with 200 overlap; ids are "<file>_<char offset>"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+MIN_CHUNK = 50  # Skip tiny chunks
+
+def category_for(file_name: str) -> str:
+    """Determine category based on filename keywords (heuristic)."""
+    lower_name = file_name.lower()
+    if "cinematography" in lower_name or "light" in lower_name or "camera" in lower_name:
+        return "Cinematography"
+    if "screen" in lower_name or "story" in lower_name or "hero" in lower_name:
+        return "Screenwriting"
+    return "General"
+
+def iter_chunks(pages: Iterable[str], chunk_size: int = CHUNK_SIZE,
+                overlap: int = CHUNK_OVERLAP) -> Iterator[Tuple[int, str]]:
+    """
+    (offset, chunk) windows over the concatenated pages, the same as slicing the whole
+    text every chunk_size - overlap characters, but holding at most one window plus
+    one page: text before the next window's offset is dropped as soon as it's chunked.
+    """
+    step = chunk_size - overlap
+    buffer, base, offset = "", 0, 0  # buffer is text[base:]
+    for page in pages:
+        buffer += page
+        end = base + len(buffer)
+        while offset + chunk_size <= end:
+            if chunk_size >= MIN_CHUNK:
+                yield offset, buffer[offset - base:offset - base + chunk_size]
+            offset += step
+        buffer, base = buffer[offset - base:], offset
+    end = base + len(buffer)
+    while offset < end:
+        chunk = buffer[offset - base:offset - base + chunk_size]
+        if len(chunk) >= MIN_CHUNK:
+            yield offset, chunk
+        offset += step
+
+# --- Worker processes: PDF parsing and chunking ---
+
+_results = None  # The parent's message queue, set in each worker by _init_worker
+
+def _init_worker(results):
+    global _results
+    _results = results
+
+def _ingest_file(file_path: str, batch_size: int):
+    """
+    Streams one PDF's chunks to the parent in batches of batch_size, then reports
+    ("done", name, pages, chunks) or ("error", name, message). Blocks while the
+    parent's queue is full, so a worker never runs far ahead of the embedder.
+    """
+    from pypdf import PdfReader
+
+    name = Path(file_path).name
+    category = category_for(name)
+    pages = 0
+    chunks = 0
+
+    def page_texts() -> Iterator[str]:
+        nonlocal pages
+        for page in PdfReader(file_path).pages:
+            pages += 1
+            yield (page.extract_text() or "") + "\n"
+
+    try:
+        ids, documents, metadatas = [], [], []
+        for offset, chunk in iter_chunks(page_texts()):
+            ids.append(f"{name}_{offset}")
+            documents.append(chunk)
+            metadatas.append({"source": name, "category": category, "chunk_id": offset})
+            if len(ids) >= batch_size:
+                _results.put(("batch", name, ids, documents, metadatas))
+                chunks += len(ids)
+                ids, documents, metadatas = [], [], []
+        if ids:
+            _results.put(("batch", name, ids, documents, metadatas))
+            chunks += len(ids)
+        _results.put(("done", name, pages, chunks))
+    except Exception as e:
+        _results.put(("error", name, f"{e} (after {pages} pages, {chunks} chunks)"))
+
+# --- Parent process: batched embedding + upsert ---
+
+def ingest_files(collection, files: List[Path], workers: int, batch_size: int) -> Dict[str, Any]:
+    """
+    Parses and chunks `files` in a process pool while this process embeds and
+    upserts the chunk batches as they arrive (Chroma embeds each upsert batch in
+    one call). At most 2 * workers batches wait in between, which bounds memory.
+    """
+    # Spawned (not forked) workers: the parent already holds Chroma's client and threads
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue(maxsize=2 * workers)
+    stats = {"books": 0, "failed": [], "pages": 0, "chunks": 0}
+    reported = set()  # Books whose worker sent "done" or "error"
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(results,)) as pool:
+        futures = [pool.submit(_ingest_file, str(path), batch_size) for path in files]
+        remaining = len(files)
+        with tqdm(total=None, desc="Embedding", unit="chunk") as progress:
+            while remaining:
+                try:
+                    message = results.get(timeout=1.0)
+                except queue.Empty:
+                    # _ingest_file reports its own errors; an exception here means a worker died
+                    crashed = [f.exception() for f in futures if f.done() and f.exception()]
+                    if crashed:
+                        logger.error(f"Ingestion worker crashed: {crashed[0]}")
+                        # Books not started yet are dropped; workers blocked on the full queue are
+                        # unblocked by draining it, so the pool can shut down
+                        for future in futures:
+                            future.cancel()
+                        while not all(f.done() for f in futures):
+                            try:
+                                results.get(timeout=0.1)
+                            except queue.Empty:
+                                pass
+                        break
+                    continue
+
+                kind, name = message[0], message[1]
+                if kind == "batch":
+                    ids, documents, metadatas = message[2:]
+                    try:
+                        collection.upsert(documents=documents, metadatas=metadatas, ids=ids)
+                        stats["chunks"] += len(ids)
+                    except Exception as e:
+                        logger.error(f"Failed to upsert {len(ids)} chunks of {name}: {e}")
+                    progress.update(len(ids))
+                elif kind == "done":
+                    remaining -= 1
+                    reported.add(name)
+                    stats["books"] += 1
+                    stats["pages"] += message[2]
+                    progress.set_postfix(books=f"{stats['books']}/{len(files)}", pages=stats["pages"])
+                    logger.info(f"Processed: {name} ({message[2]} pages, {message[3]} chunks, {category_for(name)})")
+                else:
+                    remaining -= 1
+                    reported.add(name)
+                    stats["failed"].append(name)
+                    logger.error(f"Failed to process {name}: {message[2]}")
+
+    unprocessed = [path.name for path in files if path.name not in reported]
+    if unprocessed:
+        # Chunk ids are deterministic, so re-running the ingest completes these without duplicates
+        logger.error(f"{len(unprocessed)} books were not (fully) ingested after the crash: {', '.join(unprocessed)}")
+        stats["failed"].extend(unprocessed)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["pages_per_sec"] = round(stats["pages"] / elapsed, 1) if elapsed else 0.0
+    stats["chunks_per_sec"] = round(stats["chunks"] / elapsed, 1) if elapsed else 0.0
+    return stats
+
+def ingest_books(workers: int = None, batch_size: int = None):
     """
     Reads PDFs from Books/ directory, chunks them, and stores embeddings in ChromaDB.
     """
+    import chromadb
+
     books_dir = Config.PROJECT_ROOT / "Books"
     db_path = Config.DATA_DIR / "chroma_db"
-    
+
     if not books_dir.exists():
         logger.error(f"Books directory not found at {books_dir}")
         return
 
     logger.info(f"Initializing ChromaDB at {db_path}...")
     client = chromadb.PersistentClient(path=str(db_path))
-    
+
     # Create or get collection
     # We use the default embedding function (all-MiniLM-L6-v2) which runs locally
     collection = client.get_or_create_collection(name="aiflix_knowledge")
-    
-    files = list(books_dir.glob("*.pdf"))
+
+    files = sorted(books_dir.glob("*.pdf"))
     logger.info(f"Found {len(files)} PDF books to ingest.")
-    
-    for file_path in files:
-        logger.info(f"Processing: {file_path.name}")
-        try:
-            reader = PdfReader(file_path)
-            text_content = ""
-            for page in reader.pages:
-                text_content += page.extract_text() + "\n"
-            
-            # Simple chunking strategy (e.g., 1000 characters with overlap)
-            chunk_size = 1000
-            overlap = 200
-            chunks = []
-            metadatas = []
-            ids = []
-            
-            for i in range(0, len(text_content), chunk_size - overlap):
-                chunk = text_content[i:i + chunk_size]
-                if len(chunk) < 50:  # Skip tiny chunks
-                    continue
-                
-                # Determine category based on filename keywords (heuristic)
-                category = "General"
-                lower_name = file_path.name.lower()
-                if "cinematography" in lower_name or "light" in lower_name or "camera" in lower_name:
-                    category = "Cinematography"
-                elif "screen" in lower_name or "story" in lower_name or "hero" in lower_name:
-                    category = "Screenwriting"
-                
-                chunks.append(chunk)
-                metadatas.append({
-                    "source": file_path.name,
-                    "category": category,
-                    "chunk_id": i
-                })
-                ids.append(f"{file_path.name}_{i}")
-            
-            # Batch upsert to avoid memory issues
-            batch_size = 100
-            for j in tqdm(range(0, len(chunks), batch_size), desc=f"Embedding {file_path.name}"):
-                collection.upsert(
-                    documents=chunks[j:j+batch_size],
-                    metadatas=metadatas[j:j+batch_size],
-                    ids=ids[j:j+batch_size]
-                )
-                
-        except Exception as e:
-            logger.error(f"Failed to process {file_path.name}: {e}")
+    if files:
+        workers = min(workers or Config.INGEST_WORKERS or os.cpu_count() or 1, len(files))
+        stats = ingest_files(collection, files, workers, batch_size or Config.INGEST_BATCH_SIZE)
+        logger.info(
+            f"Ingested {stats['books']} books ({stats['pages']} pages, {stats['chunks']} chunks) "
+            f"in {stats['seconds']:.1f}s with {workers} workers: "
+            f"{stats['pages_per_sec']:.1f} pages/s, {stats['chunks_per_sec']:.1f} chunks/s"
+        )
+        if stats["failed"]:
+            logger.error(f"Failed books: {', '.join(stats['failed'])}")
 
     logger.info(f"Ingestion complete. Collection now has {collection.count()} documents.")
 
+    # Keyword index for KnowledgeRetriever's fallback path (used when Chroma is unavailable)
+    records = collection.get(include=["documents", "metadatas"])
+    BM25Index.build(
+        KnowledgeItem(
+            category=meta.get("category", "General"),
+            title=meta.get("source", "Book Excerpt"),
+            author="Inferred from source",
+            content=doc,
+            tags=[],
+        )
+        for doc, meta in zip(records["documents"], records["metadatas"])
+    ).save(Config.BM25_INDEX_PATH)
+    # Invalidates retrieval caches built from the previous corpus
+    bump_ingest_generation(db_path)
+
 if __name__ == "__main__":
-    ingest_books()
+    parser = argparse.ArgumentParser(description="Ingest Books/*.pdf into the RAG knowledge store.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="PDF parsing processes (default: AIFLIX_INGEST_WORKERS, or one per CPU).")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Chunks per embedding/upsert batch (default: AIFLIX_INGEST_BATCH_SIZE).")
+    args = parser.parse_args()
+    ingest_books(workers=args.workers, batch_size=args.batch_size)
@@ -1,8 +1,18 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any
+from ..tracing import traced
 
 class BaseAgent(ABC):
     """Abstract base class for all AiFlix agents."""
+
+    TRACED_METHODS = ("run", "arun", "run_streaming", "run_batch", "outline")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Agent entry points become spans when tracing is on
+        for method in cls.TRACED_METHODS:
+            if method in cls.__dict__:
+                setattr(cls, method, traced(f"{cls.__name__}.{method}", "agent")(cls.__dict__[method]))
     
     def __init__(self, name: str):
         self.name = name
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 from .base_agent import BaseAgent
 from ..llm import get_llm
 from ..utils import safe_json_parse, logger
@@ -17,6 +17,19 @@ If the shots are good, return {{"status": "approved"}}.
 If they need improvement, return {{"status": "rejected", "feedback": "Specific feedback on what to fix..."}}.
 """
 
+BATCH_CRITIC_SYSTEM_PROMPT = """
+You are an expert Film Critic and Technical Director.
+You will receive several candidate "Shot Lists" written by DOPs for the same screenplay scene.
+
+Evaluate every candidate independently for:
+1. **Visual Consistency**: Do they match the scene's mood?
+2. **Technical Feasibility**: Are the camera movements and lighting clear?
+3. **Generative Quality**: Is the "visual_prompt" detailed enough for a diffusion model (FLUX.1)?
+
+Return one evaluation per candidate, scoring each from 0 (unusable) to 10 (flawless):
+{"evaluations": [{"candidate": 0, "status": "approved" | "rejected", "score": 0-10, "feedback": "..."}]}
+"""
+
 class CriticAgent(BaseAgent):
     def __init__(self, provider: str = "mock"):
         super().__init__(name="CriticAgent")
@@ -40,3 +53,41 @@ class CriticAgent(BaseAgent):
 
         response = self.llm.generate(user_prompt, system_prompt=CRITIC_SYSTEM_PROMPT)
         return safe_json_parse(response)
+
+    def run_batch(self, script_data: Dict[str, Any], candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Scores several candidate shot lists in a single LLM call.
+        Returns one critique per candidate, in order; candidates the model skipped
+        come back rejected with a score of 0.
+        """
+        logger.info(f"{self.name} evaluating {len(candidates)} candidate shot lists...")
+
+        listing = "\n\n".join(
+            f"CANDIDATE {i}:\n{json.dumps(candidate)}" for i, candidate in enumerate(candidates)
+        )
+        user_prompt = f"""
+        SCENE CONTEXT:
+        {json.dumps(script_data)}
+
+        {listing}
+
+        Evaluate these candidate shot lists.
+        """
+
+        response = self.llm.generate(user_prompt, system_prompt=BATCH_CRITIC_SYSTEM_PROMPT)
+        evaluations = safe_json_parse(response).get("evaluations", [])
+
+        critiques = [{"status": "rejected", "score": 0, "feedback": "No evaluation returned."} for _ in candidates]
+        for evaluation in evaluations:
+            try:
+                index = int(evaluation.get("candidate", -1))
+                score = float(evaluation.get("score", 0))
+            except (TypeError, ValueError, AttributeError):
+                continue
+            if 0 <= index < len(candidates):
+                critiques[index] = {
+                    "status": evaluation.get("status", "rejected"),
+                    "score": score,
+                    "feedback": evaluation.get("feedback", ""),
+                }
+        return critiques
@@ -1,27 +1,31 @@
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Tuple
 from .base_agent import BaseAgent
 from ..llm import get_llm
-from ..rag.retriever import KnowledgeRetriever
+from ..rag.registry import get_retriever
 from ..rag.templates import CINEMATOGRAPHY_SYSTEM_PROMPT
-from ..utils import safe_json_parse, logger
+from ..utils import IncrementalJSONParser, safe_json_parse, logger
 import json
 
 class DOPAgent(BaseAgent):
     def __init__(self, provider: str = "mock"):
         super().__init__(name="DOPAgent")
         self.llm = get_llm(provider)
-        self.retriever = KnowledgeRetriever()
+        self.retriever = get_retriever()  # Shared and lazy: opens the store on first retrieve
 
-    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def retrieve_context(self) -> str:
+        """RAG lookup for the cinematography prompt; depends on nothing, so it can run early."""
+        knowledge_items = self.retriever.retrieve("lighting camera angle cinematic", category="Cinematography")
+        return self.retriever.format_context(knowledge_items)
+
+    def _build_prompts(self, input_data: Dict[str, Any]) -> Tuple[str, str]:
         script_data = input_data.get("script_data", {})
         feedback = input_data.get("feedback", "")        
         identities = input_data.get("identities", []) # List of IdentityProfile dicts
         
         logger.info(f"{self.name} analyzing script for visual translation...")
 
-        # 1. Retrieve RAG Context
-        knowledge_items = self.retriever.retrieve("lighting camera angle cinematic", category="Cinematography")
-        context_str = self.retriever.format_context(knowledge_items)
+        # 1. Retrieve RAG Context (may be prefetched by the orchestrator)
+        context_str = input_data.get("context") or self.retrieve_context()
 
         # Inject Identity Context
         identity_context = ""
@@ -39,9 +43,38 @@ class DOPAgent(BaseAgent):
         if feedback:
             user_prompt += f"\n\nIMPORTANT FEEDBACK FROM CRITIC: {feedback}"
 
+        return system_prompt, user_prompt
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        system_prompt, user_prompt = self._build_prompts(input_data)
+        # Optional sampling overrides (temperature, seed) for speculative candidates
+        generation_params = input_data.get("generation_params", {})
+
         # 3. Call LLM
-        response = self.llm.generate(user_prompt, system_prompt=system_prompt)
+        response = self.llm.generate(user_prompt, system_prompt=system_prompt, **generation_params)
         
         # 4. Parse and Return
         shot_list_data = safe_json_parse(response)
         return shot_list_data
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Same as run(), through the provider's async client; concurrent drafts share one event loop."""
+        system_prompt, user_prompt = self._build_prompts(input_data)
+        generation_params = input_data.get("generation_params", {})
+        response = await self.llm.agenerate(user_prompt, system_prompt=system_prompt, **generation_params)
+        return safe_json_parse(response)
+
+    def run_streaming(self, input_data: Dict[str, Any], on_shot: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """
+        Same as run(), but streams the completion and calls on_shot(shot) for each
+        shot as soon as the model finishes writing it, so production can start early.
+        Returns the full parsed shot list once the stream ends.
+        """
+        system_prompt, user_prompt = self._build_prompts(input_data)
+
+        parser = IncrementalJSONParser(keys=("shots",))
+        for fragment in self.llm.stream(user_prompt, system_prompt=system_prompt):
+            for _, shot in parser.feed(fragment):
+                on_shot(shot)
+
+        return parser.result()
@@ -1,10 +1,27 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+import asyncio
+import contextvars
+import itertools
+import json
+import queue
+import threading
 from .screenwriter import ScreenplayAgent
 from .dop import DOPAgent
 from .critic import CriticAgent
 from .identity import IdentityManager
+from .validator import ShotListValidator
+from ..checkpoint import CheckpointStore, project_id_for
+from ..dag import DAGExecutor, DAGRun, Task, TaskCancelled, TaskContext
+from ..llm import LLMProvider
+from ..llm_clients import aclose_clients
+from ..media.editor import Editor
 from ..media.engine import VisualEngine
-from ..state import ProjectState
+from ..rag.registry import warm_up as warm_up_retriever
+from ..state import ProjectState, SceneNode
+from ..tracing import span, traced
 from ..utils import logger
 from ..config import Config
 
@@ -12,75 +29,597 @@ class Orchestrator:
     """
     The 'Digital Studio Head' that manages the distributed cinematic intelligence.
     Enforces the workflow: Concept -> Identity -> Narrative -> Visual Planning -> Critique -> Production.
+
+    The workflow is expressed as a dependency graph and run by a DAGExecutor, so
+    independent work (RAG retrieval, identity definition, artifact saving)
+    overlaps instead of running back to back:
+
+        identity ----------.
+        retrieval ---> screenplay ---> shot_planning ---> save_artifacts
+                                                     \--> production ---> assembly
+
+    run_feature() applies the same crew to a whole feature: the concept is outlined
+    into ProjectState.scene_graph and each scene goes through screenplay, shot
+    planning and production on its own, several scenes at a time. With
+    stream_shots, a scene's shots start rendering while the DOP is still writing
+    the rest of its shot list.
     """
-    def __init__(self, llm_provider: str = "mock"):
+
+    # Per-task timeouts in seconds (None = unbounded)
+    TASK_TIMEOUTS = {
+        "identity": 300,
+        "retrieval": 120,
+        "screenplay": 300,
+        "shot_planning": 900,
+        "save_artifacts": 60,
+        "outline": 300,
+        "scenes": None,
+        "production": None,
+        "assembly": None,
+    }
+
+    def __init__(self, llm_provider: Union[str, LLMProvider] = "mock", speculative_candidates: int = 0,
+                 task_timeouts: Optional[Dict[str, Optional[float]]] = None, auto_approve: bool = None,
+                 visual_engine: Optional[VisualEngine] = None, stream_shots: bool = None):
         self.state = None
+        # >1 replaces the serial DOP -> Critic retry loop with N concurrent candidates
+        self.speculative_candidates = speculative_candidates
+        # Feature mode: produce shots as the DOP streams them (ignored with speculative candidates)
+        self.stream_shots = Config.FEATURE_STREAM_SHOTS if stream_shots is None else stream_shots
+        self.task_timeouts = {**self.TASK_TIMEOUTS, **(task_timeouts or {})}
+        self.executor: Optional[DAGExecutor] = None  # Most recently started run
+        self._active: Set[DAGExecutor] = set()  # Every run in flight (batch mode runs several)
+        self._active_lock = threading.Lock()
         
         # The Crew
         self.screenwriter = ScreenplayAgent(provider=llm_provider)
         self.dop = DOPAgent(provider=llm_provider)
         self.critic = CriticAgent(provider=llm_provider)
         self.identity_manager = IdentityManager(provider=llm_provider)
+        if Config.RAG_WARMUP:
+            warm_up_retriever()
+        # Deterministic pre-check between DOP and Critic (auto_approve: skip the Critic for strict passes)
+        self.validator = ShotListValidator(auto_approve=auto_approve)
         
         # The Production Engine
-        self.visual_engine = VisualEngine()
+        self.visual_engine = visual_engine or VisualEngine()
+        self.editor = Editor()
+
+    def cancel(self):
+        """Cancels every running pipeline; in-flight tasks are signalled and dependents skipped."""
+        with self._active_lock:
+            executors = list(self._active)
+        for executor in executors:
+            executor.cancel()
     
-    def run_pipeline(self, concept: str, max_shots: int = None) -> Dict[str, Any]:
-        logger.info(f"*** STUDIO HEAD INITIALIZED FOR: {concept} ***")
-        
-        # 0. Initialize State
-        self.state = ProjectState(title="Untitled", logline=concept, genre="Unknown")
-        self.state.log_event("StudioHead", "greenlight_project", concept)
+    @traced("run_pipeline", "pipeline")
+    def run_pipeline(self, concept: str = None, max_shots: int = None, assemble: bool = False,
+                     resume: str = None, output_dir: Path = None, project_id: str = None) -> Dict[str, Any]:
+        """
+        Runs (or, with resume=<project_id>, continues) a production. Every completed
+        phase and produced shot is checkpointed, so a resumed run skips them.
+        Artifacts go to output_dir (default Config.OUTPUT_DIR); give concurrent runs
+        distinct directories and, if they may share a concept, distinct project_ids
+        (default: derived from the concept). Safe to call from several threads at once.
+        """
+        output_dir = Path(output_dir or Config.OUTPUT_DIR)
+        checkpoint, state = self._open_project(concept, resume, project_id=project_id)
+        concept = checkpoint.concept
+        logger.info(f"*** STUDIO HEAD INITIALIZED FOR: {concept} (project {checkpoint.project_id}) ***")
+        self.state = state
+
+        executor = DAGExecutor(max_workers=Config.PIPELINE_WORKERS)
+
+        def task(name: str, fn, deps: List[str] = None, checkpointed: bool = False, with_state: bool = False) -> Task:
+            return self._task(checkpoint, state, name, fn, deps, checkpointed, with_state)
         
         # 1. Identity Phase (Whose story is this?)
+        def identity(ctx: TaskContext):
+            return self._define_identities(concept, state)
+
+        # RAG lookups depend on nothing, so they overlap with identity generation.
+        def retrieval(ctx: TaskContext):
+            return self._retrieve_context(concept)
+        
+        # 2. Narrative Phase (The Script)
+        def screenplay(ctx: TaskContext):
+            logger.info("--- Phase 2: Narrative Engineering ---")
+            script_data = self.screenwriter.run({
+                "concept": concept,
+                "identities": ctx["identity"],
+                "context": ctx["retrieval"]["screenwriting"],
+            })
+            if not script_data:
+                raise RuntimeError("Screenwriting failed. Aborting.")
+                
+            state.title = script_data.get("title", "Untitled")
+            logger.info(f"Script Locked: {state.title}")
+            return script_data
+        
+        # 3. Visualization Phase (The Shot List)
+        # DOP drafting and critique stay one task: critique feeds revisions back into the DOP,
+        # so the loop has no fixed shape to split into graph tasks. The critical path reports
+        # them together; traces (--trace) separate DOPAgent.run and CriticAgent.run spans.
+        def shot_planning(ctx: TaskContext):
+            logger.info("--- Phase 3: Cinematography & Critique ---")
+            script_data = ctx["screenplay"]
+            identities = ctx["identity"]
+            context = ctx["retrieval"]["cinematography"]
+            if self.speculative_candidates > 1:
+                shot_list_data = self._plan_shots_speculative(script_data, identities, context)
+            else:
+                shot_list_data = self._plan_shots_serial(script_data, identities, context, ctx)
+            
+            if not shot_list_data:
+                raise RuntimeError("DOP planning failed.")
+
+            return shot_list_data
+
+        # --- SAVE ARTIFACTS FOR USER VISIBILITY (off the production path) ---
+        def save_artifacts(ctx: TaskContext):
+            output_path = output_dir
+            output_path.mkdir(parents=True, exist_ok=True)
+            
+            # Save Screenplay
+            with open(output_path / "screenplay.json", "w") as f:
+                json.dump(ctx["screenplay"], f, indent=2)
+            
+            # Save Shotlist
+            with open(output_path / "shotlist.json", "w") as f:
+                json.dump(ctx["shot_planning"], f, indent=2)
+                
+            logger.info(f"💾 Screenplay & Shotlist saved to {output_path}")
+
+        # 4. Production Phase (Visual Engine)
+        # One task for all shots: per-shot concurrency lives in VisualEngine.generate_shots,
+        # whose image/video slots are the real bound (per-shot graph tasks would only queue on them)
+        def production(ctx: TaskContext):
+            logger.info("--- Phase 4: Production (Anchor-First Execution) ---")
+            shots_to_produce = ctx["shot_planning"].get("shots", [])
+            if max_shots:
+                logger.info(f"Limiting production to first {max_shots} shots.")
+                shots_to_produce = shots_to_produce[:max_shots]
+
+            return self._produce_shots(shots_to_produce, checkpoint, state, output_dir=output_dir / "shots")
+
+        def assembly(ctx: TaskContext):
+            produced = [r for r in ctx["production"] if r["status"] == "success"]
+            if assemble and produced:
+                self.editor.assemble(
+                    [r["video_clip"] for r in produced],
+                    output_dir / f"final_cut.{Config.VIDEO_Format}",
+                )
+            return produced
+
+        executor.add(task("identity", identity, checkpointed=True, with_state=True))
+        executor.add(task("retrieval", retrieval, checkpointed=True))
+        executor.add(task("screenplay", screenplay, deps=["identity", "retrieval"], checkpointed=True, with_state=True))
+        executor.add(task("shot_planning", shot_planning, deps=["screenplay", "identity", "retrieval"], checkpointed=True))
+        executor.add(task("save_artifacts", save_artifacts, deps=["screenplay", "shot_planning"]))
+        executor.add(task("production", production, deps=["shot_planning"]))
+        executor.add(task("assembly", assembly, deps=["production"]))
+
+        run = self._execute(executor)
+        state.history.close()
+        checkpoint.finish(state, "complete" if run.ok("production") else "failed")
+        result = self._collect(run, state)
+        if result:
+            result["project_id"] = checkpoint.project_id
+        return result
+
+    @traced("run_feature", "pipeline")
+    def run_feature(self, concept: str = None, max_scenes: int = None, max_shots: int = None,
+                    assemble: bool = False, resume: str = None, output_dir: Path = None,
+                    project_id: str = None) -> Dict[str, Any]:
+        """
+        Feature mode: outlines the concept into state.scene_graph, then develops,
+        shot-plans and produces every scene concurrently, at most SCENE_CONCURRENCY
+        at a time. Scenes share the VisualEngine's image/video slots, so wall time
+        is bounded by backend concurrency rather than by the number of scenes.
+        max_shots applies per scene; project_id is as in run_pipeline().
+
+            identity ----.
+            retrieval ---> outline ---> scenes ---> assembly
+        """
+        output_dir = Path(output_dir or Config.OUTPUT_DIR)
+        checkpoint, state = self._open_project(concept, resume, kind="feature", project_id=project_id)
+        concept = checkpoint.concept
+        logger.info(f"*** STUDIO HEAD INITIALIZED FEATURE: {concept} (project {checkpoint.project_id}) ***")
+        self.state = state
+
+        executor = DAGExecutor(max_workers=Config.PIPELINE_WORKERS)
+
+        def task(name: str, fn, deps: List[str] = None, checkpointed: bool = False, with_state: bool = False) -> Task:
+            return self._task(checkpoint, state, name, fn, deps, checkpointed, with_state)
+
+        def identity(ctx: TaskContext):
+            return self._define_identities(concept, state)
+
+        def retrieval(ctx: TaskContext):
+            return self._retrieve_context(concept)
+
+        def outline(ctx: TaskContext):
+            logger.info("--- Phase 2: Scene Outline ---")
+            outline_data = self.screenwriter.outline({
+                "concept": concept,
+                "identities": ctx["identity"],
+                "context": ctx["retrieval"]["screenwriting"],
+                "num_scenes": max_scenes,
+            })
+            scenes = outline_data.get("scenes", [])
+            if max_scenes:
+                scenes = scenes[:max_scenes]
+            if not scenes:
+                raise RuntimeError("Scene outline failed. Aborting.")
+
+            state.title = outline_data.get("title", state.title)
+            state.scene_graph = self._build_scene_graph(scenes)
+            state.log_event("ScreenplayAgent", "outline_locked", f"{len(state.scene_graph)} scenes")
+            return [asdict(node) for node in state.scene_graph]
+
+        def scenes(ctx: TaskContext):
+            if not state.scene_graph:
+                # Resumed from a checkpoint written before the state carried the outline
+                state.scene_graph = self._build_scene_graph(ctx["outline"])
+            logger.info(f"--- Phase 3: Scene Production ({len(state.scene_graph)} scenes, "
+                        f"{Config.SCENE_CONCURRENCY} in flight) ---")
+
+            def develop(node: SceneNode) -> Dict[str, Any]:
+                try:
+                    with span("scene", "scene", scene_id=node.scene_id):
+                        return self._produce_scene(node, concept, ctx, max_shots, checkpoint, state, output_dir)
+                except TaskCancelled:
+                    raise
+                except Exception as e:
+                    logger.error(f"Scene {node.scene_id} failed at status '{node.status}': {e}")
+                    return {"scene": asdict(node), "error": str(e), "produced_content": []}
+
+            with ThreadPoolExecutor(max_workers=Config.SCENE_CONCURRENCY, thread_name_prefix="scene") as pool:
+                # Submitted in copies of this task's context, so scene spans nest under it
+                futures = [pool.submit(contextvars.copy_context().run, develop, node) for node in state.scene_graph]
+                results = [f.result() for f in futures]
+            checkpoint.save_state(state)
+            return results
+
+        def assembly(ctx: TaskContext):
+            produced = [r for scene in ctx["scenes"] for r in scene["produced_content"]]
+            if assemble and produced:
+                self.editor.assemble(
+                    [r["video_clip"] for r in produced],
+                    output_dir / f"final_cut.{Config.VIDEO_Format}",
+                )
+            return produced
+
+        executor.add(task("identity", identity, checkpointed=True, with_state=True))
+        executor.add(task("retrieval", retrieval, checkpointed=True))
+        executor.add(task("outline", outline, deps=["identity", "retrieval"], checkpointed=True, with_state=True))
+        executor.add(task("scenes", scenes, deps=["outline", "identity", "retrieval"]))
+        executor.add(task("assembly", assembly, deps=["scenes"]))
+
+        run = self._execute(executor)
+        state.history.close()
+        checkpoint.finish(state, "complete" if run.ok("scenes") else "failed")
+        if not run.ok("outline"):
+            return {}
+
+        filmed = sum(1 for node in state.scene_graph if node.status == "filmed")
+        produced_shots = run.results.get("assembly", [])
+        logger.info(f"Feature Wrap. {filmed}/{len(state.scene_graph)} scenes filmed, {len(produced_shots)} shots completed.")
+        return {
+            "state": state,
+            "project_id": checkpoint.project_id,
+            "scenes": run.results.get("scenes", []),
+            "produced_content": produced_shots,
+            "timings": run
+        }
+
+    def _execute(self, executor: DAGExecutor) -> DAGRun:
+        with self._active_lock:
+            self._active.add(executor)
+            self.executor = executor
+        try:
+            run = executor.run()
+        finally:
+            with self._active_lock:
+                self._active.discard(executor)
+        logger.info(run.report())
+        return run
+
+    def _produce_scene(self, node: SceneNode, concept: str, ctx: TaskContext, max_shots: Optional[int],
+                       checkpoint: CheckpointStore, state: ProjectState, output_dir: Path) -> Dict[str, Any]:
+        """Takes one scene from pending through scripted and visualized to filmed."""
+        identities = ctx["identity"]
+        context = ctx["retrieval"]
+        scene_dir = output_dir / "scenes" / node.scene_id
+
+        def phase(name: str, status: str, fn):
+            ctx.check_cancelled()
+            key = f"{node.scene_id}:{name}"
+            if checkpoint.completed(key):
+                node.status = status
+                return checkpoint.get(key)
+            result = fn()
+            if not result:
+                raise RuntimeError(f"{name} returned nothing")
+            node.status = status  # Before mark(), so the checkpointed state carries it
+            checkpoint.mark(key, result, state)
+            return result
+
+        script_data = phase("screenplay", "scripted", lambda: self.screenwriter.run({
+            "concept": concept,
+            "identities": identities,
+            "context": context["screenwriting"],
+            "scene": asdict(node),
+        }))
+        state.log_event("ScreenplayAgent", "scene_scripted", node.scene_id)
+
+        def save_shot_list(shot_list_data: Dict[str, Any]):
+            scene_dir.mkdir(parents=True, exist_ok=True)
+            with open(scene_dir / "screenplay.json", "w") as f:
+                json.dump(script_data, f, indent=2)
+            with open(scene_dir / "shotlist.json", "w") as f:
+                json.dump(shot_list_data, f, indent=2)
+
+        planning_key = f"{node.scene_id}:shot_planning"
+        if self.stream_shots and self.speculative_candidates <= 1 and not checkpoint.completed(planning_key):
+            ctx.check_cancelled()
+
+            def planned(shot_list_data: Dict[str, Any]):
+                # Called from the DOP stream's thread once the list is complete, while shots are still rendering
+                if not shot_list_data.get("shots"):
+                    raise RuntimeError("shot_planning returned nothing")
+                node.status = "visualized"
+                checkpoint.mark(planning_key, shot_list_data, state)
+                state.log_event("DOPAgent", "scene_visualized", node.scene_id)
+                save_shot_list(shot_list_data)
+
+            shot_list_data, results = self._produce_streamed_shots(
+                {"script_data": script_data, "identities": identities, "context": context["cinematography"]},
+                planned, max_shots, checkpoint, state, output_dir=scene_dir / "shots", prefix=f"{node.scene_id}/")
+        else:
+            plan = self._plan_shots_speculative if self.speculative_candidates > 1 else self._plan_shots_serial
+            shot_list_data = phase("shot_planning", "visualized",
+                                   lambda: plan(script_data, identities, context["cinematography"]))
+            state.log_event("DOPAgent", "scene_visualized", node.scene_id)
+            save_shot_list(shot_list_data)
+
+            ctx.check_cancelled()
+            shots_to_produce = shot_list_data.get("shots", [])
+            if max_shots:
+                shots_to_produce = shots_to_produce[:max_shots]
+            results = self._produce_shots(shots_to_produce, checkpoint, state,
+                                          output_dir=scene_dir / "shots", prefix=f"{node.scene_id}/")
+        produced = [r for r in results if r["status"] == "success"]
+        if produced:
+            node.status = "filmed"
+            state.log_event("VisualEngine", "scene_filmed", node.scene_id)
+        checkpoint.save_state(state)
+
+        return {
+            "scene": asdict(node),
+            "script": script_data,
+            "shot_list": shot_list_data,
+            "produced_content": produced,
+        }
+
+    @staticmethod
+    def _build_scene_graph(scenes: List[Dict[str, Any]]) -> List[SceneNode]:
+        nodes, seen = [], set()
+        for i, scene in enumerate(scenes):
+            scene_id = str(scene.get("scene_id") or f"scene_{i + 1}")
+            if scene_id in seen:
+                scene_id = f"{scene_id}_{i + 1}"
+            seen.add(scene_id)
+            nodes.append(SceneNode(
+                scene_id=scene_id,
+                slugline=scene.get("slugline", ""),
+                time_of_day=scene.get("time_of_day", ""),
+                location=scene.get("location", ""),
+                emotional_beat=scene.get("emotional_beat", ""),
+                narrative_purpose=scene.get("narrative_purpose", ""),
+                characters_present=list(scene.get("characters_present", [])),
+                status=scene.get("status", "pending"),
+            ))
+        return nodes
+
+    def _open_project(self, concept: Optional[str], resume: Optional[str], kind: str = "",
+                      project_id: str = None) -> Tuple[CheckpointStore, ProjectState]:
+        """Loads the checkpoint of the project to resume, or greenlights a new one."""
+        if resume:
+            checkpoint = CheckpointStore.load(resume)
+            state = checkpoint.state() or ProjectState(title="Untitled", logline=checkpoint.concept, genre="Unknown")
+            state.history.attach(checkpoint.journal_path)
+            state.log_event("StudioHead", "resume_project", resume)
+            return checkpoint, state
+
+        if not concept:
+            raise ValueError("A concept or a project to resume is required.")
+        project_id = project_id or project_id_for(concept, kind)
+        checkpoint = CheckpointStore(project_id)
+        # 0. Initialize State
+        state = ProjectState(title="Untitled", logline=concept, genre="Unknown")
+        state.history.attach(checkpoint.journal_path, truncate=True)
+        state.log_event("StudioHead", "greenlight_project", concept)
+        checkpoint.start(concept, state)
+        return checkpoint, state
+
+    def _task(self, checkpoint: CheckpointStore, state: ProjectState, name: str, fn, deps: List[str] = None,
+              checkpointed: bool = False, with_state: bool = False) -> Task:
+        if checkpointed:
+            fn = self._checkpointed(checkpoint, name, fn, state if with_state else None)
+        return Task(name=name, fn=fn, deps=deps or [], timeout=self.task_timeouts.get(name))
+
+    def _define_identities(self, concept: str, state: ProjectState) -> List[Dict[str, Any]]:
         logger.info("--- Phase 1: Identity Definition ---")
         identity_data = self.identity_manager.run({"concept": concept})
-        self.state.log_event("IdentityManager", "profiles_generated")
+        state.log_event("IdentityManager", "profiles_generated")
         
         if identity_data and "profiles" in identity_data:
-            self.identity_manager.update_state(self.state, identity_data)
-            logger.info(f"Identities locked: {list(self.state.identities.keys())}")
+            self.identity_manager.update_state(state, identity_data)
+            logger.info(f"Identities locked: {list(state.identities.keys())}")
         else:
             logger.warning("Identity generation returned incomplete data.")
-        
-        # 2. Information Handover: Identity -> Screenwriter
-        # Update: We now pass the identity context implicitly or explicitly if needed.
-        # The screenwriter primarily needs concept, but knowing characters helps.
-        
-        # 3. Narrative Phase (The Script)
-        logger.info("--- Phase 2: Narrative Engineering ---")
-        script_input = {
-            "concept": concept,
-            "identities": [p.__dict__ for p in self.state.identities.values()]
+        return [p.__dict__ for p in state.identities.values()]
+
+    def _retrieve_context(self, concept: str) -> Dict[str, str]:
+        return {
+            "screenwriting": self.screenwriter.retrieve_context(concept),
+            "cinematography": self.dop.retrieve_context(),
         }
-        script_data = self.screenwriter.run(script_input)
-        
-        if not script_data:
-            logger.error("Screenwriting failed. Aborting.")
+
+    def _produce_shots(self, shots: Iterable[Dict[str, Any]], checkpoint: CheckpointStore, state: ProjectState,
+                       output_dir=None, prefix: str = "") -> List[Dict[str, Any]]:
+        """
+        Runs shots through the VisualEngine, reusing any an earlier (crashed) run already produced.
+        `shots` may be a list or an iterable still being filled (a streaming DOP).
+        """
+        listed = isinstance(shots, list)
+        reused: Dict[int, Dict[str, Any]] = {}
+        key_for: Dict[int, str] = {}  # Results carry their shot dict back
+        count = 0
+
+        def fresh_shots():
+            nonlocal count
+            for index, shot in enumerate(shots):
+                count = index + 1
+                # One checkpoint key per shot, for both lookup and recording; shots without an id fall back to their position
+                key = f"{prefix}{shot.get('shot_id', index)}"
+                previous = checkpoint.produced_shot(key)
+                if previous:
+                    reused[index] = previous
+                    continue
+                key_for[id(shot)] = key
+                if not listed:
+                    checkpoint.track_shots([key], "pending")
+                yield shot
+
+        if listed:
+            # A known list: look every shot up now and mark the rest pending in one batch
+            pending = list(fresh_shots())
+            checkpoint.track_shots([key_for[id(shot)] for shot in pending], "pending")
+        else:
+            pending = fresh_shots()
+
+        def on_result(result: Dict[str, Any]):
+            shot_id = key_for[id(result["shot_metadata"])]
+            if result["status"] == "success":
+                state.log_event("VisualEngine", "shot_produced", shot_id)
+                checkpoint.record_shot(shot_id, result)
+            else:
+                logger.error(f"Failed to produce shot {shot_id}")
+                checkpoint.track_shots([shot_id], "failed", [result])
+
+        fresh = iter(self.visual_engine.generate_shots(pending, on_result=on_result, output_dir=output_dir))
+        if reused:
+            logger.info(f"Reused {len(reused)} shots from checkpoint.")
+        return [reused[i] if i in reused else next(fresh) for i in range(count)]
+
+    def _produce_streamed_shots(self, dop_input: Dict[str, Any], on_planned, max_shots: Optional[int],
+                                checkpoint: CheckpointStore, state: ProjectState, output_dir=None,
+                                prefix: str = "") -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Streams the DOP's shot list straight into production: each shot starts
+        rendering as soon as the model closes it. This commits to the first draft
+        (no validator or critic round); on_planned(shot_list) runs once the stream ends.
+        """
+        streamed: "queue.Queue" = queue.Queue()
+        outcome: Dict[str, Any] = {}
+
+        def on_shot(shot: Any):
+            if isinstance(shot, dict):
+                streamed.put(shot)
+
+        def plan():
+            try:
+                outcome["shot_list"] = self.dop.run_streaming(dop_input, on_shot)
+                on_planned(outcome["shot_list"])
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                streamed.put(None)
+
+        planner = threading.Thread(target=contextvars.copy_context().run, args=(plan,), name="dop-stream", daemon=True)
+        planner.start()
+        shots = iter(streamed.get, None)
+        if max_shots:
+            shots = itertools.islice(shots, max_shots)
+        results = self._produce_shots(shots, checkpoint, state, output_dir=output_dir, prefix=prefix)
+        planner.join()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["shot_list"], results
+
+    @staticmethod
+    def _checkpointed(checkpoint: CheckpointStore, name: str, fn, state: Optional[ProjectState]):
+        """Wraps a phase so a resumed run returns its checkpointed result instead of redoing it."""
+        def run(ctx: TaskContext):
+            if checkpoint.completed(name):
+                logger.info(f"Skipping '{name}' (restored from checkpoint).")
+                return checkpoint.get(name)
+            result = fn(ctx)
+            checkpoint.mark(name, result, state)
+            return result
+        return run
+
+    def _collect(self, run: DAGRun, state: ProjectState) -> Dict[str, Any]:
+        """Maps executor results back onto the pipeline's historical return shape."""
+        if not run.ok("screenplay"):
             return {}
-            
-        self.state.title = script_data.get("title", "Untitled")
-        logger.info(f"Script Locked: {self.state.title}")
-        
-        # 4. Visualization Phase (The Shot List)
-        logger.info("--- Phase 3: Cinematography & Critique ---")
+        script_data = run.results["screenplay"]
+        if not run.ok("shot_planning"):
+            return {"script": script_data}
+
+        produced_shots = run.results.get("assembly", [])
+        logger.info(f"Production Wrap. {len(produced_shots)} shots completed.")
         
+        return {
+            "state": state,
+            "script": script_data,
+            "shot_list": run.results["shot_planning"],
+            "produced_content": produced_shots,
+            "timings": run
+        }
+
+    def _plan_shots_serial(self, script_data: Dict[str, Any], identities: List[Dict[str, Any]], context: str = "",
+                           ctx: Optional[TaskContext] = None) -> Dict[str, Any]:
+        """
+        DOP proposes, the validator screens out mechanical defects, Critic reviews;
+        rejected plans are retried with the validator's or critic's feedback.
+        With a task context, a timed-out or cancelled task stops between rounds.
+        """
         shot_list_data = {}
         feedback = ""
         max_retries = 3
         
         for i in range(max_retries):
+            if ctx is not None:
+                ctx.check_cancelled()
             logger.info(f"Optimization Loop {i+1}/{max_retries}...")
             
             # DOP input includes Script AND Identity Constraints
             dop_input = {
                 "script_data": script_data,
-                "identities": [p.__dict__ for p in self.state.identities.values()]
+                "identities": identities,
+                "context": context
             }
             if feedback:
                 dop_input["feedback"] = feedback
                 
             shot_list_data = self.dop.run(dop_input)
+
+            # Local structural checks first: no Critic round-trip for mechanical defects
+            validation = self.validator.run({
+                "script_data": script_data,
+                "shot_list_data": shot_list_data,
+                "identities": identities
+            })
+            if validation["status"] == "rejected":
+                feedback = validation["feedback"]
+                logger.info(f"Validator REJECTED. Feedback: {feedback}")
+                continue
+            if validation["status"] == "approved":
+                logger.info("Validator APPROVED the visual plan (strict rules passed, critic skipped).")
+                break
             
             # Critic evaluates
             critique = self.critic.run({
@@ -94,49 +633,61 @@ class Orchestrator:
             else:
                 feedback = critique.get("feedback", "Improve visual prompts.")
                 logger.info(f"Critic REJECTED. Feedback: {feedback}")
-        
-        if not shot_list_data:
-            logger.error("DOP planning failed.")
-            return {"script": script_data}
-            
-        # --- SAVE ARTIFACTS FOR USER VISIBILITY ---
-        import json
-        output_path = Config.OUTPUT_DIR
-        output_path.mkdir(parents=True, exist_ok=True)
-        
-        # Save Screenplay
-        with open(output_path / "screenplay.json", "w") as f:
-            json.dump(script_data, f, indent=2)
-        
-        # Save Shotlist
-        with open(output_path / "shotlist.json", "w") as f:
-            json.dump(shot_list_data, f, indent=2)
-            
-        logger.info(f"💾 Screenplay & Shotlist saved to {output_path}")
-        # -------------------------------------------
-            
-        # 5. Production Phase (Visual Engine)
-        logger.info("--- Phase 4: Production (Anchor-First Execution) ---")
-        produced_shots = []
-        
-        shots_to_produce = shot_list_data.get("shots", [])
-        if max_shots:
-            logger.info(f"Limiting production to first {max_shots} shots.")
-            shots_to_produce = shots_to_produce[:max_shots]
-            
-        for shot in shots_to_produce:
-            result = self.visual_engine.generate_shot(shot)
-            if result["status"] == "success":
-                produced_shots.append(result)
-                self.state.log_event("VisualEngine", "shot_produced", str(shot.get("shot_id", "unknown")))
-            else:
-                logger.error(f"Failed to produce shot {shot.get('shot_id')}")
-        
-        logger.info(f"Production Wrap. {len(produced_shots)} shots completed.")
-        
-        return {
-            "state": self.state,
-            "script": script_data,
-            "shot_list": shot_list_data,
-            "produced_content": produced_shots
-        }
+
+        return shot_list_data
+
+    def _plan_shots_speculative(self, script_data: Dict[str, Any], identities: List[Dict[str, Any]], context: str = "") -> Dict[str, Any]:
+        """
+        Drafts N shot lists concurrently with diverse sampling, has the critic score
+        them all in one batched call, and keeps the best. Costs roughly two LLM
+        round-trips regardless of how often the critic would have rejected.
+        """
+        n = self.speculative_candidates
+        logger.info(f"Speculative planning: drafting {n} shot list candidates in parallel...")
+
+        def draft_input(i: int) -> Dict[str, Any]:
+            return {
+                "script_data": script_data,
+                "identities": identities,
+                "context": context,
+                # Spread temperature across candidates; distinct seeds also keep cache keys distinct
+                "generation_params": {"temperature": round(0.5 + 0.8 * i / max(n - 1, 1), 2), "seed": i},
+            }
+
+        async def draft_all() -> List[Dict[str, Any]]:
+            # All N requests share the provider's async client (one connection pool) on this loop
+            try:
+                return await asyncio.gather(*(self.dop.arun(draft_input(i)) for i in range(n)))
+            finally:
+                await aclose_clients()
+
+        drafts = asyncio.run(draft_all())
+
+        validations = [
+            self.validator.run({"script_data": script_data, "shot_list_data": c, "identities": identities})
+            for c in drafts
+        ]
+        candidates = [c for c, v in zip(drafts, validations) if v["status"] != "rejected"]
+        if not candidates:
+            logger.error("No speculative candidate passed structural validation.")
+            usable = [c for c in drafts if c.get("shots")]
+            return usable[0] if usable else {}
+        for c, v in zip(drafts, validations):
+            if v["status"] == "approved":
+                logger.info("Validator APPROVED a candidate (strict rules passed, critic skipped).")
+                return c
+        if len(candidates) == 1:
+            return candidates[0]
+
+        critiques = self.critic.run_batch(script_data, candidates)
+        ranked = sorted(
+            zip(candidates, critiques),
+            key=lambda pair: (pair[1].get("status") == "approved", pair[1].get("score", 0)),
+            reverse=True,
+        )
+        best, critique = ranked[0]
+        logger.info(
+            f"Critic picked a candidate ({critique.get('status')}, score {critique.get('score')}): "
+            f"{critique.get('feedback', '')}"
+        )
+        return best
@@ -1,27 +1,65 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+import json
 from .base_agent import BaseAgent
+from ..config import Config
 from ..llm import get_llm
-from ..rag.retriever import KnowledgeRetriever
-from ..rag.templates import NARRATIVE_SYSTEM_PROMPT
+from ..rag.registry import get_retriever
+from ..rag.templates import NARRATIVE_SYSTEM_PROMPT, OUTLINE_SYSTEM_PROMPT
 from ..utils import safe_json_parse, logger
 
 class ScreenplayAgent(BaseAgent):
     def __init__(self, provider: str = "mock"):
         super().__init__(name="ScreenplayAgent")
         self.llm = get_llm(provider)
-        self.retriever = KnowledgeRetriever()
+        self.retriever = get_retriever()  # Shared and lazy: opens the store on first retrieve
 
-    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def retrieve_context(self, concept: str) -> str:
+        """RAG lookup for the narrative prompt; independent of identities, so it can run early."""
+        knowledge_items = self.retriever.retrieve(self._context_query(concept), category="Screenwriting")
+        return self.retriever.format_context(knowledge_items)
+
+    def prefetch_contexts(self, concepts: List[str]):
+        """One batched RAG lookup for many concepts; later retrieve_context calls hit the retrieval cache."""
+        self.retriever.retrieve_many([self._context_query(c) for c in concepts], category="Screenwriting")
+
+    @staticmethod
+    def _context_query(concept: str) -> str:
+        return f"{concept} structure hero"
+
+    def _build_prompts(self, input_data: Dict[str, Any]) -> Tuple[str, str]:
         concept = input_data.get("concept", "")
         logger.info(f"{self.name} processing concept: {concept}")
 
-        # 1. Retrieve RAG Context
-        knowledge_items = self.retriever.retrieve(f"{concept} structure hero", category="Screenwriting")
-        context_str = self.retriever.format_context(knowledge_items)
+        # 1. Retrieve RAG Context (may be prefetched by the orchestrator)
+        context_str = input_data.get("context") or self.retrieve_context(concept)
 
         # 2. Construct Prompt
         system_prompt = NARRATIVE_SYSTEM_PROMPT.format(context=context_str)
         user_prompt = f"Develop the narrative for: {concept}"
+        scene = input_data.get("scene")
+        if scene:
+            # Feature mode: write one scene of the outline
+            user_prompt += f"\n\nSCENE TO WRITE:\n{json.dumps(scene)}"
+
+        return system_prompt, user_prompt
+
+    def outline(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Breaks the concept into a title and an ordered list of scenes (SceneNode fields) for feature mode."""
+        concept = input_data.get("concept", "")
+        num_scenes = input_data.get("num_scenes") or Config.FEATURE_SCENES
+        logger.info(f"{self.name} outlining ~{num_scenes} scenes for: {concept}")
+
+        context_str = input_data.get("context") or self.retrieve_context(concept)
+        system_prompt = OUTLINE_SYSTEM_PROMPT.format(context=context_str, num_scenes=num_scenes)
+        user_prompt = f"Outline the scenes for: {concept}"
+        if input_data.get("identities"):
+            user_prompt += f"\n\nCHARACTERS:\n{json.dumps(input_data['identities'])}"
+
+        response = self.llm.generate(user_prompt, system_prompt=system_prompt)
+        return safe_json_parse(response)
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        system_prompt, user_prompt = self._build_prompts(input_data)
 
         # 3. Call LLM
         response = self.llm.generate(user_prompt, system_prompt=system_prompt)
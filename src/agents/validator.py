@@ -0,0 +1,135 @@
+from typing import Dict, Any, List
+import re
+from .base_agent import BaseAgent
+from ..config import Config
+from ..utils import logger
+
+ASPECT_RATIO_PATTERN = re.compile(r"^\d+(\.\d+)?:\d+(\.\d+)?$")
+# Ratios the image backends render natively
+KNOWN_ASPECT_RATIOS = {"1:1", "16:9", "9:16", "21:9", "9:21", "4:3", "3:4", "3:2", "2:3", "5:4", "4:5", "2.39:1", "1.85:1"}
+MIN_STRICT_PROMPT_WORDS = 8
+LENS_RANGE_MM = (8, 600)
+
+class ShotListValidator(BaseAgent):
+    """
+    Deterministic, LLM-free checks run between the DOP and the Critic.
+
+    Mechanical defects (an unparseable or empty shot list, an empty visual_prompt,
+    a malformed aspect_ratio, a character from the beats whose identity trigger is
+    missing) are rejected locally with machine-written feedback, saving a Critic
+    round-trip. A list that also passes the strict rules can be approved without
+    the Critic when auto_approve is enabled.
+
+    Returns {"status": "rejected" | "approved" | "passed", "feedback": str, "issues": [...]},
+    where "passed" means "no defects found, ask the Critic".
+    """
+
+    def __init__(self, auto_approve: bool = None):
+        super().__init__(name="ShotListValidator")
+        self.auto_approve = Config.VALIDATOR_AUTO_APPROVE if auto_approve is None else auto_approve
+        self.stats = {"rejected": 0, "approved": 0, "passed": 0}
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        script_data = input_data.get("script_data", {})
+        shot_list_data = input_data.get("shot_list_data", {})
+        identities = input_data.get("identities", [])
+
+        errors = self._errors(script_data, shot_list_data, identities)
+        if errors:
+            status = "rejected"
+            feedback = "Fix these shot list defects: " + "; ".join(errors)
+            issues = errors
+        else:
+            warnings = self._strict_warnings(shot_list_data)
+            status = "approved" if self.auto_approve and not warnings else "passed"
+            feedback = "Passed strict structural validation." if not warnings else "; ".join(warnings)
+            issues = warnings
+
+        self.stats[status] += 1
+        logger.info(f"{self.name}: {status} ({len(issues)} issues)")
+        return {"status": status, "feedback": feedback, "issues": issues}
+
+    def _errors(self, script_data: Dict[str, Any], shot_list_data: Any, identities: List[Dict[str, Any]]) -> List[str]:
+        if not isinstance(shot_list_data, dict) or not shot_list_data:
+            return ["the response was not a valid JSON shot list"]
+        shots = shot_list_data.get("shots")
+        if not isinstance(shots, list) or not shots:
+            return ["'shots' must be a non-empty list"]
+
+        errors = []
+        seen_ids = set()
+        for i, shot in enumerate(shots):
+            if not isinstance(shot, dict):
+                errors.append(f"shot #{i + 1} is not an object")
+                continue
+            label = f"shot {shot.get('shot_id', f'#{i + 1}')}"
+
+            shot_id = shot.get("shot_id")
+            if shot_id is None:
+                errors.append(f"{label}: missing shot_id")
+            elif str(shot_id) in seen_ids:
+                errors.append(f"{label}: duplicate shot_id")
+            seen_ids.add(str(shot_id))
+
+            if not str(shot.get("visual_prompt") or "").strip():
+                errors.append(f"{label}: visual_prompt is empty")
+
+            aspect_ratio = shot.get("aspect_ratio")
+            if aspect_ratio is not None and not ASPECT_RATIO_PATTERN.match(str(aspect_ratio).strip()):
+                errors.append(f"{label}: aspect_ratio '{aspect_ratio}' is not W:H (e.g. 2.39:1)")
+
+        errors.extend(self._identity_errors(script_data, shots, identities))
+        return errors
+
+    def _identity_errors(self, script_data: Dict[str, Any], shots: List[Any], identities: List[Dict[str, Any]]) -> List[str]:
+        """Every character named in the beats needs its trigger in at least one shot, and in every shot that names it."""
+        beats_text = " ".join(
+            f"{beat.get('action', '')} {beat.get('dialogue', '')}"
+            for beat in script_data.get("scene_beats", []) if isinstance(beat, dict)
+        )
+        errors = []
+        for profile in identities:
+            trigger = profile.get("visual_embedding_trigger")
+            name_pattern = self._name_pattern(profile.get("name", ""))
+            if not trigger or name_pattern is None or not name_pattern.search(beats_text):
+                continue
+
+            prompts = [(shot, str(shot.get("visual_prompt") or "")) for shot in shots if isinstance(shot, dict)]
+            if not any(trigger in prompt for _, prompt in prompts):
+                errors.append(f"{profile['name']} appears in the beats but no visual_prompt uses trigger '{trigger}'")
+                continue
+            for shot, prompt in prompts:
+                mentions = f"{shot.get('narrative_beat_ref', '')} {prompt}"
+                if name_pattern.search(mentions) and trigger not in prompt:
+                    errors.append(f"shot {shot.get('shot_id')}: shows {profile['name']} but visual_prompt lacks trigger '{trigger}'")
+        return errors
+
+    @staticmethod
+    def _name_pattern(name: str):
+        """Matches the full name or the surname, e.g. 'Detective Cole' or 'COLE'."""
+        tokens = [t for t in re.split(r"\s+", name.strip()) if t]
+        if not tokens:
+            return None
+        alternatives = {re.escape(name.strip()), re.escape(tokens[-1])}
+        return re.compile(r"\b(" + "|".join(sorted(alternatives)) + r")\b", re.IGNORECASE)
+
+    def _strict_warnings(self, shot_list_data: Dict[str, Any]) -> List[str]:
+        """The stricter rule set a list must pass to skip the Critic."""
+        warnings = []
+        for shot in shot_list_data.get("shots", []):
+            label = f"shot {shot.get('shot_id')}"
+            if not shot.get("shot_type"):
+                warnings.append(f"{label}: missing shot_type")
+            lens = shot.get("lens_mm")
+            # bool is an int subclass; True is not a focal length
+            if isinstance(lens, bool) or not isinstance(lens, (int, float)) or not LENS_RANGE_MM[0] <= lens <= LENS_RANGE_MM[1]:
+                warnings.append(f"{label}: lens_mm {lens!r} is not a focal length in mm")
+            if not isinstance(shot.get("lighting"), dict) or not shot["lighting"].get("key"):
+                warnings.append(f"{label}: lighting.key is not specified")
+            if not isinstance(shot.get("movement"), dict) or not shot["movement"].get("type"):
+                warnings.append(f"{label}: movement.type is not specified")
+            if shot.get("aspect_ratio") not in KNOWN_ASPECT_RATIOS:
+                warnings.append(f"{label}: aspect_ratio {shot.get('aspect_ratio')!r} is not a supported render ratio")
+            if len(str(shot.get("visual_prompt", "")).split()) < MIN_STRICT_PROMPT_WORDS:
+                warnings.append(f"{label}: visual_prompt is shorter than {MIN_STRICT_PROMPT_WORDS} words")
+        return warnings
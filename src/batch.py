@@ -0,0 +1,134 @@
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .checkpoint import project_id_for
+from .config import Config
+from .utils import logger
+
+# Job ids name checkpoint, journal and workspace paths
+_JOB_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+def job_project_id(job: Dict[str, Any]) -> str:
+    """The job's project id: its "id", else the id the Orchestrator derives from the concept."""
+    return job.get("id") or project_id_for(job["concept"], "feature" if job.get("feature") else "")
+
+def load_jobs(path: Path) -> List[Dict[str, Any]]:
+    """
+    Reads one job per JSONL line: either a bare JSON string (the concept) or an
+    object with "concept" and optional "id", "max_shots", "feature", "max_scenes".
+    Every job gets a unique project id (the default is derived from the concept),
+    which keys its checkpoint, journal and workspace; duplicates are skipped.
+    """
+    jobs = []
+    seen = set()
+    with open(path, "r") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping {path}:{line_no}: {e}")
+                continue
+            if isinstance(job, str):
+                job = {"concept": job}
+            if not job.get("concept"):
+                logger.error(f"Skipping {path}:{line_no}: no concept")
+                continue
+            job["id"] = job_project_id(job)
+            if not _JOB_ID.fullmatch(job["id"]):
+                logger.error(f"Skipping {path}:{line_no}: invalid id {job['id']!r}")
+                continue
+            if job["id"] in seen:
+                logger.error(f"Skipping {path}:{line_no}: duplicate project id {job['id']!r} (give the job a unique \"id\")")
+                continue
+            seen.add(job["id"])
+            jobs.append(job)
+    return jobs
+
+def run_batch(orchestrator, jobs: List[Dict[str, Any]], workers: int = None,
+              assemble: bool = False, root: Path = None) -> Dict[str, Any]:
+    """
+    Runs every job concurrently on one warm Orchestrator (shared agents, LLM clients,
+    retriever and VisualEngine slots). Each project writes to its own workspace,
+    root/<project_id>, so concurrent runs never overwrite each other's artifacts.
+    Returns (and saves as batch_summary.json) per-project outcomes and throughput.
+    """
+    project_ids = [job_project_id(job) for job in jobs]
+    if len(set(project_ids)) != len(project_ids):
+        # Two runs on one project id would share (and corrupt) one checkpoint and journal
+        raise ValueError("Batch jobs must have unique project ids.")
+    workers = workers or Config.BATCH_WORKERS
+    root = Path(root or Config.OUTPUT_DIR / "projects")
+    root.mkdir(parents=True, exist_ok=True)
+
+    def run_one(job: Dict[str, Any]) -> Dict[str, Any]:
+        concept = job["concept"]
+        project_id = job_project_id(job)
+        workspace = root / project_id
+        started = time.perf_counter()
+        outcome = {"project_id": project_id, "concept": concept, "workspace": str(workspace)}
+        try:
+            if job.get("feature"):
+                result = orchestrator.run_feature(concept, max_scenes=job.get("max_scenes"), max_shots=job.get("max_shots"),
+                                                  assemble=assemble, output_dir=workspace, project_id=project_id)
+            else:
+                result = orchestrator.run_pipeline(concept, max_shots=job.get("max_shots"),
+                                                   assemble=assemble, output_dir=workspace, project_id=project_id)
+            if not result or ("shot_list" not in result and "scenes" not in result):
+                outcome.update(status="failed", error="pipeline produced no shot list")
+            else:
+                outcome.update(status="ok", shots=len(result.get("produced_content", [])),
+                               checkpoint=result.get("project_id"))
+        except Exception as e:
+            logger.error(f"Batch project {project_id} failed: {e}")
+            outcome.update(status="failed", error=str(e))
+        outcome["seconds"] = round(time.perf_counter() - started, 2)
+        return outcome
+
+    # One batched RAG query for every project's screenplay context; the projects then hit the retrieval cache
+    if orchestrator.screenwriter.retriever.cache is not None:
+        try:
+            orchestrator.screenwriter.prefetch_contexts([job["concept"] for job in jobs])
+        except Exception as e:
+            logger.error(f"Batch RAG prefetch failed: {e}")
+
+    logger.info(f"Batch: {len(jobs)} projects, {workers} at a time, workspaces under {root}")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        outcomes = list(pool.map(run_one, jobs))
+    wall_time = time.perf_counter() - started
+
+    succeeded = [o for o in outcomes if o["status"] == "ok"]
+    shots = sum(o.get("shots", 0) for o in succeeded)
+    summary = {
+        "projects": len(outcomes),
+        "succeeded": len(succeeded),
+        "failed": len(outcomes) - len(succeeded),
+        "shots": shots,
+        "wall_time": round(wall_time, 2),
+        "projects_per_hour": round(len(succeeded) / wall_time * 3600, 2) if wall_time else 0.0,
+        "shots_per_hour": round(shots / wall_time * 3600, 2) if wall_time else 0.0,
+        "results": outcomes,
+    }
+    with open(root / "batch_summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = [
+        f"Batch: {summary['succeeded']}/{summary['projects']} projects succeeded, "
+        f"{summary['shots']} shots in {summary['wall_time']:.1f}s "
+        f"({summary['projects_per_hour']:.1f} projects/h, {summary['shots_per_hour']:.1f} shots/h)"
+    ]
+    for outcome in summary["results"]:
+        if outcome["status"] == "ok":
+            lines.append(f"  ✅ {outcome['project_id']:<50} {outcome['shots']} shots, {outcome['seconds']:.1f}s")
+        else:
+            lines.append(f"  ❌ {outcome['project_id']:<50} {outcome.get('error', '')}")
+    return "\n".join(lines)
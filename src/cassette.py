@@ -0,0 +1,272 @@
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zipfile
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .config import Config
+from .llm import LLMProvider
+from .utils import logger
+
+INTERACTIONS_NAME = "interactions.jsonl"
+
+class CassetteMiss(Exception):
+    """Replay found no recorded interaction for a request."""
+
+class RecordedError(Exception):
+    """An exception raised by the original call, re-raised on replay."""
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    blob = json.dumps([kind, request], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class Cassette:
+    """
+    Record/replay store for external calls (LLM completions, media HTTP and
+    Replicate runs).
+
+    Record mode performs each call, and appends its request key, response
+    metadata and observed latency to `<path>.partial/interactions.jsonl`.
+    Response bodies go to content-addressed blob files, so identical downloads are
+    stored once. save() packs everything into one zip at `path`. A crashed
+    recording leaves the .partial directory, which can also be replayed.
+
+    Replay mode serves interactions back in recorded order per request key. With
+    timing > 0 it sleeps for timing x the recorded latency, so a production run
+    replays at its original (or a scaled) speed.
+    """
+
+    def __init__(self, path: Path, mode: str = "replay", timing: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.timing = timing
+        self._lock = threading.Lock()
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._blob_dir: Optional[Path] = None
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+        if mode == "record":
+            self._partial = self.path.with_name(self.path.name + ".partial")
+            shutil.rmtree(self._partial, ignore_errors=True)
+            (self._partial / "blobs").mkdir(parents=True)
+            self._log = open(self._partial / INTERACTIONS_NAME, "a")
+        else:
+            self._load()
+
+    # --- Storage ---
+
+    def _load(self):
+        if self.path.is_dir() or not self.path.exists():
+            # Unfinished recording (or an unpacked cassette)
+            directory = self.path if self.path.is_dir() else self.path.with_name(self.path.name + ".partial")
+            if not directory.exists():
+                raise FileNotFoundError(f"No cassette at {self.path}")
+            lines = (directory / INTERACTIONS_NAME).read_text().splitlines()
+            self._blob_dir = directory / "blobs"
+        else:
+            self._zip = zipfile.ZipFile(self.path, "r")
+            lines = self._zip.read(INTERACTIONS_NAME).decode("utf-8").splitlines()
+
+        for line in lines:
+            if line.strip():
+                interaction = json.loads(line)
+                self._queues.setdefault(interaction["key"], deque()).append(interaction)
+        logger.info(f"Cassette loaded: {sum(len(q) for q in self._queues.values())} interactions from {self.path}")
+
+    def _put_blob(self, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._partial / "blobs" / digest
+        if not blob_path.exists():
+            blob_path.write_bytes(body)
+        return digest
+
+    def _get_blob(self, digest: str) -> bytes:
+        with self._lock:
+            if self._zip is not None:
+                return self._zip.read(f"blobs/{digest}")
+            return (self._blob_dir / digest).read_bytes()
+
+    def save(self):
+        """Packs a recording into a single zip. Safe to call more than once."""
+        if self.mode != "record" or self._log.closed:
+            return
+        with self._lock:
+            self._log.close()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+            with zipfile.ZipFile(tmp_path, "w") as archive:
+                archive.write(self._partial / INTERACTIONS_NAME, INTERACTIONS_NAME, compress_type=zipfile.ZIP_DEFLATED)
+                for blob in sorted((self._partial / "blobs").iterdir()):
+                    # Media bodies are already compressed
+                    archive.write(blob, f"blobs/{blob.name}", compress_type=zipfile.ZIP_STORED)
+            os.replace(tmp_path, self.path)
+            shutil.rmtree(self._partial, ignore_errors=True)
+        logger.info(f"Cassette saved: {self.recorded} interactions to {self.path}")
+
+    # --- Record / replay ---
+
+    def record(self, kind: str, request: Dict[str, Any], response: Dict[str, Any],
+               body: Optional[bytes] = None, latency: float = 0.0, error: Optional[Exception] = None,
+               summary: str = ""):
+        interaction = {
+            "kind": kind,
+            "key": request_key(kind, request),
+            "summary": summary[:120],
+            "response": response,
+            "latency": round(latency, 4),
+        }
+        if error is not None:
+            interaction["error"] = f"{type(error).__name__}: {error}"
+        with self._lock:
+            if body is not None:
+                interaction["blob"] = self._put_blob(body)
+            self._log.write(json.dumps(interaction, default=str) + "\n")
+            self._log.flush()
+            self.recorded += 1
+
+    def lookup(self, kind: str, request: Dict[str, Any], summary: str = "") -> Dict[str, Any]:
+        key = request_key(kind, request)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded {kind} interaction for {summary[:80] or key[:12]}")
+            interaction = queue.popleft() if len(queue) > 1 else queue[0]  # The last recording keeps serving repeats
+            self.replayed += 1
+        return interaction
+
+    def replay_delay(self, interaction: Dict[str, Any]) -> float:
+        return interaction.get("latency", 0.0) * self.timing
+
+    def call(self, kind: str, request: Dict[str, Any], perform: Callable[[], Tuple[Dict[str, Any], Optional[bytes]]],
+             summary: str = "") -> Tuple[Dict[str, Any], Optional[bytes]]:
+        """Records perform()'s outcome, or serves the recorded one. Returns (response metadata, body)."""
+        if self.mode == "replay":
+            interaction = self.lookup(kind, request, summary)
+            time.sleep(self.replay_delay(interaction))
+            if "error" in interaction:
+                raise RecordedError(interaction["error"])
+            body = self._get_blob(interaction["blob"]) if interaction.get("blob") else None
+            return interaction["response"], body
+
+        started = time.perf_counter()
+        try:
+            response, body = perform()
+        except Exception as e:
+            self.record(kind, request, {}, latency=time.perf_counter() - started, error=e, summary=summary)
+            raise
+        self.record(kind, request, response, body, time.perf_counter() - started, summary=summary)
+        return response, body
+
+    def setting(self, name: str, choose: Callable[[], Any]) -> Any:
+        """
+        A run-wide choice that depends on the environment (e.g. which media backend
+        the keys select): recorded when chosen, restored on replay so a replay
+        without the original keys makes the same choice. Cassettes recorded
+        without it fall back to choose().
+        """
+        try:
+            response, _ = self.call("setting", {"name": name}, lambda: ({"value": choose()}, None), summary=name)
+        except CassetteMiss:
+            logger.warning(f"Cassette has no recorded '{name}'; choosing it from the current environment.")
+            return choose()
+        return response["value"]
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+_configured = False
+
+def use_cassette(path: Path, mode: str, timing: float = None) -> Cassette:
+    """Activates a cassette for every LLM and media call in this process."""
+    global _cassette, _configured
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.save()
+        _cassette = Cassette(path, mode, Config.CASSETTE_TIMING if timing is None else timing)
+        _configured = True
+        if mode == "record":
+            atexit.register(_cassette.save)
+        return _cassette
+
+def get_cassette() -> Optional[Cassette]:
+    """The active cassette; set up from AIFLIX_CASSETTE / AIFLIX_CASSETTE_MODE on first use."""
+    global _configured
+    if not _configured:
+        if Config.CASSETTE_PATH and Config.CASSETTE_MODE in ("record", "replay"):
+            return use_cassette(Path(Config.CASSETTE_PATH), Config.CASSETTE_MODE)
+        _configured = True
+    return _cassette
+
+def close_cassette():
+    global _cassette
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.save()
+        _cassette = None
+
+class CassetteLLM(LLMProvider):
+    """Records or replays a provider's completions through a Cassette."""
+
+    def __init__(self, provider: LLMProvider, cassette: Cassette):
+        self.provider = provider
+        self.cassette = cassette
+        self.model = getattr(provider, "model", "")
+
+    def _request(self, prompt: str, system_prompt: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "provider": type(self.provider).__name__,
+            "model": self.model,
+            "system_prompt": system_prompt,
+            "prompt": prompt,
+            "kwargs": kwargs,
+        }
+
+    def generate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
+        def perform():
+            return {"text": self.provider.generate(prompt, system_prompt=system_prompt, **kwargs)}, None
+
+        response, _ = self.cassette.call("llm", self._request(prompt, system_prompt, kwargs), perform, summary=prompt)
+        return response["text"]
+
+    async def agenerate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
+        request = self._request(prompt, system_prompt, kwargs)
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.lookup("llm", request, prompt)
+            await asyncio.sleep(self.cassette.replay_delay(interaction))
+            return interaction["response"]["text"]
+
+        started = time.perf_counter()
+        text = await self.provider.agenerate(prompt, system_prompt=system_prompt, **kwargs)
+        self.cassette.record("llm", request, {"text": text}, latency=time.perf_counter() - started, summary=prompt)
+        return text
+
+    def stream(self, prompt: str, system_prompt: str = "", **kwargs) -> Iterator[str]:
+        request = self._request(prompt, system_prompt, kwargs)
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.lookup("llm", request, prompt)
+            chunks: List[str] = interaction["response"].get("chunks") or [interaction["response"]["text"]]
+            delay = self.cassette.replay_delay(interaction) / len(chunks)
+            for chunk in chunks:
+                time.sleep(delay)
+                yield chunk
+            return
+
+        started = time.perf_counter()
+        chunks = []
+        for fragment in self.provider.stream(prompt, system_prompt=system_prompt, **kwargs):
+            chunks.append(fragment)
+            yield fragment
+        self.cassette.record("llm", request, {"text": "".join(chunks), "chunks": chunks},
+                             latency=time.perf_counter() - started, summary=prompt)
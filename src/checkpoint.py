@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import Config
+from .state import ProjectState
+from .store import get_store
+from .utils import logger
+
+CHECKPOINT_VERSION = 2  # v2: produced shots live in an append-only <project>.shots.jsonl
+
+def project_id_for(concept: str, kind: str = "") -> str:
+    """Stable, filesystem-safe project id: a readable slug plus a short hash of the concept (and kind suffix)."""
+    slug = re.sub(r"[^a-z0-9]+", "-", concept.lower()).strip("-")[:40] or "project"
+    digest = hashlib.sha1(concept.encode("utf-8")).hexdigest()[:8]
+    return f"{slug}-{digest}-{kind}" if kind else f"{slug}-{digest}"
+
+class CheckpointStore:
+    """
+    Per-project checkpoint of a pipeline run: the result of every completed phase,
+    every successfully produced shot, and the serialized ProjectState. Phases and
+    state are rewritten atomically on each update; produced shots are appended to
+    a JSONL file next to it (one line per shot, so a run of thousands of shots
+    does not rewrite the checkpoint each time). A crash at any point can be
+    resumed without repeating LLM or media work that already succeeded.
+
+    Every update is mirrored to the SQLite StateStore (if enabled), which serves
+    progress queries while the run is in flight.
+    """
+
+    def __init__(self, project_id: str, root: Path = None):
+        self.project_id = project_id
+        self.path = Path(root or Config.CHECKPOINT_DIR) / f"{project_id}.json"
+        self.store = get_store()
+        self._lock = threading.Lock()
+        self.data: Dict[str, Any] = {
+            "version": CHECKPOINT_VERSION,
+            "project_id": project_id,
+            "concept": "",
+            "phases": {},
+            "shots": {},
+            "state": None,
+            "updated": None,
+        }
+
+    @classmethod
+    def load(cls, project_id: str, root: Path = None) -> "CheckpointStore":
+        store = cls(project_id, root)
+        if not store.path.exists():
+            raise FileNotFoundError(f"No checkpoint for project '{project_id}' at {store.path}")
+        with open(store.path, "r") as f:
+            data = json.load(f)
+        if data.get("version", 0) > CHECKPOINT_VERSION:
+            raise ValueError(f"Checkpoint v{data.get('version')} is newer than supported v{CHECKPOINT_VERSION}.")
+        store.data.update(data)
+        # v1 checkpoints kept shots inline; later lines of the log win over earlier ones
+        store.data["shots"] = {**data.get("shots", {}), **store._read_shots()}
+        store.data["version"] = CHECKPOINT_VERSION
+        # Compacts the log to one line per shot (and migrates inline v1 shots into it)
+        store._rewrite_shots()
+        logger.info(f"Resuming '{project_id}': phases done {list(store.data['phases'])}, "
+                    f"{len(store.data['shots'])} shots already produced.")
+        return store
+
+    @property
+    def shots_path(self) -> Path:
+        return self.path.with_name(f"{self.project_id}.shots.jsonl")
+
+    @property
+    def journal_path(self) -> Path:
+        """Full event history of the project (the checkpointed state only keeps a tail)."""
+        return self.path.with_name(f"{self.project_id}.events.jsonl")
+
+    @property
+    def concept(self) -> str:
+        return self.data["concept"]
+
+    def state(self) -> Optional[ProjectState]:
+        if not self.data.get("state"):
+            return None
+        return ProjectState.from_dict(self.data["state"])
+
+    def completed(self, phase: str) -> bool:
+        return phase in self.data["phases"]
+
+    def get(self, phase: str) -> Any:
+        return self.data["phases"].get(phase)
+
+    def produced_shot(self, shot_id: Any) -> Optional[Dict[str, Any]]:
+        """A previously produced shot, if its media files are still on disk."""
+        result = self.data["shots"].get(str(shot_id))
+        if not result:
+            return None
+        files = [result.get("anchor_frame"), result.get("video_clip")]
+        if not all(f and Path(f).exists() for f in files):
+            return None
+        return result
+
+    def start(self, concept: str, state: ProjectState):
+        with self._lock:
+            self.data["concept"] = concept
+            self.data["state"] = state.to_dict()
+            self._write()
+            self._rewrite_shots()  # A new run of this project id starts with no produced shots
+        if self.store:
+            self.store.save_state(self.project_id, state, concept=concept, status="active")
+
+    def mark(self, phase: str, result: Any, state: ProjectState = None):
+        with self._lock:
+            self.data["phases"][phase] = result
+            if state is not None:
+                self.data["state"] = state.to_dict()
+            self._write()
+        if self.store and state is not None:
+            self.store.save_state(self.project_id, state)
+
+    def save_state(self, state: ProjectState):
+        with self._lock:
+            self.data["state"] = state.to_dict()
+            self._write()
+        if self.store:
+            self.store.save_state(self.project_id, state)
+
+    def record_shot(self, shot_id: Any, result: Dict[str, Any]):
+        with self._lock:
+            self.data["shots"][str(shot_id)] = result
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.shots_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps([str(shot_id), result], default=str) + "\n")
+        if self.store:
+            self.store.record_shot(self.project_id, str(shot_id), "produced", result)
+
+    def track_shots(self, shot_ids: List[str], status: str, results: List[Dict[str, Any]] = None):
+        """
+        Store-only shot status (pending, failed, ...); the checkpoint file keeps just
+        produced shots. Committed right away so `main.py status` sees the whole shot list.
+        """
+        if self.store:
+            for shot_id, result in zip(shot_ids, results or [None] * len(shot_ids)):
+                self.store.record_shot(self.project_id, str(shot_id), status, result)
+            self.store.flush()
+
+    def finish(self, state: ProjectState, status: str):
+        self.save_state(state)
+        if self.store:
+            self.store.set_project_status(self.project_id, status)
+
+    def phases(self) -> List[str]:
+        return list(self.data["phases"])
+
+    def _write(self):
+        self.data["updated"] = time.time()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({k: v for k, v in self.data.items() if k != "shots"}, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+    def _read_shots(self) -> Dict[str, Dict[str, Any]]:
+        shots = {}
+        if not self.shots_path.exists():
+            return shots
+        with open(self.shots_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    shot_id, result = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash: that shot is simply produced again
+                    logger.warning(f"Skipping unreadable line in {self.shots_path.name}")
+                    continue
+                shots[shot_id] = result
+        return shots
+
+    def _rewrite_shots(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.shots_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for shot_id, result in self.data["shots"].items():
+                f.write(json.dumps([shot_id, result], default=str) + "\n")
+        os.replace(tmp_path, self.shots_path)
@@ -17,7 +17,105 @@ class Config:
     HF_TOKEN = os.getenv("HF_TOKEN")
     # RAG Settings
     RAG_KNOWLEDGE_PATH = DATA_DIR / "knowledge_base"
+    # Serialized BM25 index for the keyword fallback (written by ingest_books.py; seed data otherwise)
+    BM25_INDEX_PATH = Path(os.getenv("AIFLIX_BM25_INDEX", str(DATA_DIR / "bm25_index.npz")))
+    # Open the vector store and embedding model in a background thread when the Orchestrator starts
+    RAG_WARMUP = os.getenv("AIFLIX_RAG_WARMUP", "0") == "1"
+    # Retrieval caches (query embeddings + results), cleared when the knowledge store changes
+    RAG_CACHE_ENABLED = os.getenv("AIFLIX_RAG_CACHE", "1") != "0"
+    RAG_CACHE_PERSIST = os.getenv("AIFLIX_RAG_CACHE_PERSIST", "1") != "0"
+    RAG_CACHE_DIR = DATA_DIR / "rag_cache"  # One file per knowledge store
+    RAG_CACHE_EMBEDDINGS = int(os.getenv("AIFLIX_RAG_CACHE_EMBEDDINGS", "1024"))
+    RAG_CACHE_RESULTS = int(os.getenv("AIFLIX_RAG_CACHE_RESULTS", "512"))
+    RAG_CACHE_CHECK_INTERVAL = float(os.getenv("AIFLIX_RAG_CACHE_CHECK_INTERVAL", "5"))  # seconds between version checks
+    # Book Ingestion (ingest_books.py: PDFs parsed in worker processes, embedded and upserted in batches)
+    INGEST_WORKERS = int(os.getenv("AIFLIX_INGEST_WORKERS", "0"))  # 0 = one per CPU
+    INGEST_BATCH_SIZE = int(os.getenv("AIFLIX_INGEST_BATCH_SIZE", "100"))  # chunks per embedding/upsert call
+
+    # LLM Response Cache (set AIFLIX_LLM_CACHE=0 to disable)
+    LLM_CACHE_ENABLED = os.getenv("AIFLIX_LLM_CACHE", "1") != "0"
+    LLM_CACHE_DIR = DATA_DIR / "llm_cache"
+    LLM_CACHE_MAX_BYTES = int(os.getenv("AIFLIX_LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    LLM_CACHE_MAX_AGE = float(os.getenv("AIFLIX_LLM_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # seconds
+
+    # LLM HTTP Connection Pool (one pooled client per provider, shared process-wide)
+    LLM_MAX_CONNECTIONS = int(os.getenv("AIFLIX_LLM_MAX_CONNECTIONS", "20"))
+    LLM_MAX_KEEPALIVE = int(os.getenv("AIFLIX_LLM_MAX_KEEPALIVE", "10"))
+    LLM_KEEPALIVE_EXPIRY = float(os.getenv("AIFLIX_LLM_KEEPALIVE_EXPIRY", "30"))  # seconds
+    LLM_TIMEOUT = float(os.getenv("AIFLIX_LLM_TIMEOUT", "120"))  # seconds
+
+    # LLM Rate Limits (per model, shared by every thread and process on this host)
+    LLM_RATE_LIMIT_ENABLED = os.getenv("AIFLIX_LLM_RATE_LIMIT", "1") != "0"
+    LLM_RATE_LIMIT_DIR = DATA_DIR / "ratelimits"
+    GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+    GROQ_TPM = int(os.getenv("GROQ_TPM", "6000"))
+    OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+    OPENAI_TPM = int(os.getenv("OPENAI_TPM", "30000"))
+    LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("AIFLIX_LLM_COMPLETION_TOKENS", "1024"))
+    LLM_MAX_ATTEMPTS = int(os.getenv("AIFLIX_LLM_MAX_ATTEMPTS", "8"))
+    LLM_BACKOFF_BASE = float(os.getenv("AIFLIX_LLM_BACKOFF_BASE", "1.0"))  # seconds
+    LLM_BACKOFF_MAX = float(os.getenv("AIFLIX_LLM_BACKOFF_MAX", "60"))  # seconds
+
+    # Hedged Requests & Failover (provider "hedged": Groq primary, OpenAI secondary)
+    LLM_HEDGE_AFTER = float(os.getenv("AIFLIX_LLM_HEDGE_AFTER", "0"))  # seconds; 0 = use observed p95
+    LLM_HEDGE_QUANTILE = float(os.getenv("AIFLIX_LLM_HEDGE_QUANTILE", "0.95"))
+    LLM_HEDGE_DEFAULT = float(os.getenv("AIFLIX_LLM_HEDGE_DEFAULT", "15"))  # seconds, until enough samples
+    LLM_BREAKER_FAILURES = int(os.getenv("AIFLIX_LLM_BREAKER_FAILURES", "5"))
+    LLM_BREAKER_RESET = float(os.getenv("AIFLIX_LLM_BREAKER_RESET", "30"))  # seconds
     
+    # Pipeline Execution
+    PIPELINE_WORKERS = int(os.getenv("AIFLIX_PIPELINE_WORKERS", "8"))
+
+    # Shot List Validation (approve strict-valid shot lists without a Critic call)
+    VALIDATOR_AUTO_APPROVE = os.getenv("AIFLIX_VALIDATOR_AUTO_APPROVE", "0") == "1"
+
+    # Batch Mode (projects run concurrently in one process)
+    BATCH_WORKERS = int(os.getenv("AIFLIX_BATCH_WORKERS", "2"))
+
+    # Feature Mode (multi-scene productions)
+    FEATURE_SCENES = int(os.getenv("AIFLIX_FEATURE_SCENES", "8"))  # Scenes requested from the outline
+    SCENE_CONCURRENCY = int(os.getenv("AIFLIX_SCENE_CONCURRENCY", "3"))  # Scenes developed/produced at once
+    # Render each shot as soon as the DOP streams it (first draft only, no critic round)
+    FEATURE_STREAM_SHOTS = os.getenv("AIFLIX_STREAM_SHOTS", "0") == "1"
+
+    # Media Production Concurrency (in-flight jobs per backend)
+    IMAGE_CONCURRENCY = int(os.getenv("AIFLIX_IMAGE_CONCURRENCY", "4"))
+    VIDEO_CONCURRENCY = int(os.getenv("AIFLIX_VIDEO_CONCURRENCY", "2"))
+    # Finished anchor frames allowed to wait for the video stage (backpressure bound)
+    ANCHOR_QUEUE_SIZE = int(os.getenv("AIFLIX_ANCHOR_QUEUE_SIZE", str(2 * VIDEO_CONCURRENCY)))
+    SHOT_RETRIES = int(os.getenv("AIFLIX_SHOT_RETRIES", "2"))
+    SHOT_RETRY_DELAY = float(os.getenv("AIFLIX_SHOT_RETRY_DELAY", "5"))  # seconds, doubled per retry
+    # Skip re-rendering shots whose spec hash matches the render manifest
+    RENDER_MANIFEST_ENABLED = os.getenv("AIFLIX_RENDER_MANIFEST", "1") != "0"
+
+    # Tracing (spans exported as Chrome trace JSON; also enabled by --trace)
+    TRACE_ENABLED = os.getenv("AIFLIX_TRACE", "0") == "1"
+
+    # Mock Backends (offline runs and benchmarks)
+    MOCK_LLM_LATENCY = float(os.getenv("AIFLIX_MOCK_LLM_LATENCY", "0.5"))  # seconds (median)
+    MOCK_LLM_LATENCY_SIGMA = float(os.getenv("AIFLIX_MOCK_LLM_LATENCY_SIGMA", "0"))  # log-normal spread; 0 = fixed
+    MOCK_LLM_FAILURE_RATE = float(os.getenv("AIFLIX_MOCK_LLM_FAILURE_RATE", "0"))
+    MOCK_IMAGE_LATENCY = float(os.getenv("AIFLIX_MOCK_IMAGE_LATENCY", "2.0"))  # seconds (median)
+    MOCK_VIDEO_LATENCY = float(os.getenv("AIFLIX_MOCK_VIDEO_LATENCY", "8.0"))  # seconds (median)
+    MOCK_MEDIA_LATENCY_SIGMA = float(os.getenv("AIFLIX_MOCK_MEDIA_LATENCY_SIGMA", "0"))
+    MOCK_MEDIA_FAILURE_RATE = float(os.getenv("AIFLIX_MOCK_MEDIA_FAILURE_RATE", "0"))
+
+    # Record/Replay Cassettes (LLM + media calls; also set by --record / --replay)
+    CASSETTE_PATH = os.getenv("AIFLIX_CASSETTE", "")
+    CASSETTE_MODE = os.getenv("AIFLIX_CASSETTE_MODE", "off")  # off, record, replay
+    CASSETTE_TIMING = float(os.getenv("AIFLIX_CASSETTE_TIMING", "0"))  # 0 = instant, 1 = recorded latency
+
+    # Checkpoints (one file per project, used by --resume)
+    CHECKPOINT_DIR = OUTPUT_DIR / "checkpoints"
+    # Project events kept in memory; the full history is journaled next to the checkpoint (0 = keep all)
+    JOURNAL_TAIL = int(os.getenv("AIFLIX_JOURNAL_TAIL", "200"))
+
+    # Project State Store (SQLite, WAL mode; serves progress queries during a run)
+    STATE_DB_ENABLED = os.getenv("AIFLIX_STATE_DB", "1") != "0"
+    STATE_DB_PATH = Path(os.getenv("AIFLIX_STATE_DB_PATH", str(OUTPUT_DIR / "aiflix.db")))
+    STATE_DB_BATCH_SIZE = int(os.getenv("AIFLIX_STATE_DB_BATCH_SIZE", "32"))  # shot updates per transaction
+    STATE_DB_FLUSH_INTERVAL = float(os.getenv("AIFLIX_STATE_DB_FLUSH_INTERVAL", "1.0"))  # seconds
+
     # Output Settings
     VIDEO_Format = "mp4"
     IMAGE_Format = "png"
@@ -0,0 +1,241 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .tracing import span
+from .utils import logger
+
+class TaskCancelled(Exception):
+    """Raised by a task that noticed its cancellation flag."""
+
+@dataclass
+class Task:
+    """A unit of pipeline work. `fn` receives a TaskContext and returns the task's result."""
+    name: str
+    fn: Callable[["TaskContext"], Any]
+    deps: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None  # seconds; None = unbounded (cooperative, see DAGExecutor)
+
+@dataclass
+class TaskRecord:
+    name: str
+    deps: List[str]
+    status: str = "pending"  # pending, running, done, failed, timed_out, cancelled, skipped
+    start: Optional[float] = None
+    end: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+class TaskContext:
+    """What a running task can see: its dependencies' results, its cancel flag, and the graph."""
+
+    def __init__(self, executor: "DAGExecutor", task: Task, cancel_event: threading.Event):
+        self._executor = executor
+        self.task = task
+        self.cancel_event = cancel_event
+
+    def __getitem__(self, name: str) -> Any:
+        return self._executor.results[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self._executor.results.get(name, default)
+
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise TaskCancelled(self.task.name)
+
+    def add_task(self, task: Task):
+        """Adds a task to the running graph, e.g. one production task per planned shot."""
+        self._executor.add(task)
+
+class DAGRun:
+    """Outcome of an executor run: task results, timing records and the critical path."""
+
+    def __init__(self, results: Dict[str, Any], records: Dict[str, TaskRecord], started: float, finished: float):
+        self.results = results
+        self.records = records
+        self.started = started
+        self.finished = finished
+
+    @property
+    def wall_time(self) -> float:
+        return self.finished - self.started
+
+    def ok(self, name: str) -> bool:
+        record = self.records.get(name)
+        return record is not None and record.status == "done"
+
+    def critical_path(self) -> List[TaskRecord]:
+        """
+        The chain of tasks that determined total wall-clock time: starting from the
+        last task to finish, repeatedly step to the dependency that finished last.
+        """
+        finished = [r for r in self.records.values() if r.end is not None]
+        if not finished:
+            return []
+        path = [max(finished, key=lambda r: r.end)]
+        while True:
+            deps = [self.records[d] for d in path[-1].deps if d in self.records and self.records[d].end is not None]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda r: r.end))
+        return list(reversed(path))
+
+    def report(self) -> str:
+        lines = [f"Pipeline wall time: {self.wall_time:.2f}s"]
+        path = self.critical_path()
+        if path:
+            lines.append("Critical path: " + " -> ".join(f"{r.name} ({r.duration:.2f}s)" for r in path))
+        for record in sorted(self.records.values(), key=lambda r: r.start if r.start is not None else float("inf")):
+            offset = f"+{record.start - self.started:.2f}s" if record.start is not None else "-"
+            lines.append(f"  {record.name:<24} {record.status:<10} start {offset:<9} took {record.duration:.2f}s")
+        return "\n".join(lines)
+
+class DAGExecutor:
+    """
+    Runs a dependency graph of tasks on a thread pool, starting each task as soon as
+    all of its dependencies have completed. A failed, timed-out or cancelled task
+    causes its dependents to be skipped; independent branches keep running.
+    Timeouts and cancellation are cooperative: the task's cancel flag is set and
+    its eventual result is discarded, but a Python thread can't be stopped from
+    outside, so the task keeps its pool worker until its function returns. Long
+    tasks should call ctx.check_cancelled() between steps to give it back early.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self.results: Dict[str, Any] = {}
+        self.records: Dict[str, TaskRecord] = {}
+        self._tasks: Dict[str, Task] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._interrupt: Future = Future()  # Completed by cancel() to wake the scheduler
+
+    def add(self, task: Task):
+        """Registers a task. Tasks added while running are scheduled once the adding task returns."""
+        with self._lock:
+            if task.name in self._tasks:
+                raise ValueError(f"Duplicate task name: {task.name}")
+            self._tasks[task.name] = task
+            self.records[task.name] = TaskRecord(name=task.name, deps=list(task.deps))
+            self._cancel_events[task.name] = threading.Event()
+
+    def cancel(self):
+        """Stops scheduling new tasks and signals every running task to stop."""
+        with self._lock:
+            self._cancelled = True
+            for event in self._cancel_events.values():
+                event.set()
+            if not self._interrupt.done():
+                self._interrupt.set_result(None)
+
+    def _run_task(self, task: Task) -> Any:
+        self.records[task.name].start = time.perf_counter()  # Excludes time queued for a worker
+        ctx = TaskContext(self, task, self._cancel_events[task.name])
+        with span(task.name, "task"):
+            return task.fn(ctx)
+
+    def _ready(self) -> Tuple[List[Task], List[str]]:
+        """Returns tasks whose deps are all done, and pending tasks that can never run."""
+        ready, doomed = [], []
+        for name, record in self.records.items():
+            if record.status != "pending":
+                continue
+            dep_states = [self.records[d].status if d in self.records else "unknown" for d in record.deps]
+            if self._cancelled or any(s in ("failed", "timed_out", "cancelled", "skipped") for s in dep_states):
+                doomed.append(name)
+            elif all(s == "done" for s in dep_states):
+                ready.append(self._tasks[name])
+        return ready, doomed
+
+    def _finish(self, name: str, status: str, result: Any = None, error: Optional[str] = None):
+        record = self.records[name]
+        if record.status != "running":
+            return  # Already timed out or cancelled; discard the late outcome
+        record.status = status
+        record.end = time.perf_counter()
+        record.error = error
+        if status == "done":
+            self.results[name] = result
+        elif error:
+            logger.error(f"Task '{name}' {status}: {error}")
+
+    def run(self) -> DAGRun:
+        started = time.perf_counter()
+        running: Dict[Future, str] = {}
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag")
+        try:
+            while True:
+                with self._lock:
+                    ready, doomed = self._ready()
+                    for name in doomed:
+                        self.records[name].status = "cancelled" if self._cancelled else "skipped"
+                    for task in ready:
+                        record = self.records[task.name]
+                        record.status = "running"
+                        record.start = time.perf_counter()
+                        # Copy the caller's context so task spans nest under the pipeline span
+                        running[pool.submit(contextvars.copy_context().run, self._run_task, task)] = task.name
+
+                    # Pending tasks whose deps are unknown and nothing is running: they can never start.
+                    if not running and not ready and not doomed:
+                        for record in self.records.values():
+                            if record.status == "pending":
+                                record.status = "skipped"
+                                record.error = "unresolved dependency"
+                        break
+
+                if not running:
+                    continue  # Newly skipped tasks may unblock (or doom) others
+
+                # Wake for the next completion or the nearest deadline
+                now = time.perf_counter()
+                deadlines = [
+                    self.records[name].start + self._tasks[name].timeout
+                    for name in running.values() if self._tasks[name].timeout is not None
+                ]
+                timeout = max(0.0, min(deadlines) - now) if deadlines else None
+                done, _ = wait(list(running) + [self._interrupt], timeout=timeout, return_when=FIRST_COMPLETED)
+
+                with self._lock:
+                    for future in done:
+                        if future is self._interrupt:
+                            continue
+                        name = running.pop(future)
+                        try:
+                            self._finish(name, "done", result=future.result())
+                        except TaskCancelled:
+                            self._finish(name, "cancelled")
+                        except Exception as e:
+                            self._finish(name, "failed", error=f"{type(e).__name__}: {e}")
+
+                    now = time.perf_counter()
+                    for future, name in list(running.items()):
+                        task = self._tasks[name]
+                        if task.timeout is not None and now - self.records[name].start > task.timeout:
+                            self._cancel_events[name].set()
+                            self._finish(name, "timed_out", error=f"exceeded {task.timeout:g}s timeout")
+                            running.pop(future)
+
+                    if self._cancelled:
+                        for future, name in list(running.items()):
+                            self._finish(name, "cancelled")
+                            running.pop(future)
+        finally:
+            # Don't block on abandoned (timed-out or cancelled) tasks.
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return DAGRun(dict(self.results), dict(self.records), started, time.perf_counter())
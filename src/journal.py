@@ -0,0 +1,142 @@
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+
+from .config import Config
+from .utils import logger
+
+class Event:
+    """One project event. Slotted: long feature runs create thousands of these."""
+
+    __slots__ = ("timestamp", "agent", "action", "details")
+
+    def __init__(self, timestamp: str, agent: str, action: str, details: str):
+        self.timestamp = timestamp
+        self.agent = agent
+        self.action = action
+        self.details = details
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"timestamp": self.timestamp, "agent": self.agent, "action": self.action, "details": self.details}
+
+    def to_record(self) -> str:
+        """Compact journal line: a JSON array instead of a keyed object."""
+        return json.dumps([self.timestamp, self.agent, self.action, self.details], ensure_ascii=False)
+
+    @classmethod
+    def from_record(cls, line: str) -> "Event":
+        return cls(*json.loads(line))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Event) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Event({self.timestamp!r}, {self.agent!r}, {self.action!r}, {self.details!r})"
+
+class Journal:
+    """
+    Append-only event log of a project.
+
+    Events are streamed to a JSONL file (one compact array per line) once the
+    journal is attached to a path; only the most recent `tail_size` events stay
+    in memory. Iteration and queries read the full file, so nothing is lost when
+    the tail rolls over. An unattached journal keeps just the tail, and buffers
+    at most the last `tail_size` events for attach() (older ones are dropped).
+    """
+
+    def __init__(self, events: Iterable[Event] = (), tail_size: int = None):
+        self.tail_size = Config.JOURNAL_TAIL if tail_size is None else tail_size
+        self._tail: Deque[Event] = deque(events, maxlen=self.tail_size or None)
+        # Appended before attach(), not yet on disk; bounded like the tail
+        self._pending: Deque[Event] = deque(maxlen=self.tail_size or None)
+        self._dropped = 0
+        self._count = len(self._tail)
+        self._path: Optional[Path] = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Optional[Path]:
+        return self._path
+
+    def attach(self, path: Path, truncate: bool = False):
+        """Streams events to `path` from now on; buffered events are flushed to it."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            if not truncate and path.exists():
+                with open(path, "r", encoding="utf-8") as f:
+                    self._count = sum(1 for _ in f) + len(self._pending)
+            else:
+                self._count = len(self._pending)
+            self._path = path
+            self._file = open(path, "w" if truncate else "a", encoding="utf-8")
+            for event in self._pending:
+                self._file.write(event.to_record() + "\n")
+            self._file.flush()
+            if self._dropped:
+                logger.warning(f"Journal {path.name}: {self._dropped} events from before attach() were dropped "
+                               f"(only the last {self.tail_size} are buffered).")
+            self._pending.clear()
+            self._dropped = 0
+
+    def close(self):
+        """Releases the file handle; a later append() reopens it."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def append(self, agent: str, action: str, details: str = "") -> Event:
+        event = Event(datetime.now().isoformat(), agent, action, details)
+        with self._lock:
+            self._tail.append(event)
+            self._count += 1
+            if self._path is not None:
+                if self._file is None:
+                    self._file = open(self._path, "a", encoding="utf-8")
+                self._file.write(event.to_record() + "\n")
+                self._file.flush()
+            else:
+                if len(self._pending) == self._pending.maxlen:
+                    self._dropped += 1
+                self._pending.append(event)
+        return event
+
+    def tail(self, n: int = None) -> List[Event]:
+        """The most recent events held in memory (all of them when n is None)."""
+        with self._lock:
+            events = list(self._tail)
+        return events if n is None else events[-n:]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Event]:
+        if self._path is None:
+            yield from self.tail()
+            return
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        with open(self._path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield Event.from_record(line)
+
+    def query(self, agent: str = None, action: str = None, limit: int = None) -> List[Event]:
+        """Events matching agent and/or action, oldest first; `limit` keeps the newest matches."""
+        matches: Deque[Event] = deque(maxlen=limit)
+        for event in self:
+            if (agent is None or event.agent == agent) and (action is None or event.action == action):
+                matches.append(event)
+        return list(matches)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """The in-memory tail, serialized (checkpoints reference the journal file for the rest)."""
+        return [event.to_dict() for event in self.tail()]
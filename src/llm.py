@@ -1,24 +1,83 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Union
+import asyncio
+import json
+import random
+import threading
 import time
 from .config import Config
+from .tracing import traced
 from .utils import logger
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every provider's calls (including wrappers like CachedLLM) become spans when tracing is on
+        for method in ("generate", "agenerate", "stream"):
+            if method in cls.__dict__:
+                setattr(cls, method, traced(f"{cls.__name__}.{method}", "llm")(cls.__dict__[method]))
     
     @abstractmethod
     def generate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
         """Generates text from the LLM."""
         pass
 
+    async def agenerate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
+        """
+        Async variant of generate().
+        Providers without a native async client run generate() in a worker thread.
+        """
+        return await asyncio.to_thread(self.generate, prompt, system_prompt, **kwargs)
+
+    def stream(self, prompt: str, system_prompt: str = "", **kwargs) -> Iterator[str]:
+        """
+        Yields the completion incrementally as text fragments.
+        Providers without native streaming yield the full response once.
+        """
+        yield self.generate(prompt, system_prompt, **kwargs)
+
 class MockLLM(LLMProvider):
-    """A mock LLM for testing workflows without API costs or GPU requirements."""
+    """
+    A mock LLM for testing workflows without API costs or GPU requirements.
+    Latency is log-normal around `latency` seconds (`latency_sigma` = 0 keeps it fixed),
+    `failure_rate` of calls return "" like a failed provider call, and `shot_count`
+    makes shot lists that long instead of the canned two shots.
+    """
+
+    def __init__(self, latency: float = None, latency_sigma: float = None, failure_rate: float = None,
+                 shot_count: int = None, seed: int = None):
+        self.model = "mock"
+        self.latency = Config.MOCK_LLM_LATENCY if latency is None else latency
+        self.latency_sigma = Config.MOCK_LLM_LATENCY_SIGMA if latency_sigma is None else latency_sigma
+        self.failure_rate = Config.MOCK_LLM_FAILURE_RATE if failure_rate is None else failure_rate
+        self.shot_count = shot_count
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()  # Counters and sampling are shared by concurrent callers
+
+    def _sample_latency(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency
+        return self._random.lognormvariate(0.0, self.latency_sigma) * self.latency
     
     def generate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
         logger.info(f"MockLLM generating response for prompt: {prompt[:50]}...")
+        with self._lock:
+            self.calls += 1
+            latency = self._sample_latency()
+            failed = bool(self.failure_rate) and self._random.random() < self.failure_rate
+            if failed:
+                self.failures += 1
         # Simulate latency
-        time.sleep(0.5)
+        time.sleep(latency)
+        if failed:
+            logger.error("MockLLM simulated a provider failure.")
+            return ""
         
         prompt_lower = prompt.lower()
         
@@ -40,6 +99,42 @@ class MockLLM(LLMProvider):
             }
             '''
         
+        elif "outline the scenes" in prompt_lower:
+            return '''
+            {
+                "title": "Neon Relic",
+                "scenes": [
+                    {
+                        "scene_id": "scene_1",
+                        "slugline": "EXT. NEON ALLEY - NIGHT",
+                        "time_of_day": "NIGHT",
+                        "location": "Neon Alley",
+                        "emotional_beat": "Resignation",
+                        "narrative_purpose": "Cole finds the artifact.",
+                        "characters_present": ["Detective Cole"]
+                    },
+                    {
+                        "scene_id": "scene_2",
+                        "slugline": "INT. PRECINCT ARCHIVE - NIGHT",
+                        "time_of_day": "NIGHT",
+                        "location": "Precinct Archive",
+                        "emotional_beat": "Suspicion",
+                        "narrative_purpose": "The artifact matches a sealed case file.",
+                        "characters_present": ["Detective Cole"]
+                    },
+                    {
+                        "scene_id": "scene_3",
+                        "slugline": "EXT. ROOFTOP - DAWN",
+                        "time_of_day": "DAWN",
+                        "location": "Rooftop",
+                        "emotional_beat": "Resolve",
+                        "narrative_purpose": "Cole chooses to keep the artifact.",
+                        "characters_present": ["Detective Cole"]
+                    }
+                ]
+            }
+            '''
+
         elif "develop the narrative" in prompt_lower:
             return '''
             {
@@ -71,6 +166,9 @@ class MockLLM(LLMProvider):
             }
             '''
             
+        elif "generate optical specifications" in prompt_lower and self.shot_count:
+            return json.dumps({"shots": [self._mock_shot(i + 1) for i in range(self.shot_count)]})
+
         elif "generate optical specifications" in prompt_lower:
             return '''
             {
@@ -115,6 +213,20 @@ class MockLLM(LLMProvider):
             }
             '''
         
+        elif "evaluate these candidate shot lists" in prompt_lower:
+            return '''
+            {
+                "evaluations": [
+                    {
+                        "candidate": 0,
+                        "status": "approved",
+                        "score": 8,
+                        "feedback": "Visuals align well with narrative."
+                    }
+                ]
+            }
+            '''
+
         elif "evaluate this shot list" in prompt_lower:
             return '''
             {
@@ -127,73 +239,183 @@ class MockLLM(LLMProvider):
             # Default generic fallback or pass through for other tests
             return '{"error": "MockLLM could not match prompt pattern."}'
 
-class OpenAILLM(LLMProvider):
-    """Wrapper for OpenAI API."""
-    
-    def __init__(self, model: str = "gpt-4o"):
+    @staticmethod
+    def _mock_shot(shot_id: int) -> Dict[str, Any]:
+        shot_types = [("wide", 24), ("medium_close_up", 50), ("close_up", 85)]
+        shot_type, lens_mm = shot_types[shot_id % len(shot_types)]
+        return {
+            "shot_id": shot_id,
+            "narrative_beat_ref": f"Beat {shot_id}",
+            "shot_type": shot_type,
+            "lens_mm": lens_mm,
+            "lighting": {"key": "soft_neon_blue", "fill": "negative", "ratio": "8:1"},
+            "movement": {"type": "static" if shot_id % 2 else "dolly_in", "speed": "slow"},
+            "aspect_ratio": "2.39:1",
+            "mood": "tech_noir",
+            "visual_prompt": f"img_ch_cole, {shot_type.replace('_', ' ')} shot {shot_id}, neon rain alley, cybernetic eye glow, {lens_mm}mm lens, cinematic lighting",
+        }
+
+class ChatCompletionsLLM(LLMProvider):
+    """
+    Shared implementation for OpenAI-compatible chat completion APIs.
+    Clients come from the process-wide registry in llm_clients, so every agent
+    using the same provider shares one pooled HTTP client.
+    """
+
+    provider_name = ""
+    display_name = ""
+
+    def __init__(self, model: str, api_key: Optional[str], rpm: int, tpm: int):
         self.model = model
-        self.api_key = Config.OPENAI_API_KEY
-        # Lazy import to avoid hard dependency if not used
-        try:
-            from openai import OpenAI
-            self.client = OpenAI(api_key=self.api_key)
-        except ImportError:
-            logger.warning("OpenAI library not installed. OpenAILLM will not work.")
-            self.client = None
+        self.api_key = api_key
+        self.rpm = rpm
+        self.tpm = tpm
+        self._client = None
+        self._client_resolved = False
 
-    def generate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
-        if not self.client:
-            return "Error: OpenAI client not initialized."
-            
-        try:
-            response = self.client.chat.completions.create(
+    @property
+    def client(self):
+        """The shared SDK client, created on first use (a replayed run never needs one, or a key)."""
+        if not self._client_resolved:
+            # Lazy import to avoid hard dependency if not used
+            from .llm_clients import get_client
+
+            self._client = get_client(self.provider_name, self.api_key)
+            self._client_resolved = True
+            if self._client is None:
+                logger.warning(f"{self.display_name} library not installed. {type(self).__name__} will not work.")
+        return self._client
+
+    def _messages(self, prompt: str, system_prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _create(self, client, prompt: str, system_prompt: str, **kwargs):
+        """Issues the completion request, through the rate-limit scheduler when enabled."""
+        def call():
+            return client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._messages(prompt, system_prompt),
+                **kwargs
+            )
+
+        if not Config.LLM_RATE_LIMIT_ENABLED:
+            return call()
+
+        from .scheduler import estimate_tokens, get_scheduler
+        tokens = estimate_tokens(prompt, system_prompt, kwargs.get("max_tokens"))
+        return get_scheduler().run(self.model, self.rpm, self.tpm, tokens, call)
+
+    async def _acreate(self, client, prompt: str, system_prompt: str, **kwargs):
+        def call():
+            return client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt, system_prompt),
                 **kwargs
             )
+
+        if not Config.LLM_RATE_LIMIT_ENABLED:
+            return await call()
+
+        from .scheduler import estimate_tokens, get_scheduler
+        tokens = estimate_tokens(prompt, system_prompt, kwargs.get("max_tokens"))
+        return await get_scheduler().arun(self.model, self.rpm, self.tpm, tokens, call)
+
+    def generate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
+        try:
+            # Inside the try: the SDK raises here when the API key is missing
+            client = self.client
+            if not client:
+                return f"Error: {self.display_name} client not initialized."
+            response = self._create(client, prompt, system_prompt, **kwargs)
             return response.choices[0].message.content
         except Exception as e:
-            logger.error(f"OpenAI API call failed: {e}")
+            logger.error(f"{self.display_name} API call failed: {e}")
             return ""
 
-class GroqLLM(LLMProvider):
-    """Wrapper for Groq API."""
-    
-    def __init__(self, model: str = "llama-3.3-70b-versatile"):
-        self.model = model
-        self.api_key = Config.GROQ_API_KEY
+    def stream(self, prompt: str, system_prompt: str = "", **kwargs) -> Iterator[str]:
         try:
-            from groq import Groq
-            self.client = Groq(api_key=self.api_key)
-        except ImportError:
-            logger.warning("Groq library not installed. GroqLLM will not work.")
-            self.client = None
+            client = self.client
+            if not client:
+                yield f"Error: {self.display_name} client not initialized."
+                return
+            response = self._create(client, prompt, system_prompt, stream=True, **kwargs)
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"{self.display_name} streaming call failed: {e}")
+
+    async def agenerate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
+        from .llm_clients import get_async_client
 
-    def generate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
-        if not self.client:
-            return "Error: Groq client not initialized."
-            
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                **kwargs
-            )
+            client = get_async_client(self.provider_name, self.api_key)
+            if not client:
+                return f"Error: {self.display_name} client not initialized."
+            response = await self._acreate(client, prompt, system_prompt, **kwargs)
             return response.choices[0].message.content
         except Exception as e:
-            logger.error(f"Groq API call failed: {e}")
+            logger.error(f"{self.display_name} API call failed: {e}")
             return ""
 
-def get_llm(provider_name: str = "groq") -> LLMProvider:
-    """Factory function to get LLM provider."""
-    if provider_name.lower() == "openai":
-        return OpenAILLM()
-    elif provider_name.lower() == "groq":
-        return GroqLLM()
-    return MockLLM()
+class OpenAILLM(ChatCompletionsLLM):
+    """Wrapper for OpenAI API."""
+
+    provider_name = "openai"
+    display_name = "OpenAI"
+
+    def __init__(self, model: str = "gpt-4o"):
+        super().__init__(model=model, api_key=Config.OPENAI_API_KEY,
+                         rpm=Config.OPENAI_RPM, tpm=Config.OPENAI_TPM)
+
+class GroqLLM(ChatCompletionsLLM):
+    """Wrapper for Groq API."""
+
+    provider_name = "groq"
+    display_name = "Groq"
+
+    def __init__(self, model: str = "llama-3.3-70b-versatile"):
+        super().__init__(model=model, api_key=Config.GROQ_API_KEY,
+                         rpm=Config.GROQ_RPM, tpm=Config.GROQ_TPM)
+
+def get_llm(provider_name: Union[str, LLMProvider] = "groq", cache: Optional[bool] = None) -> LLMProvider:
+    """
+    Factory function to get LLM provider.
+    Real providers are wrapped in a persistent response cache unless disabled
+    via `cache=False` or AIFLIX_LLM_CACHE=0. A provider instance (e.g. a
+    configured MockLLM for benchmarks) is returned as-is. With a record/replay
+    cassette active, real providers are recorded or replayed instead of cached.
+    """
+    if isinstance(provider_name, LLMProvider):
+        return provider_name
+    name = provider_name.lower()
+    if name not in ("openai", "groq", "hedged"):
+        return MockLLM()
+
+    from .cassette import CassetteLLM, get_cassette
+    cassette = get_cassette()
+    replaying = cassette is not None and cassette.mode == "replay"
+    if name == "openai":
+        llm = OpenAILLM()
+    elif name == "groq":
+        llm = GroqLLM()
+    else:
+        from .llm_failover import HedgedLLM
+        # Only providers with credentials join the rotation (a keyless client fails on first call).
+        # A replay never calls them, so all join and the cassette's request keys match the recording.
+        providers = [cls() for cls, api_key in ((GroqLLM, Config.GROQ_API_KEY), (OpenAILLM, Config.OPENAI_API_KEY))
+                     if api_key or replaying]
+        if not providers:
+            raise ValueError("The hedged provider needs GROQ_API_KEY and/or OPENAI_API_KEY.")
+        llm = HedgedLLM(providers)
+
+    if cassette is not None:
+        # A cache hit would hide calls from the recording (or answer instead of the cassette on replay)
+        return CassetteLLM(llm, cassette)
+    if Config.LLM_CACHE_ENABLED if cache is None else cache:
+        from .llm_cache import CachedLLM
+        llm = CachedLLM(llm)
+    return llm
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .config import Config
+from .llm import LLMProvider
+from .tracing import event
+from .utils import logger
+
+class ResponseCache:
+    """
+    Content-addressed on-disk store for LLM completions.
+    Each entry lives in its own file named after the SHA-256 of the request, so
+    identical requests from any run (or any process) resolve to the same entry.
+    Eviction is age-based (on read) and size-based (least recently used first).
+    """
+
+    def __init__(self, cache_dir: Path = None, max_bytes: int = None, max_age: float = None):
+        self.cache_dir = Path(cache_dir or Config.LLM_CACHE_DIR)
+        self.max_bytes = Config.LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_age = Config.LLM_CACHE_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._size = None  # Lazily computed on first write
+
+    @staticmethod
+    def make_key(provider: str, model: str, system_prompt: str, prompt: str, kwargs: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            [provider, model, system_prompt, prompt, kwargs],
+            sort_keys=True,
+            default=str,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self.max_age and time.time() - entry.get("created", 0) > self.max_age:
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path, None)  # Touch for LRU ordering
+        except OSError:
+            pass
+        return entry.get("response")
+
+    def put(self, key: str, response: str):
+        path = self._path(key)
+        data = json.dumps({"created": time.time(), "response": response}, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                previous = path.stat().st_size if path.exists() else 0
+                tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"LLM cache write failed: {e}")
+                return
+
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - previous
+
+            if self.max_bytes and self._size > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        with self._lock:
+            for path in self.cache_dir.glob("*/*.json"):
+                self._remove(path)
+            self._size = 0
+
+    def _scan_size(self) -> int:
+        total = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _evict(self):
+        """Drops expired entries, then least recently used ones until under 90% of max_bytes."""
+        entries = []
+        now = time.time()
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        if self.max_age:
+            # Age comes from the stored creation time, as in get(); mtime is refreshed by every read
+            live = []
+            for entry in entries:
+                if now - self._created(entry[2]) > self.max_age:
+                    if self._remove(entry[2]):
+                        total -= entry[1]
+                        removed += 1
+                else:
+                    live.append(entry)
+            entries = live
+
+        target = int(self.max_bytes * 0.9)
+        entries.sort(key=lambda e: e[0])
+        for mtime, size, path in entries:
+            if total <= target:
+                break
+            if self._remove(path):
+                total -= size
+                removed += 1
+
+        self._size = total
+        logger.info(f"LLM cache evicted {removed} entries ({total} bytes remain).")
+
+    @staticmethod
+    def _created(path: Path) -> float:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("created", 0)
+        except (OSError, ValueError):
+            return 0
+
+    @staticmethod
+    def _remove(path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except OSError:
+            return False
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide cache shared by every CachedLLM built via get_llm."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
+
+class CachedLLM(LLMProvider):
+    """
+    Wraps any LLMProvider with a persistent response cache.
+    Pass use_cache=False to generate() to bypass the cache for a single call.
+    """
+
+    def __init__(self, provider: LLMProvider, cache: ResponseCache = None):
+        self.provider = provider
+        self.model = getattr(provider, "model", "")
+        self.cache = cache or get_response_cache()
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _key(self, prompt: str, system_prompt: str, kwargs: Dict[str, Any]) -> str:
+        return self.cache.make_key(type(self.provider).__name__, self.model, system_prompt, prompt, kwargs)
+
+    def _record(self, hit: bool):
+        event("llm_cache_hit" if hit else "llm_cache_miss", "llm", model=self.model)
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _cacheable(response: str) -> bool:
+        # Providers signal failure with "" or an "Error: ..." string; never persist those.
+        return bool(response) and not response.startswith("Error:")
+
+    def generate(self, prompt: str, system_prompt: str = "", use_cache: bool = True, **kwargs) -> str:
+        if not use_cache:
+            return self.provider.generate(prompt, system_prompt=system_prompt, **kwargs)
+
+        key = self._key(prompt, system_prompt, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._record(hit=True)
+            logger.info(f"LLM cache hit ({type(self.provider).__name__}:{self.model})")
+            return cached
+
+        self._record(hit=False)
+        response = self.provider.generate(prompt, system_prompt=system_prompt, **kwargs)
+        if self._cacheable(response):
+            self.cache.put(key, response)
+        return response
+
+    async def agenerate(self, prompt: str, system_prompt: str = "", use_cache: bool = True, **kwargs) -> str:
+        if not use_cache:
+            return await self.provider.agenerate(prompt, system_prompt=system_prompt, **kwargs)
+
+        key = self._key(prompt, system_prompt, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._record(hit=True)
+            logger.info(f"LLM cache hit ({type(self.provider).__name__}:{self.model})")
+            return cached
+
+        self._record(hit=False)
+        response = await self.provider.agenerate(prompt, system_prompt=system_prompt, **kwargs)
+        if self._cacheable(response):
+            self.cache.put(key, response)
+        return response
+
+    def stream(self, prompt: str, system_prompt: str = "", use_cache: bool = True, **kwargs) -> Iterator[str]:
+        if not use_cache:
+            yield from self.provider.stream(prompt, system_prompt=system_prompt, **kwargs)
+            return
+
+        key = self._key(prompt, system_prompt, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._record(hit=True)
+            yield cached
+            return
+
+        self._record(hit=False)
+        parts = []
+        for fragment in self.provider.stream(prompt, system_prompt=system_prompt, **kwargs):
+            parts.append(fragment)
+            yield fragment
+        # Only reached when the consumer drained the stream, so the response is complete.
+        response = "".join(parts)
+        if self._cacheable(response):
+            self.cache.put(key, response)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
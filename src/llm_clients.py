@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from .config import Config
+from .utils import logger
+
+# Process-wide registry of SDK clients, so every agent talking to the same
+# provider reuses one pooled, keep-alive HTTP connection set.
+_sync_clients: Dict[Tuple[str, str], Any] = {}
+# Async clients are bound to the event loop that created their connections.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], Any]]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+def _limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=Config.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.LLM_MAX_KEEPALIVE,
+        keepalive_expiry=Config.LLM_KEEPALIVE_EXPIRY,
+    )
+
+def _build_client(provider: str, api_key: str, use_async: bool):
+    import httpx
+    timeout = httpx.Timeout(Config.LLM_TIMEOUT)
+    if use_async:
+        http_client = httpx.AsyncClient(limits=_limits(), timeout=timeout)
+    else:
+        http_client = httpx.Client(limits=_limits(), timeout=timeout)
+
+    if provider == "openai":
+        from openai import OpenAI, AsyncOpenAI
+        client_cls = AsyncOpenAI if use_async else OpenAI
+    elif provider == "groq":
+        from groq import Groq, AsyncGroq
+        client_cls = AsyncGroq if use_async else Groq
+    else:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    # Retries are owned by the rate-limit scheduler when it is enabled.
+    max_retries = 0 if Config.LLM_RATE_LIMIT_ENABLED else 2
+    return client_cls(api_key=api_key, http_client=http_client, max_retries=max_retries)
+
+def get_client(provider: str, api_key: Optional[str]) -> Optional[Any]:
+    """Returns the shared blocking client for a provider, or None if its SDK is missing."""
+    key = (provider, api_key or "")
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            try:
+                client = _build_client(provider, api_key, use_async=False)
+            except ImportError:
+                return None
+            _sync_clients[key] = client
+            logger.info(f"Created shared {provider} client (max_connections={Config.LLM_MAX_CONNECTIONS}).")
+        return client
+
+def get_async_client(provider: str, api_key: Optional[str]) -> Optional[Any]:
+    """Returns the shared async client for a provider on the running event loop."""
+    loop = asyncio.get_running_loop()
+    key = (provider, api_key or "")
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            try:
+                client = _build_client(provider, api_key, use_async=True)
+            except ImportError:
+                return None
+            clients[key] = client
+        return client
+
+def close_clients():
+    """Closes every shared blocking client. Async clients close with their event loop."""
+    with _lock:
+        for client in _sync_clients.values():
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Failed to close LLM client: {e}")
+        _sync_clients.clear()
+
+async def aclose_clients():
+    """Closes the shared async clients owned by the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.pop(loop, {})
+    for client in clients.values():
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close async LLM client: {e}")
@@ -0,0 +1,290 @@
+import asyncio
+import bisect
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .config import Config
+from .llm import LLMProvider
+from .tracing import event
+from .utils import logger
+
+class LatencyHistogram:
+    """Fixed, log-spaced latency buckets (50ms .. ~200s) with approximate quantiles."""
+
+    BOUNDS = [0.05 * (1.5 ** i) for i in range(21)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+            self.total += 1
+            self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Returns the upper bound of the bucket holding the q-th quantile."""
+        with self._lock:
+            if not self.total:
+                return None
+            rank = q * self.total
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    return self.BOUNDS[i] if i < len(self.BOUNDS) else float("inf")
+            return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={b:.2f}s" for b in self.BOUNDS] + [f">{self.BOUNDS[-1]:.2f}s"]
+        return {
+            "count": self.total,
+            "mean": self.sum / self.total if self.total else None,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {label: c for label, c in zip(labels, self.counts) if c},
+        }
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, rejecting calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int = None, reset_timeout: float = None):
+        self.failure_threshold = failure_threshold or Config.LLM_BREAKER_FAILURES
+        self.reset_timeout = Config.LLM_BREAKER_RESET if reset_timeout is None else reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """Frees a half-open trial slot whose call was abandoned without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+# Shared per provider, so every agent's HedgedLLM feeds and reads the same statistics.
+_histograms: Dict[str, LatencyHistogram] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+def _provider_id(provider: LLMProvider) -> str:
+    return f"{type(provider).__name__}:{getattr(provider, 'model', '')}"
+
+def get_histogram(provider_id: str) -> LatencyHistogram:
+    with _registry_lock:
+        return _histograms.setdefault(provider_id, LatencyHistogram())
+
+def get_breaker(provider_id: str) -> CircuitBreaker:
+    with _registry_lock:
+        return _breakers.setdefault(provider_id, CircuitBreaker())
+
+def latency_report() -> Dict[str, Dict[str, Any]]:
+    """Per-provider latency histograms (successful calls) and breaker states, for tuning hedge thresholds."""
+    with _registry_lock:
+        ids = list(_histograms)
+    return {pid: {**get_histogram(pid).snapshot(), "breaker": get_breaker(pid).state} for pid in ids}
+
+class HedgedLLM(LLMProvider):
+    """
+    Composite provider: sends each request to the primary, and if it has not answered
+    within the hedge delay (the primary's observed p95 by default) sends a duplicate to
+    the next provider. The first successful answer wins. Providers whose circuit
+    breaker is open are skipped, and a failed call fails over immediately.
+    """
+
+    MIN_SAMPLES = 20  # Below this, the p95 estimate is too noisy to hedge on
+
+    _executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+    def __init__(self, providers: List[LLMProvider], hedge_after: float = None):
+        if not providers:
+            raise ValueError("HedgedLLM needs at least one provider.")
+        self.providers = providers
+        self.model = getattr(providers[0], "model", "")
+        self.hedge_after = Config.LLM_HEDGE_AFTER if hedge_after is None else hedge_after
+        self._ids = [_provider_id(p) for p in providers]
+
+    def hedge_delay(self, index: int) -> float:
+        if self.hedge_after:
+            return self.hedge_after
+        histogram = get_histogram(self._ids[index])
+        if histogram.total < self.MIN_SAMPLES:
+            return Config.LLM_HEDGE_DEFAULT
+        return histogram.quantile(Config.LLM_HEDGE_QUANTILE)
+
+    def _candidates(self) -> Tuple[List[int], bool]:
+        """Providers whose breaker is not open, in preference order, and whether that list is forced."""
+        allowed = [i for i, pid in enumerate(self._ids) if get_breaker(pid).state != "open"]
+        if not allowed:
+            logger.warning("All LLM circuit breakers are open; trying the primary anyway.")
+            return [0], True
+        return allowed, False
+
+    def _next(self, queue: List[int], forced: bool) -> Optional[int]:
+        """Pops the next provider the breaker admits (half-open breakers admit one trial)."""
+        while queue:
+            index = queue.pop(0)
+            if forced or get_breaker(self._ids[index]).allow():
+                return index
+        return None
+
+    @staticmethod
+    def _succeeded(response: str) -> bool:
+        return bool(response) and not response.startswith("Error:")
+
+    def _finish(self, index: int, started: float, response: str) -> str:
+        pid = self._ids[index]
+        if self._succeeded(response):
+            # Only successes set the hedge delay: fast failures would pull p95 down and hedge needlessly
+            get_histogram(pid).record(time.monotonic() - started)
+            get_breaker(pid).record_success()
+        else:
+            get_breaker(pid).record_failure()
+        return response
+
+    def _call(self, index: int, prompt: str, system_prompt: str, kwargs: Dict[str, Any]) -> str:
+        started = time.monotonic()
+        try:
+            response = self.providers[index].generate(prompt, system_prompt=system_prompt, **kwargs)
+        except Exception as e:
+            logger.error(f"{self._ids[index]} failed: {e}")
+            response = ""
+        return self._finish(index, started, response)
+
+    def generate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
+        queue, forced = self._candidates()
+        pending = {}
+
+        def launch(reason: str = ""):
+            index = self._next(queue, forced)
+            if index is None:
+                return None
+            if reason:
+                logger.info(f"{reason} to {self._ids[index]}")
+                event("llm_hedge", "llm", reason=reason, provider=self._ids[index])
+            pending[self._executor.submit(contextvars.copy_context().run, self._call, index, prompt, system_prompt,
+                                          kwargs)] = index
+            return index
+
+        current = launch()
+        while pending:
+            timeout = self.hedge_delay(current) if queue else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Hedge: the in-flight request is already slower than its p95
+                hedged = launch("Hedging request")
+                current = current if hedged is None else hedged
+                continue
+            for future in done:
+                pending.pop(future)
+                response = future.result()
+                if self._succeeded(response):
+                    return response
+            if not pending:
+                current = launch("Failing over")
+
+        return ""
+
+    async def agenerate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
+        queue, forced = self._candidates()
+        pending = {}
+
+        async def call(index: int) -> str:
+            started = time.monotonic()
+            try:
+                response = await self.providers[index].agenerate(prompt, system_prompt=system_prompt, **kwargs)
+            except asyncio.CancelledError:
+                get_breaker(self._ids[index]).release()
+                raise
+            except Exception as e:
+                logger.error(f"{self._ids[index]} failed: {e}")
+                response = ""
+            return self._finish(index, started, response)
+
+        def launch(reason: str = ""):
+            index = self._next(queue, forced)
+            if index is None:
+                return None
+            if reason:
+                logger.info(f"{reason} to {self._ids[index]}")
+                event("llm_hedge", "llm", reason=reason, provider=self._ids[index])
+            pending[asyncio.ensure_future(call(index))] = index
+            return index
+
+        current = launch()
+        try:
+            while pending:
+                timeout = self.hedge_delay(current) if queue else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = launch("Hedging request")
+                    current = current if hedged is None else hedged
+                    continue
+                for task in done:
+                    pending.pop(task)
+                    response = task.result()
+                    if self._succeeded(response):
+                        return response
+                if not pending:
+                    current = launch("Failing over")
+            return ""
+        finally:
+            for task in pending:
+                task.cancel()  # Losing hedges are abandoned
+
+    def stream(self, prompt: str, system_prompt: str = "", **kwargs) -> Iterator[str]:
+        """Streams from the first healthy provider; falls over only if it produced nothing."""
+        queue, forced = self._candidates()
+        while queue:
+            index = self._next(queue, forced)
+            if index is None:
+                return
+            started = time.monotonic()
+            parts = []
+            for fragment in self.providers[index].stream(prompt, system_prompt=system_prompt, **kwargs):
+                parts.append(fragment)
+                yield fragment
+            if self._succeeded(self._finish(index, started, "".join(parts))):
+                return
+            if parts:
+                return  # Partial output was already yielded; the consumer sees the failure.
@@ -7,43 +7,184 @@ from pathlib import Path
 sys.path.append(os.getcwd())
 
 from src.agents.orchestrator import Orchestrator
+from src.cassette import close_cassette, use_cassette
 from src.config import Config
+from src.tracing import get_tracer
 from src.utils import logger
 
+def write_trace(path: Path):
+    tracer = get_tracer()
+    tracer.export_chrome(path)
+    print(f"\n⏱  Trace written to {path}\n{tracer.format_summary()}")
+
+def render_shotlist(shotlist_path: Path, max_shots: int = None, dry_run: bool = False):
+    """Renders a saved shot list straight through the VisualEngine, skipping the LLM phases."""
+    import json
+    from src.media.engine import VisualEngine
+    from src.media.manifest import format_render_plan
+
+    with open(shotlist_path, "r") as f:
+        shots = json.load(f).get("shots", [])
+    if max_shots:
+        shots = shots[:max_shots]
+
+    engine = VisualEngine()
+    print(format_render_plan(engine.plan_render(shots)))
+    if dry_run:
+        return
+
+    results = engine.generate_shots(shots)
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    print(f"\n✅ Render Complete: {succeeded}/{len(results)} shots in {Config.OUTPUT_DIR}/shots")
+
+def batch_main(argv):
+    """`main.py batch concepts.jsonl`: many projects, one process, one warm Orchestrator."""
+    from src.batch import format_summary, load_jobs, run_batch
+
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Run many concepts concurrently.")
+    parser.add_argument("jobs", type=str, help="JSONL file: one concept string or {\"concept\": ..., \"max_shots\": ...} per line.")
+    parser.add_argument("--workers", type=int, default=None, help="Projects in flight at once (default: AIFLIX_BATCH_WORKERS).")
+    parser.add_argument("--speculative", type=int, default=0, help="Draft N shot lists in parallel per project.")
+    parser.add_argument("--auto-approve", action="store_true", help="Skip the critic for shot lists that pass strict structural validation.")
+    parser.add_argument("--assemble", action="store_true", help="Concatenate each project's clips into its final_cut.mp4.")
+    parser.add_argument("--trace", type=str, nargs="?", const=str(Config.OUTPUT_DIR / "projects" / "trace.json"), default=None, metavar="PATH",
+                        help="Record spans across all projects and write a Chrome trace plus a latency summary.")
+    args = parser.parse_args(argv)
+    if args.trace:
+        get_tracer().enable()
+
+    jobs = load_jobs(Path(args.jobs))
+    if not jobs:
+        print("\n❌ No concepts to run.")
+        return
+
+    orchestrator = Orchestrator(llm_provider="groq", speculative_candidates=args.speculative,
+                                auto_approve=args.auto_approve or None)
+    summary = run_batch(orchestrator, jobs, workers=args.workers, assemble=args.assemble)
+    print("\n" + format_summary(summary))
+    if args.trace:
+        write_trace(Path(args.trace))
+
+def status_main(argv):
+    """`main.py status [PROJECT]`: progress from the state store, safe to run while a production is writing."""
+    from src.store import StateStore
+
+    parser = argparse.ArgumentParser(prog="main.py status", description="Show production progress.")
+    parser.add_argument("project", type=str, nargs="?", help="Project id (default: list all projects).")
+    parser.add_argument("--scene", type=str, default=None, help="Only shots of this scene.")
+    parser.add_argument("--shot-status", type=str, default=None, help="List shots with this status (pending, produced, failed).")
+    args = parser.parse_args(argv)
+
+    if not Config.STATE_DB_PATH.exists():
+        print(f"\n❌ No state store at {Config.STATE_DB_PATH}")
+        return
+    store = StateStore()
+    if not args.project:
+        for project in store.projects():
+            print(f"  {project['status']:<9} {project['project_id']:<50} {project['title']}")
+        return
+
+    progress = store.progress(args.project)
+    if progress is None:
+        print(f"\n❌ Unknown project '{args.project}'")
+        return
+    print(f"{progress['project_id']} [{progress['status']}] {progress['title']}")
+    print(f"   Scenes: {progress['scenes'] or '-'}")
+    print(f"   Shots:  {progress['shots'] or '-'}")
+    if args.scene or args.shot_status:
+        for shot in store.shots(args.project, status=args.shot_status, scene_id=args.scene):
+            print(f"   {shot['shot_id']:<20} {shot['status']:<9} {shot['video_clip'] or ''}")
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        batch_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        status_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="AiFlix: Distributed Cinematic Intelligence Studio")
-    parser.add_argument("concept", type=str, help="The high-level concept or logline for the movie.")
+    parser.add_argument("concept", type=str, nargs="?", help="The high-level concept or logline for the movie.")
+    parser.add_argument("--resume", type=str, default=None, metavar="PROJECT", help="Resume a crashed production from its checkpoint (project id).")
     parser.add_argument("--max_shots", type=int, default=None, help="Limit the number of shots produced (default: unlimited).")
+    parser.add_argument("--speculative", type=int, default=0, help="Draft N shot lists in parallel and keep the critic's favourite (default: serial retries).")
+    parser.add_argument("--auto-approve", action="store_true", help="Skip the critic for shot lists that pass strict structural validation.")
+    parser.add_argument("--feature", action="store_true", help="Feature mode: outline the concept into scenes and produce them all concurrently.")
+    parser.add_argument("--stream", action="store_true", help="Feature mode: render each shot as soon as the DOP writes it (first draft, no critic round).")
+    parser.add_argument("--max_scenes", type=int, default=None, help="Feature mode: limit the number of scenes (default: AIFLIX_FEATURE_SCENES).")
+    parser.add_argument("--assemble", action="store_true", help="Concatenate produced clips into final_cut.mp4.")
+    parser.add_argument("--render", type=str, nargs="?", const=str(Config.OUTPUT_DIR / "shotlist.json"), default=None, metavar="SHOTLIST",
+                        help="Re-render an existing (edited) shot list; only shots whose spec changed are regenerated.")
+    parser.add_argument("--dry-run", action="store_true", help="With --render: report which shots would be rebuilt, without rendering.")
+    parser.add_argument("--trace", type=str, nargs="?", const=str(Config.OUTPUT_DIR / "trace.json"), default=None, metavar="PATH",
+                        help="Record spans and write a Chrome trace (chrome://tracing / Perfetto) plus a latency summary.")
+    parser.add_argument("--record", type=str, default=None, metavar="CASSETTE", help="Record every LLM and media call (with latency) to a cassette file.")
+    parser.add_argument("--replay", type=str, default=None, metavar="CASSETTE", help="Replay LLM and media calls from a cassette instead of calling the APIs.")
+    parser.add_argument("--replay-timing", type=float, default=None, metavar="SCALE", help="With --replay: sleep SCALE x the recorded latency (default 0 = instant).")
     parser.add_argument("--api", action="store_true", help="Start as a FastAPI server (Coming Soon).")
     
     args = parser.parse_args()
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    if args.trace:
+        get_tracer().enable()
+    if args.record:
+        use_cassette(Path(args.record), "record")
+    elif args.replay:
+        use_cassette(Path(args.replay), "replay", timing=args.replay_timing)
     
     if args.api:
         logger.info("Starting API Server... (Not implemented yet, check PRODUCTION.md)")
         return
 
-    logger.info(f"🎬 Starting Studio Production for: '{args.concept}'")
+    if args.render:
+        render_shotlist(Path(args.render), max_shots=args.max_shots, dry_run=args.dry_run)
+        return
+
+    if not args.concept and not args.resume:
+        parser.error("a concept is required unless --resume is given")
+
+    if args.resume:
+        logger.info(f"🎬 Resuming Studio Production: '{args.resume}'")
+    else:
+        logger.info(f"🎬 Starting Studio Production for: '{args.concept}'")
     
     # Initialize Studio Head
-    orchestrator = Orchestrator(llm_provider="groq")
+    orchestrator = Orchestrator(llm_provider="groq", speculative_candidates=args.speculative,
+                                auto_approve=args.auto_approve or None, stream_shots=args.stream or None)
     
     # Run Pipeline
     try:
-        result = orchestrator.run_pipeline(args.concept, max_shots=args.max_shots)
+        if args.feature:
+            result = orchestrator.run_feature(args.concept, max_scenes=args.max_scenes, max_shots=args.max_shots,
+                                              assemble=args.assemble, resume=args.resume)
+        else:
+            result = orchestrator.run_pipeline(args.concept, max_shots=args.max_shots, assemble=args.assemble, resume=args.resume)
         
         if result:
-            script_title = result.get("script", {}).get("title", "Untitled")
+            if args.feature:
+                script_title = result["state"].title
+            else:
+                script_title = result.get("script", {}).get("title", "Untitled")
             shot_count = len(result.get("produced_content", []))
             print(f"\n✅ Production Complete!")
             print(f"   Title: {script_title}")
+            if args.feature:
+                filmed = sum(1 for node in result["state"].scene_graph if node.status == "filmed")
+                print(f"   Scenes Filmed: {filmed}/{len(result['state'].scene_graph)}")
+            print(f"   Project: {result.get('project_id')} (resume with --resume)")
             print(f"   Shots Produced: {shot_count}")
-            print(f"   Output Directory: {Config.OUTPUT_DIR}/shots")
+            print(f"   Output Directory: {Config.OUTPUT_DIR}/{'scenes' if args.feature else 'shots'}")
         else:
             print("\n❌ Production Failed.")
             
     except Exception as e:
         logger.error(f"Critical error during production: {e}")
         print(f"\n❌ Error: {e}")
+    finally:
+        close_cassette()
+        if args.trace:
+            write_trace(Path(args.trace))
 
 if __name__ == "__main__":
     main()
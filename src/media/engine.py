@@ -1,13 +1,19 @@
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 from pathlib import Path
+import contextvars
+import queue
+import threading
+import time
 from .image_gen import ImageGenerator
 from .video_gen import VideoGenerator
 from .hf_image_gen import HuggingFaceImageGenerator
 from .hf_video_gen import HuggingFaceVideoGenerator
+from .manifest import RenderManifest, anchor_spec_hash, motion_spec_hash
 # Lazy import for local to avoid heavy dependencies if not used
 # from .local_gen import LocalImageGenerator, LocalVideoGenerator
 
 from ..config import Config
+from ..tracing import event, span
 from ..utils import logger
 
 class VisualEngine:
@@ -17,20 +23,25 @@ class VisualEngine:
     """
     def __init__(self, provider: str = "auto"):
         self.provider = provider
+        # Per-backend concurrency limits, shared by every caller of this engine
+        self.image_slots = threading.BoundedSemaphore(Config.IMAGE_CONCURRENCY)
+        self.video_slots = threading.BoundedSemaphore(Config.VIDEO_CONCURRENCY)
         
+        if provider == "mock":
+            from .mock_gen import MockImageGenerator, MockVideoGenerator
+            logger.info("VisualEngine: Using mock media backends (offline)")
+            self.image_gen = MockImageGenerator()
+            self.video_gen = MockVideoGenerator()
+            return
+
         # Decide provider logic
-        use_hf = False
-        
-        if provider == "huggingface":
-            use_hf = True
-        elif provider == "auto":
-            # Prefer HF if token exists (Free), else Replicate
-            if Config.HF_TOKEN:
-                use_hf = True
-            elif Config.REPLICATE_API_TOKEN:
-                use_hf = False
-            else:
-                logger.warning("No media keys found. Defaulting to Mock via Replicate wrapper.")
+        if provider == "auto":
+            from ..cassette import get_cassette
+
+            cassette = get_cassette()
+            # The keys decide the backend; a cassette records that choice so a keyless replay restores it
+            provider = cassette.setting("media_backend", self._auto_backend) if cassette else self._auto_backend()
+        use_hf = provider == "huggingface"
         
         if use_hf:
             logger.info("VisualEngine: Using Hugging Face (Free/Open Source)")
@@ -41,6 +52,15 @@ class VisualEngine:
             self.image_gen = ImageGenerator()
             self.video_gen = VideoGenerator()
 
+    @staticmethod
+    def _auto_backend() -> str:
+        # Prefer HF if token exists (Free), else Replicate
+        if Config.HF_TOKEN:
+            return "huggingface"
+        if not Config.REPLICATE_API_TOKEN:
+            logger.warning("No media keys found. Defaulting to Mock via Replicate wrapper.")
+        return "replicate"
+
     def generate_shot(self, shot_data: Dict[str, Any], identity_map: Dict[str, Any] = None) -> Dict[str, str]:
         """
         Generates a cinematic shot following the protocol:
@@ -48,7 +68,6 @@ class VisualEngine:
         2. Generate Motion (Video) using Anchor as reference
         """
         visual_prompt = shot_data.get("visual_prompt", "")
-        shot_type = shot_data.get("shot_type", "wide")
         shot_id = shot_data.get("shot_id", "unknown")
         
         logger.info(f"VisualEngine processing shot {shot_id}: {visual_prompt[:50]}...")
@@ -58,33 +77,14 @@ class VisualEngine:
         output_dir.mkdir(parents=True, exist_ok=True)
 
         # 1. Generate Anchor Frame
-        logger.info(f"   -> Generating Anchor Frame...")
-        anchor_path = output_dir / f"shot_{shot_id}_anchor.png"
-        
-        # (In a real system, we would inject the specific identity LoRA/Embedding here)
-        generated_path = self.image_gen.generate(
-            prompt=f"Cinematic still, {shot_type}, {visual_prompt}",
-            output_path=anchor_path,
-            aspect_ratio=shot_data.get("aspect_ratio", "16:9")
-        )
-
-        if not generated_path or not generated_path.exists():
-            logger.error("Failed to generate anchor frame.")
+        anchor_path = self._generate_anchor(shot_data, output_dir)
+        if anchor_path is None:
             return {"status": "failed"}
 
         # 2. Generate Motion (Image-to-Video)
-        logger.info(f"   -> Generating Motion (Image-to-Video)...")
-        # Video generator might need output path too? 
-        # Checking video_gen.py... usually it takes output_path.
-        # Let's assume it does or generates one. 
-        # src/media/video_gen.py generate signature: (image_path, prompt, output_path)
-        
-        video_path = output_dir / f"shot_{shot_id}_clip.mp4"
-        self.video_gen.generate(
-            image_path=anchor_path,
-            prompt=visual_prompt,
-            output_path=video_path
-        )
+        video_path = self._generate_motion(shot_data, anchor_path, output_dir)
+        if video_path is None:
+            return {"status": "failed", "anchor_frame": str(anchor_path)}
         
         return {
             "status": "success",
@@ -92,3 +92,228 @@ class VisualEngine:
             "video_clip": str(video_path),
             "shot_metadata": shot_data
         }
+
+    def _generate_anchor(self, shot_data: Dict[str, Any], output_dir: Path) -> Optional[Path]:
+        """Stage 1: the anchor frame. Holds an image slot for the duration of the call."""
+        shot_type = shot_data.get("shot_type", "wide")
+        shot_id = shot_data.get("shot_id", "unknown")
+        logger.info(f"   -> Generating Anchor Frame...")
+        anchor_path = output_dir / f"shot_{shot_id}_anchor.png"
+        
+        # (In a real system, we would inject the specific identity LoRA/Embedding here)
+        with span("image_slot_wait", "media", shot_id=shot_id):
+            self.image_slots.acquire()
+        try:
+            with span("image_gen", "media", shot_id=shot_id, backend=self._backend_id(self.image_gen)):
+                generated_path = self.image_gen.generate(
+                    prompt=f"Cinematic still, {shot_type}, {shot_data.get('visual_prompt', '')}",
+                    output_path=anchor_path,
+                    aspect_ratio=shot_data.get("aspect_ratio", "16:9")
+                )
+        finally:
+            self.image_slots.release()
+
+        if not generated_path or not generated_path.exists():
+            logger.error("Failed to generate anchor frame.")
+            return None
+        return anchor_path
+
+    def _generate_motion(self, shot_data: Dict[str, Any], anchor_path: Path, output_dir: Path) -> Optional[Path]:
+        """Stage 2: image-to-video from the anchor. Holds a video slot for the duration of the call."""
+        logger.info(f"   -> Generating Motion (Image-to-Video)...")
+        shot_id = shot_data.get("shot_id", "unknown")
+        video_path = output_dir / f"shot_{shot_id}_clip.mp4"
+        with span("video_slot_wait", "media", shot_id=shot_id):
+            self.video_slots.acquire()
+        try:
+            with span("video_gen", "media", shot_id=shot_id, backend=self._backend_id(self.video_gen)):
+                generated_path = self.video_gen.generate(
+                    image_path=anchor_path,
+                    prompt=shot_data.get("visual_prompt", ""),
+                    output_path=video_path
+                )
+        finally:
+            self.video_slots.release()
+
+        # Only the generator's answer counts: a clip left on disk by an earlier run is not this render
+        if not generated_path or not Path(generated_path).exists():
+            logger.error("Failed to generate motion clip.")
+            return None
+        return Path(generated_path)
+
+    @staticmethod
+    def _backend_id(generator: Any) -> str:
+        return f"{type(generator).__name__}:{getattr(generator, 'model_name', '')}"
+
+    def _spec_hashes(self, shot_data: Dict[str, Any]) -> Tuple[str, str]:
+        """Content hashes of the shot's anchor and motion specs, including backend and model."""
+        anchor_hash = anchor_spec_hash(shot_data, self._backend_id(self.image_gen))
+        return anchor_hash, motion_spec_hash(shot_data, anchor_hash, self._backend_id(self.video_gen))
+
+    def plan_render(self, shots: Iterable[Dict[str, Any]], output_dir: Path = None) -> List[Dict[str, Any]]:
+        """
+        Dry run of generate_shots(): for each shot, whether its anchor and clip would be
+        reused ('fresh') or rendered, and why ('new', 'changed' or 'missing').
+        """
+        manifest = RenderManifest(Path(output_dir or Config.OUTPUT_DIR / "shots"))
+        plan = []
+        for shot in shots:
+            shot_id = shot.get("shot_id", "unknown")
+            anchor_hash, motion_hash = self._spec_hashes(shot)
+            anchor = manifest.status(shot_id, "anchor", anchor_hash)
+            motion = manifest.status(shot_id, "motion", motion_hash)
+            if anchor != "fresh" and motion == "fresh":
+                motion = "changed"  # A re-rendered anchor invalidates the clip built from it
+            plan.append({"shot_id": shot_id, "anchor": anchor, "motion": motion})
+        return plan
+
+    def _with_retries(self, stage: str, shot_id: Any, retries: int, fn: Callable[[], Any]) -> Any:
+        """Runs one stage of one shot, retrying failures (None or exceptions) with exponential backoff."""
+        for attempt in range(retries + 1):
+            if attempt:
+                delay = Config.SHOT_RETRY_DELAY * (2 ** (attempt - 1))
+                logger.warning(f"Retrying {stage} for shot {shot_id} ({attempt}/{retries}) in {delay:.0f}s...")
+                event("media_retry", "media", stage=stage, shot_id=shot_id, attempt=attempt)
+                time.sleep(delay)
+            try:
+                result = fn()
+            except Exception as e:
+                logger.error(f"{stage} for shot {shot_id} raised: {e}")
+                continue
+            if result is not None:
+                return result
+        return None
+
+    def generate_shots(self, shots: Iterable[Dict[str, Any]], retries: int = None,
+                       on_result: Callable[[Dict[str, Any]], None] = None,
+                       output_dir: Path = None) -> List[Dict[str, Any]]:
+        """
+        Produces shots as a two-stage streaming pipeline:
+
+            shots --> [anchor workers x IMAGE_CONCURRENCY] --> bounded queue --> [motion workers x VIDEO_CONCURRENCY]
+
+        Anchors for upcoming shots are rendered while earlier shots are still in
+        image-to-video. The queue between the stages holds at most ANCHOR_QUEUE_SIZE
+        finished anchors, so a fast image backend blocks instead of piling up frames
+        ahead of a slow video backend. Each stage retries per shot; a failed shot does
+        not affect the others. `shots` may be any iterable, including one that is
+        still being filled (feature mode's stream_shots feeds shots as the DOP streams them). Results are returned in
+        input order; on_result, if given, is called as each shot finishes.
+        Concurrent batches (e.g. several scenes) share this engine's image and video
+        slots; give each its own output_dir so shot files don't collide.
+        Stages whose spec hash matches output_dir's render manifest are reused
+        instead of re-rendered (see plan_render() for a dry run).
+        """
+        retries = Config.SHOT_RETRIES if retries is None else retries
+        output_dir = Path(output_dir or Config.OUTPUT_DIR / "shots")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest = RenderManifest(output_dir) if Config.RENDER_MANIFEST_ENABLED else None
+
+        source = enumerate(shots)
+        source_lock = threading.Lock()
+        handoff: "queue.Queue" = queue.Queue(maxsize=Config.ANCHOR_QUEUE_SIZE)
+        results: Dict[int, Dict[str, Any]] = {}
+        results_lock = threading.Lock()
+
+        def finish(index: int, result: Dict[str, Any]):
+            with results_lock:
+                results[index] = result
+            if on_result:
+                try:
+                    on_result(result)
+                except Exception as e:
+                    logger.error(f"on_result callback failed: {e}")
+
+        def anchor_stage(index: int, shot: Dict[str, Any]):
+            shot_id = shot.get("shot_id", "unknown")
+            logger.info(f"VisualEngine processing shot {shot_id}: {shot.get('visual_prompt', '')[:50]}...")
+            anchor_hash, motion_hash = self._spec_hashes(shot)
+            if manifest and manifest.status(shot_id, "anchor", anchor_hash) == "fresh":
+                anchor_path = manifest.path_for(shot_id, "anchor")
+                logger.info(f"   -> Anchor unchanged, reusing {anchor_path.name}")
+                event("render_reused", "media", stage="anchor", shot_id=shot_id)
+                rerendered = False
+            else:
+                anchor_path = self._with_retries(
+                    "anchor", shot_id, retries, lambda: self._generate_anchor(shot, output_dir)
+                )
+                if anchor_path is None:
+                    finish(index, {"status": "failed", "shot_metadata": shot})
+                    return
+                if manifest:
+                    manifest.record(shot_id, "anchor", anchor_hash, anchor_path)
+                rerendered = True
+            handoff.put((index, shot, anchor_path, motion_hash, rerendered))  # Blocks while the video stage is saturated
+
+        def anchor_worker():
+            while True:
+                with source_lock:
+                    item = next(source, None)
+                if item is None:
+                    return
+                index, shot = item
+                # Anything outside the retried calls (bad shot data, manifest I/O) fails only this shot
+                try:
+                    anchor_stage(index, shot)
+                except Exception as e:
+                    logger.error(f"Anchor stage for shot #{index} failed: {e}")
+                    finish(index, {"status": "failed", "error": str(e), "shot_metadata": shot})
+
+        def motion_stage(index: int, shot: Dict[str, Any], anchor_path: Path, motion_hash: str, rerendered: bool):
+            shot_id = shot.get("shot_id", "unknown")
+            if manifest and not rerendered and manifest.status(shot_id, "motion", motion_hash) == "fresh":
+                video_path = manifest.path_for(shot_id, "motion")
+                logger.info(f"   -> Motion unchanged, reusing {video_path.name}")
+                event("render_reused", "media", stage="motion", shot_id=shot_id)
+            else:
+                video_path = self._with_retries(
+                    "motion", shot_id, retries,
+                    lambda: self._generate_motion(shot, anchor_path, output_dir)
+                )
+                if manifest and video_path is not None:
+                    manifest.record(shot_id, "motion", motion_hash, video_path)
+            if video_path is None:
+                finish(index, {"status": "failed", "anchor_frame": str(anchor_path), "shot_metadata": shot})
+                return
+            finish(index, {
+                "status": "success",
+                "anchor_frame": str(anchor_path),
+                "video_clip": str(video_path),
+                "shot_metadata": shot
+            })
+
+        def motion_worker():
+            while True:
+                item = handoff.get()
+                if item is None:
+                    return
+                index, shot, anchor_path = item[:3]
+                try:
+                    motion_stage(*item)
+                except Exception as e:
+                    logger.error(f"Motion stage for shot #{index} failed: {e}")
+                    finish(index, {"status": "failed", "error": str(e), "anchor_frame": str(anchor_path),
+                                   "shot_metadata": shot})
+
+        # Each worker runs in a copy of the caller's context, so media spans nest under its span
+        anchor_threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(anchor_worker,), name=f"anchor-{i}", daemon=True)
+            for i in range(Config.IMAGE_CONCURRENCY)
+        ]
+        motion_threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(motion_worker,), name=f"motion-{i}", daemon=True)
+            for i in range(Config.VIDEO_CONCURRENCY)
+        ]
+        for t in anchor_threads + motion_threads:
+            t.start()
+        for t in anchor_threads:
+            t.join()
+        for _ in motion_threads:
+            handoff.put(None)  # One shutdown sentinel per motion worker
+        for t in motion_threads:
+            t.join()
+
+        ordered = [results[i] for i in sorted(results)]
+        succeeded = sum(1 for r in ordered if r["status"] == "success")
+        logger.info(f"VisualEngine batch complete: {succeeded}/{len(ordered)} shots succeeded.")
+        return ordered
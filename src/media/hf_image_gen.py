@@ -1,8 +1,8 @@
 from pathlib import Path
 import os
-import requests
 import time
 from ..config import Config
+from . import transport
 from ..utils import logger
 
 class HuggingFaceImageGenerator:
@@ -17,7 +17,7 @@ class HuggingFaceImageGenerator:
         """
         Generates an image via Hugging Face Inference API.
         """
-        if not Config.HF_TOKEN:
+        if not Config.HF_TOKEN and not transport.replaying():
             logger.error("HF_TOKEN not found. Skipping image generation.")
             return None
             
@@ -37,7 +37,7 @@ class HuggingFaceImageGenerator:
         }
 
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            response = transport.post(self.api_url, headers=self.headers, json=payload)
             
             if response.status_code != 200:
                 logger.error(f"HF API Error: {response.text}")
@@ -1,8 +1,8 @@
 from pathlib import Path
 import os
-import requests
 import time
 from ..config import Config
+from . import transport
 from ..utils import logger
 
 class HuggingFaceVideoGenerator:
@@ -23,7 +23,7 @@ class HuggingFaceVideoGenerator:
         Generates video via Hugging Face Inference API.
         Note: Ignores image_path for Text-to-Video models.
         """
-        if not Config.HF_TOKEN:
+        if not Config.HF_TOKEN and not transport.replaying():
             logger.error("HF_TOKEN not found. Skipping video generation.")
             return None
             
@@ -33,7 +33,7 @@ class HuggingFaceVideoGenerator:
             # Text-to-Video Payload
             payload = {"inputs": prompt}
             
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            response = transport.post(self.api_url, headers=self.headers, json=payload)
             
             if response.status_code != 200:
                 logger.error(f"HF API Error: {response.text}")
@@ -1,7 +1,6 @@
 from pathlib import Path
-import replicate
-import requests
 from ..config import Config
+from . import transport
 from ..utils import logger
 
 class ImageGenerator:
@@ -14,14 +13,14 @@ class ImageGenerator:
         """
         Generates an image via Replicate API.
         """
-        if not Config.REPLICATE_API_TOKEN:
+        if not Config.REPLICATE_API_TOKEN and not transport.replaying():
             logger.error("REPLICATE_API_TOKEN not found. Skipping image generation.")
             return None
             
         logger.info(f"Generating image with {self.model_name}: {prompt[:50]}...")
         
         try:
-            output = replicate.run(
+            output = transport.replicate_run(
                 self.model_name,
                 input={
                     "prompt": prompt,
@@ -35,7 +34,7 @@ class ImageGenerator:
             image_url = output[0] if isinstance(output, list) else output
             
             # Download the image
-            response = requests.get(image_url)
+            response = transport.get(image_url)
             if response.status_code == 200:
                 output_path.parent.mkdir(parents=True, exist_ok=True)
                 with open(output_path, "wb") as f:
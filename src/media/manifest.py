@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..utils import logger
+
+MANIFEST_NAME = "manifest.jsonl"
+LEGACY_MANIFEST_NAME = "manifest.json"  # Single JSON object, rewritten on every record
+
+def _digest(spec: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+def anchor_spec_hash(shot: Dict[str, Any], backend: str) -> str:
+    """Hash of everything that determines a shot's anchor frame."""
+    return _digest({
+        "visual_prompt": shot.get("visual_prompt", ""),
+        "shot_type": shot.get("shot_type", "wide"),
+        "aspect_ratio": shot.get("aspect_ratio", "16:9"),
+        "lens_mm": shot.get("lens_mm"),
+        "backend": backend,
+    })
+
+def motion_spec_hash(shot: Dict[str, Any], anchor_hash: str, backend: str) -> str:
+    """Hash of everything that determines a shot's clip, including the anchor it starts from."""
+    return _digest({
+        "anchor": anchor_hash,
+        "visual_prompt": shot.get("visual_prompt", ""),
+        "movement": shot.get("movement"),
+        "backend": backend,
+    })
+
+class RenderManifest:
+    """
+    Records, per shot and stage (anchor, motion), the spec hash each file on disk was
+    rendered from. A stage is only re-rendered when its hash changed or its file is
+    gone, so editing one shot of a film re-renders that shot alone.
+
+    Each record is one appended JSONL line ([shot_id, stage, hash, path]); later
+    lines win, and the file is compacted to one line per stage when loaded.
+    """
+
+    def __init__(self, output_dir: Path):
+        self.path = Path(output_dir) / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Dict[str, str]]] = {}
+        legacy_path = self.path.with_name(LEGACY_MANIFEST_NAME)
+        if legacy_path.exists():
+            try:
+                with open(legacy_path, "r") as f:
+                    self.entries = json.load(f).get("shots", {})
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable render manifest {legacy_path}: {e}")
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        shot_id, stage, spec_hash, path = json.loads(line)
+                    except ValueError:
+                        continue  # Torn by a crash: that stage just counts as new
+                    self.entries.setdefault(shot_id, {})[stage] = {"hash": spec_hash, "path": path}
+        if self.entries:
+            self._compact()
+            if legacy_path.exists():
+                legacy_path.unlink()
+
+    def status(self, shot_id: Any, stage: str, spec_hash: str) -> str:
+        """'fresh' if the recorded render matches, else why it must be rebuilt: new, changed or missing."""
+        entry = self.entries.get(str(shot_id), {}).get(stage)
+        if not entry:
+            return "new"
+        if entry.get("hash") != spec_hash:
+            return "changed"
+        if not Path(entry.get("path", "")).exists():
+            return "missing"
+        return "fresh"
+
+    def path_for(self, shot_id: Any, stage: str) -> Optional[Path]:
+        entry = self.entries.get(str(shot_id), {}).get(stage)
+        return Path(entry["path"]) if entry else None
+
+    def record(self, shot_id: Any, stage: str, spec_hash: str, path: Path):
+        with self._lock:
+            self.entries.setdefault(str(shot_id), {})[stage] = {"hash": spec_hash, "path": str(path)}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps([str(shot_id), stage, spec_hash, str(path)]) + "\n")
+
+    def _compact(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            for shot_id, stages in self.entries.items():
+                for stage, entry in stages.items():
+                    f.write(json.dumps([shot_id, stage, entry["hash"], entry["path"]]) + "\n")
+        os.replace(tmp_path, self.path)
+
+def format_render_plan(plan: List[Dict[str, Any]]) -> str:
+    """Human-readable dry-run report for VisualEngine.plan_render()."""
+    anchors = sum(1 for p in plan if p["anchor"] != "fresh")
+    motions = sum(1 for p in plan if p["motion"] != "fresh")
+    lines = [f"Render plan: {anchors}/{len(plan)} anchors and {motions}/{len(plan)} clips to render."]
+    for p in plan:
+        if p["anchor"] == "fresh" and p["motion"] == "fresh":
+            action = "reuse"
+        else:
+            action = f"anchor: {p['anchor']:<8} clip: {p['motion']}"
+        lines.append(f"  shot {str(p['shot_id']):<6} {action}")
+    return "\n".join(lines)
@@ -0,0 +1,62 @@
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from ..config import Config
+from ..utils import logger
+
+class _MockMediaBackend:
+    """Shared latency/failure simulation for the offline media generators."""
+
+    def __init__(self, latency: float, latency_sigma: float = None, failure_rate: float = None, seed: int = None):
+        self.latency = latency
+        self.latency_sigma = Config.MOCK_MEDIA_LATENCY_SIGMA if latency_sigma is None else latency_sigma
+        self.failure_rate = Config.MOCK_MEDIA_FAILURE_RATE if failure_rate is None else failure_rate
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()  # Counters and sampling are shared by the engine's worker threads
+
+    def _simulate(self) -> bool:
+        """Sleeps for one sampled render time; returns False if this call should fail."""
+        with self._lock:
+            self.calls += 1
+            latency = self.latency
+            if latency > 0 and self.latency_sigma > 0:
+                latency *= self._random.lognormvariate(0.0, self.latency_sigma)
+            failed = bool(self.failure_rate) and self._random.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+        time.sleep(max(latency, 0.0))
+        return not failed
+
+class MockImageGenerator(_MockMediaBackend):
+    """Offline stand-in for ImageGenerator: simulated render time, writes a placeholder file."""
+
+    def __init__(self, latency: float = None, latency_sigma: float = None, failure_rate: float = None, seed: int = None):
+        super().__init__(Config.MOCK_IMAGE_LATENCY if latency is None else latency, latency_sigma, failure_rate, seed)
+        self.model_name = "mock-image"
+
+    def generate(self, prompt: str, output_path: Path, aspect_ratio: str = "16:9") -> Optional[Path]:
+        if not self._simulate():
+            logger.error("Mock image generation failed (simulated).")
+            return None
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(f"mock anchor frame ({aspect_ratio}): {prompt}")
+        return output_path
+
+class MockVideoGenerator(_MockMediaBackend):
+    """Offline stand-in for VideoGenerator: simulated render time, writes a placeholder file."""
+
+    def __init__(self, latency: float = None, latency_sigma: float = None, failure_rate: float = None, seed: int = None):
+        super().__init__(Config.MOCK_VIDEO_LATENCY if latency is None else latency, latency_sigma, failure_rate, seed)
+        self.model_name = "mock-video"
+
+    def generate(self, image_path: Path, prompt: str, output_path: Path) -> Optional[Path]:
+        if not self._simulate():
+            logger.error("Mock video generation failed (simulated).")
+            return None
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(f"mock clip from {image_path.name}: {prompt}")
+        return output_path
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from typing import Any, Dict
+
+class _Headers(dict):
+    """Case-insensitive header lookup, like requests' CaseInsensitiveDict."""
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+class RecordedResponse:
+    """The parts of a requests.Response the media generators use, rebuilt from a cassette."""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = _Headers({k.lower(): v for k, v in headers.items()})
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+def replaying() -> bool:
+    """True while a replay cassette serves every media call (no API keys needed)."""
+    from ..cassette import get_cassette
+
+    cassette = get_cassette()
+    return cassette is not None and cassette.mode == "replay"
+
+def _http(method: str, url: str, **kwargs):
+    from ..cassette import get_cassette
+
+    cassette = get_cassette()
+    if cassette is None:
+        import requests
+        return getattr(requests, method)(url, **kwargs)
+
+    # Auth headers stay out of the key (and out of the cassette file)
+    request = {"method": method, "url": url, "json": kwargs.get("json"), "params": kwargs.get("params")}
+
+    def perform():
+        import requests
+        response = getattr(requests, method)(url, **kwargs)
+        meta = {"status_code": response.status_code, "headers": {"content-type": response.headers.get("content-type", "")}}
+        return meta, response.content
+
+    meta, body = cassette.call("http", request, perform, summary=f"{method.upper()} {url}")
+    return RecordedResponse(meta["status_code"], meta["headers"], body or b"")
+
+def post(url: str, **kwargs):
+    """requests.post, recorded or replayed when a cassette is active."""
+    return _http("post", url, **kwargs)
+
+def get(url: str, **kwargs):
+    """requests.get, recorded or replayed when a cassette is active."""
+    return _http("get", url, **kwargs)
+
+def _fingerprint(value: Any) -> Any:
+    """Cassette-key form of a Replicate input value: open files are keyed by content."""
+    if hasattr(value, "read"):
+        digest = hashlib.sha256(value.read()).hexdigest()
+        value.seek(0)
+        return f"file:sha256:{digest}"
+    return value
+
+def _serialize_output(output: Any) -> Any:
+    """JSON form of a replicate.run result: file outputs become their URLs."""
+    if output is None or isinstance(output, (str, int, float, bool)):
+        return output
+    # replicate>=1.0 FileOutput iterates over its bytes, so it must be caught before the iterable case
+    if hasattr(output, "url"):
+        return str(output.url)
+    if isinstance(output, dict):
+        return {key: _serialize_output(value) for key, value in output.items()}
+    if isinstance(output, (list, tuple)) or (hasattr(output, "__iter__") and not isinstance(output, bytes)):
+        return [_serialize_output(item) for item in output]
+    return str(output)
+
+def replicate_run(model: str, input: Dict[str, Any]) -> Any:
+    """replicate.run, recorded or replayed when a cassette is active."""
+    from ..cassette import get_cassette
+
+    cassette = get_cassette()
+    if cassette is None:
+        import replicate
+        return replicate.run(model, input=input)
+
+    request = {"model": model, "input": {k: _fingerprint(v) for k, v in input.items()}}
+
+    def perform():
+        import replicate
+        return {"output": _serialize_output(replicate.run(model, input=input))}, None
+
+    meta, _ = cassette.call("replicate", request, perform, summary=model)
+    return meta["output"]
@@ -1,7 +1,6 @@
 from pathlib import Path
-import replicate
-import requests
 from ..config import Config
+from . import transport
 from ..utils import logger
 
 class VideoGenerator:
@@ -14,7 +13,7 @@ class VideoGenerator:
         """
         Generates video from an anchor image using Replicate.
         """
-        if not Config.REPLICATE_API_TOKEN:
+        if not Config.REPLICATE_API_TOKEN and not transport.replaying():
             logger.error("REPLICATE_API_TOKEN not found. Skipping video generation.")
             return None
             
@@ -31,7 +30,7 @@ class VideoGenerator:
                 "num_inference_steps": 50
             }
             
-            output = replicate.run(
+            output = transport.replicate_run(
                 self.model_name,
                 input=input_data
             )
@@ -39,7 +38,7 @@ class VideoGenerator:
             # Output is typically a URL string for the mp4
             video_url = output
             
-            response = requests.get(video_url)
+            response = transport.get(video_url)
             if response.status_code == 200:
                 output_path.parent.mkdir(parents=True, exist_ok=True)
                 with open(output_path, "wb") as f:
@@ -0,0 +1,230 @@
+import json
+import re
+from collections import Counter, defaultdict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .data import KnowledgeItem
+from ..utils import logger
+
+INDEX_FORMAT_VERSION = 1
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:['_-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i in into is it its of on or she that the their "
+    "them then there these they this to was were which while will with you your".split()
+)
+# Field boosts, matching the legacy keyword scorer (title 3, tags 2, content 1)
+TITLE_WEIGHT = 3
+TAG_WEIGHT = 2
+# Upper bound on one batch's (queries x documents) float32 score matrix: 16 MiB
+MAX_SCORE_CELLS = 1 << 22
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """
+    Inverted index with BM25 scoring over KnowledgeItems.
+
+    Built once: documents are sorted by category, so every category is a
+    contiguous id range (its partition), and each term's postings are stored
+    CSR-style as (doc ids, precomputed BM25 impacts). A query is one numpy
+    scatter-add per query term plus an argpartition for the top k, restricted
+    to the category's range; search_many() does a whole batch in one pass.
+    """
+
+    def __init__(self, items: List[KnowledgeItem], terms: Dict[str, int], indptr: np.ndarray,
+                 doc_ids: np.ndarray, impacts: np.ndarray, partitions: Dict[str, Tuple[int, int]]):
+        self.items = items
+        self.terms = terms
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.impacts = impacts
+        self.partitions = partitions
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @classmethod
+    def build(cls, items: Iterable[KnowledgeItem], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        items = sorted(items, key=lambda item: item.category)
+        partitions: Dict[str, Tuple[int, int]] = {}
+        doc_terms: List[Counter] = []
+        lengths = np.zeros(len(items), dtype=np.float32)
+        for doc_id, item in enumerate(items):
+            lo, _ = partitions.get(item.category, (doc_id, doc_id))
+            partitions[item.category] = (lo, doc_id + 1)
+            tf = Counter(tokenize(item.content))
+            for token in tokenize(item.title):
+                tf[token] += TITLE_WEIGHT
+            for token in tokenize(" ".join(item.tags)):
+                tf[token] += TAG_WEIGHT
+            doc_terms.append(tf)
+            lengths[doc_id] = sum(tf.values())
+
+        # Flat (term, doc, tf) columns, grouped by term with one stable sort (doc order is kept).
+        # A missing term gets the next id, so the lookups stay in C (map over __getitem__).
+        term_ids: Dict[str, int] = defaultdict()
+        term_ids.default_factory = term_ids.__len__
+        term_col, tf_col = [], []
+        for tf in doc_terms:
+            term_col.extend(map(term_ids.__getitem__, tf))
+            tf_col.extend(tf.values())
+        term_col = np.asarray(term_col, dtype=np.int32)
+        order = np.argsort(term_col, kind="stable")
+        term_col = term_col[order]
+        doc_ids = np.repeat(np.arange(len(items), dtype=np.int32), [len(tf) for tf in doc_terms])[order]
+        tfs = np.asarray(tf_col, dtype=np.float32)[order]
+        terms = dict(term_ids)
+
+        n_docs = max(len(items), 1)
+        doc_freq = np.bincount(term_col, minlength=len(terms))
+        idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        avg_length = float(lengths.mean()) if len(items) else 1.0
+        norms = k1 * (1 - b + b * lengths / max(avg_length, 1e-9))
+        impacts = (idf[term_col] * tfs * (k1 + 1) / (tfs + norms[doc_ids])).astype(np.float32)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=indptr[1:])
+
+        return cls(items=items, terms=terms, indptr=indptr, doc_ids=doc_ids, impacts=impacts, partitions=partitions)
+
+    def search(self, query: str, category: str = None, top_k: int = 3) -> List[Tuple[float, KnowledgeItem]]:
+        """Top-k (score, item) pairs for the query, best first; only positive scores."""
+        if category is not None:
+            if category not in self.partitions:
+                return []
+            lo, hi = self.partitions[category]
+        else:
+            lo, hi = 0, len(self.items)
+
+        scores = np.zeros(len(self.items), dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            i = self.terms.get(term)
+            if i is None:
+                continue
+            start, end = self.indptr[i], self.indptr[i + 1]
+            ids = self.doc_ids[start:end]
+            if category is not None:
+                # Postings are sorted by doc id, so the partition is a slice
+                first, last = np.searchsorted(ids, (lo, hi))
+                ids, start = ids[first:last], start + first
+                end = start + len(ids)
+            scores[ids] += self.impacts[start:end]
+            matched = matched or len(ids) > 0
+        if not matched:
+            return []
+
+        window = scores[lo:hi]
+        k = min(top_k, len(window))
+        best = np.argpartition(-window, k - 1)[:k] if k < len(window) else np.arange(len(window))
+        best = best[np.argsort(-window[best], kind="stable")]
+        return [(float(window[j]), self.items[lo + j]) for j in best if window[j] > 0]
+
+    def search_many(self, queries: List[str], category: str = None,
+                    top_k: int = 3) -> List[List[Tuple[float, KnowledgeItem]]]:
+        """
+        search() for several queries at once, results in query order. Each distinct
+        term's postings are sliced once for the whole batch and added into a
+        (queries x partition) score matrix; one row-wise argpartition picks every top k.
+        """
+        if len(queries) == 1:
+            return [self.search(queries[0], category=category, top_k=top_k)]
+        if category is not None:
+            if category not in self.partitions:
+                return [[] for _ in queries]
+            lo, hi = self.partitions[category]
+        else:
+            lo, hi = 0, len(self.items)
+        if hi <= lo:
+            return [[] for _ in queries]
+
+        # Bound the score matrix by scoring large batches in row blocks
+        block = max(1, MAX_SCORE_CELLS // (hi - lo))
+        results = []
+        for first in range(0, len(queries), block):
+            results.extend(self._search_block(queries[first:first + block], lo, hi, top_k))
+        return results
+
+    def _search_block(self, queries: List[str], lo: int, hi: int,
+                      top_k: int) -> List[List[Tuple[float, KnowledgeItem]]]:
+        rows_by_term: Dict[int, List[int]] = defaultdict(list)
+        for row, query in enumerate(queries):
+            for term in set(tokenize(query)):
+                i = self.terms.get(term)
+                if i is not None:
+                    rows_by_term[i].append(row)
+
+        width = hi - lo
+        scores = np.zeros((len(queries), width), dtype=np.float32)
+        for i, rows in rows_by_term.items():
+            start = self.indptr[i]
+            ids = self.doc_ids[start:self.indptr[i + 1]]
+            # Postings are sorted by doc id, so the partition is a slice
+            first, last = np.searchsorted(ids, (lo, hi))
+            if first == last:
+                continue
+            # Doc ids are unique within a posting list, so the fancy-indexed add is exact
+            scores[np.ix_(rows, ids[first:last] - lo)] += self.impacts[start + first:start + last]
+
+        k = min(top_k, width)
+        if k < width:
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            best = np.broadcast_to(np.arange(width), scores.shape)
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        return [
+            [(float(score), self.items[lo + j]) for j, score in zip(row_ids, row_scores) if score > 0]
+            for row_ids, row_scores in zip(best.tolist(), best_scores.tolist())
+        ]
+
+    # --- Persistence ---
+
+    def save(self, path: Path):
+        """Writes the index as one .npz (no pickle): arrays plus a JSON header."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "version": INDEX_FORMAT_VERSION,
+            "terms": list(self.terms),  # Insertion order is term id order
+            "partitions": self.partitions,
+            "items": [asdict(item) for item in self.items],
+        }
+        tmp_path = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp_path, header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+                 indptr=self.indptr, doc_ids=self.doc_ids, impacts=self.impacts)
+        tmp_path.replace(path)
+        logger.info(f"BM25 index saved: {len(self.items)} docs, {len(self.terms)} terms -> {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with np.load(Path(path), allow_pickle=False) as data:
+            header = json.loads(data["header"].tobytes().decode("utf-8"))
+            if header.get("version", 0) > INDEX_FORMAT_VERSION:
+                raise ValueError(f"BM25 index v{header.get('version')} is newer than supported v{INDEX_FORMAT_VERSION}.")
+            return cls(
+                items=[KnowledgeItem(**item) for item in header["items"]],
+                terms={term: i for i, term in enumerate(header["terms"])},
+                indptr=data["indptr"],
+                doc_ids=data["doc_ids"],
+                impacts=data["impacts"],
+                partitions={k: tuple(v) for k, v in header["partitions"].items()},
+            )
+
+def load_or_build(path: Optional[Path], items: List[KnowledgeItem]) -> BM25Index:
+    """The serialized index at `path` if there is one, otherwise an index built from `items`."""
+    if path and Path(path).exists():
+        try:
+            index = BM25Index.load(path)
+            logger.info(f"Loaded BM25 index ({len(index)} docs) from {path}")
+            return index
+        except Exception as e:
+            logger.error(f"Failed to load BM25 index at {path}: {e}. Rebuilding from seed data.")
+    return BM25Index.build(items)
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from ..utils import logger
+
+CACHE_FORMAT_VERSION = 1
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Entries, least recently used first."""
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class RetrievalCache:
+    """
+    Query-embedding and retrieval-result LRUs for one knowledge store, tagged
+    with the store's version (ingest generation + document count). A version
+    change clears both caches; a persisted cache from another version is
+    ignored on load.
+    """
+
+    def __init__(self, max_embeddings: int, max_results: int, path: Optional[Path] = None):
+        self.embeddings = LRUCache(max_embeddings)
+        self.results = LRUCache(max_results)
+        self.path = Path(path) if path else None
+        self.version: Optional[Tuple] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self._load()
+
+    def validate(self, version: Tuple):
+        """Drops every entry if the store changed since they were cached."""
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version is not None or len(self.embeddings) or len(self.results):
+                logger.info(f"Knowledge store changed ({self.version} -> {version}); retrieval cache cleared.")
+            self.embeddings.clear()
+            self.results.clear()
+            self.version = version
+            self._dirty = True
+
+    def put_embedding(self, query: str, embedding: List[float]):
+        self.embeddings.put(query, embedding)
+        self._dirty = True
+
+    def put_results(self, key: Tuple[str, str, int], items: List[Dict[str, Any]]):
+        self.results.put(key, items)
+        self._dirty = True
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable retrieval cache at {self.path}: {e}")
+            return
+        if data.get("format") != CACHE_FORMAT_VERSION:
+            return
+        self.version = tuple(data["version"])
+        for query, embedding in data.get("embeddings", []):
+            self.embeddings.put(query, embedding)
+        for key, items in data.get("results", []):
+            self.results.put(tuple(key), items)
+
+    def save(self):
+        """Persists both caches (atomic replace); a no-op when nothing changed."""
+        if not self.path or not self._dirty or self.version is None:
+            return
+        data = {
+            "format": CACHE_FORMAT_VERSION,
+            "version": list(self.version),
+            "embeddings": [[query, embedding] for query, embedding in self.embeddings.items()],
+            "results": [[list(key), items] for key, items in self.results.items()],
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.error(f"Failed to save retrieval cache to {self.path}: {e}")
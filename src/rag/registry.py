@@ -0,0 +1,46 @@
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from .retriever import KnowledgeRetriever
+from ..config import Config
+from ..utils import logger
+
+_retrievers: Dict[Path, KnowledgeRetriever] = {}
+_lock = threading.Lock()
+_warmups: Dict[Path, threading.Thread] = {}
+
+def get_retriever(db_path: Path = None) -> KnowledgeRetriever:
+    """The process-wide retriever for a vector store (one Chroma client and embedding model per path)."""
+    path = Path(db_path or Config.DATA_DIR / "chroma_db").resolve()
+    with _lock:
+        retriever = _retrievers.get(path)
+        if retriever is None:
+            retriever = _retrievers[path] = KnowledgeRetriever(db_path=path)
+        return retriever
+
+def warm_up(db_path: Path = None, background: bool = True) -> Optional[threading.Thread]:
+    """Opens the store and loads the embedding model ahead of the first query; at most one warm-up per store."""
+    retriever = get_retriever(db_path)
+    if not background:
+        retriever.warm_up()
+        return None
+    with _lock:
+        thread = _warmups.get(retriever.db_path)
+        if thread is None:
+            thread = threading.Thread(target=_warm_up, args=(retriever,), name="rag-warmup", daemon=True)
+            _warmups[retriever.db_path] = thread
+            thread.start()
+        return thread
+
+def _warm_up(retriever: KnowledgeRetriever):
+    try:
+        retriever.warm_up()
+        logger.info("RAG retriever warmed up.")
+    except Exception as e:
+        logger.error(f"RAG warm-up failed: {e}")
+
+def reset_retrievers():
+    """Drops the shared retrievers (e.g. after re-ingesting into a store)."""
+    with _lock:
+        _retrievers.clear()
+        _warmups.clear()
@@ -1,90 +1,225 @@
-import chromadb
-from typing import List, Tuple
+import atexit
+import hashlib
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from .bm25 import BM25Index, load_or_build
+from .cache import RetrievalCache
 from .data import SEED_KNOWLEDGE, KnowledgeItem
 from ..config import Config
 from ..utils import logger
 
+# Bumped by ingest_books.py after every ingest, so caches keyed on the old corpus are dropped
+GENERATION_FILE = "aiflix_ingest_generation"
+
+def read_ingest_generation(db_path: Path) -> int:
+    try:
+        return int((Path(db_path) / GENERATION_FILE).read_text().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def bump_ingest_generation(db_path: Path) -> int:
+    generation = read_ingest_generation(db_path) + 1
+    Path(db_path).mkdir(parents=True, exist_ok=True)
+    (Path(db_path) / GENERATION_FILE).write_text(str(generation))
+    return generation
+
+def cache_path_for(db_path: Path) -> Path:
+    """Persisted retrieval cache of one knowledge store; stores at different paths never share a file."""
+    db_path = Path(db_path).resolve()
+    digest = hashlib.sha1(str(db_path).encode("utf-8")).hexdigest()[:8]
+    return Path(Config.RAG_CACHE_DIR) / f"{db_path.name}-{digest}.json"
+
 class KnowledgeRetriever:
     """
     Retrieves knowledge chunks relevant to the query from ChromaDB.
     Falls back to seed data if DB is unavailable.
+
+    Nothing is opened at construction: the Chroma client, collection and
+    embedding model load on first use (or in warm_up()), exactly once, even
+    under concurrent queries. Share one instance per process via
+    rag.registry.get_retriever().
+
+    Query embeddings and (query, category, top_k) results are kept in LRU
+    caches (persisted across runs unless disabled). They are checked against
+    the store version (ingest generation + document count) at most every
+    AIFLIX_RAG_CACHE_CHECK_INTERVAL seconds, and cleared when it changes.
     """
     
-    def __init__(self):
-        self.db_path = Config.DATA_DIR / "chroma_db"
-        self.collection = None
-        
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path or Config.DATA_DIR / "chroma_db")
+        self._collection = None
+        self._embedding_function = None
+        self._connected = False
+        self._lock = threading.Lock()
+
+        self.cache: Optional[RetrievalCache] = None
+        self._version_checked = 0.0
+        if Config.RAG_CACHE_ENABLED:
+            self.cache = RetrievalCache(Config.RAG_CACHE_EMBEDDINGS, Config.RAG_CACHE_RESULTS,
+                                        path=cache_path_for(self.db_path) if Config.RAG_CACHE_PERSIST else None)
+            if self.cache.path:
+                atexit.register(self.cache.save)
+
+        # Fallback in-memory (BM25 index built on first use, or loaded from disk)
+        self.knowledge_base = SEED_KNOWLEDGE
+        self._bm25: Optional[BM25Index] = None
+
+    @property
+    def collection(self) -> Optional[Any]:
+        if not self._connected:
+            with self._lock:
+                if not self._connected:
+                    self._collection = self._connect()
+                    self._connected = True
+        return self._collection
+
+    def _connect(self) -> Optional[Any]:
         try:
-            if self.db_path.exists():
-                client = chromadb.PersistentClient(path=str(self.db_path))
-                # "aiflix_knowledge" must match the name in ingest_books.py
-                self.collection = client.get_collection(name="aiflix_knowledge")
-                logger.info(f"Connected to RAG database at {self.db_path}")
-            else:
+            if not self.db_path.exists():
                 logger.warning(f"RAG database not found at {self.db_path}. Using seed data.")
+                return None
+            import chromadb
+            from chromadb.utils import embedding_functions
+
+            client = chromadb.PersistentClient(path=str(self.db_path))
+            # "aiflix_knowledge" must match the name in ingest_books.py; same default model it embedded with
+            self._embedding_function = embedding_functions.DefaultEmbeddingFunction()
+            collection = client.get_collection(name="aiflix_knowledge", embedding_function=self._embedding_function)
+            logger.info(f"Connected to RAG database at {self.db_path}")
+            return collection
         except Exception as e:
             logger.warning(f"Failed to connect to ChromaDB: {e}. Using seed data.")
+            return None
 
-        # Fallback in-memory
-        self.knowledge_base = SEED_KNOWLEDGE
+    def warm_up(self):
+        """Connects and loads the embedding model (one throwaway query) so the first real retrieve is fast."""
+        collection = self.collection
+        if collection is not None:
+            try:
+                collection.query(query_texts=["warm up"], n_results=1)
+            except Exception as e:
+                logger.warning(f"RAG warm-up query failed: {e}")
+        else:
+            self.bm25
+
+    def store_version(self) -> Tuple:
+        """Identifies the corpus the caches were filled from."""
+        collection = self.collection
+        if collection is None:
+            index = Config.BM25_INDEX_PATH
+            return ("bm25", str(index), index.stat().st_mtime_ns if index.exists() else 0)
+        return ("chroma", str(self.db_path), read_ingest_generation(self.db_path), collection.count())
+
+    def _valid_cache(self) -> Optional[RetrievalCache]:
+        if self.cache is None:
+            return None
+        now = time.monotonic()
+        if now - self._version_checked >= Config.RAG_CACHE_CHECK_INTERVAL or self.cache.version is None:
+            try:
+                self.cache.validate(self.store_version())
+            except Exception as e:
+                logger.warning(f"Could not read knowledge store version ({e}); bypassing retrieval cache.")
+                return None
+            self._version_checked = now
+        return self.cache
+
+    def _embed(self, queries: List[str], cache: Optional[RetrievalCache]) -> Optional[List[List[float]]]:
+        """
+        The queries' embeddings, or None when the collection embeds queries itself.
+        Cached ones are reused; the rest are embedded in one batched call.
+        """
+        if self._embedding_function is None:
+            return None
+        embeddings = [cache.embeddings.get(query) if cache else None for query in queries]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self._embedding_function([queries[i] for i in missing])
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = [float(x) for x in embedding]
+                if cache:
+                    cache.put_embedding(queries[i], embeddings[i])
+        return embeddings
+
+    @property
+    def bm25(self) -> BM25Index:
+        if self._bm25 is None:
+            with self._lock:
+                if self._bm25 is None:
+                    self._bm25 = load_or_build(Config.BM25_INDEX_PATH, self.knowledge_base)
+        return self._bm25
         
     def retrieve(self, query: str, category: str = None, top_k: int = 3) -> List[KnowledgeItem]:
         """
         Retrieves top_k items matching the query.
         """
+        return self.retrieve_many([query], category=category, top_k=top_k)[0]
+
+    def retrieve_many(self, queries: List[str], category: str = None, top_k: int = 3) -> List[List[KnowledgeItem]]:
+        """
+        Retrieves top_k items for each query, in query order. Identical queries are
+        searched once and cached results are reused; the remaining queries are
+        embedded in one pass and sent to the store as a single batched query.
+        """
+        cache = self._valid_cache()
+        found: Dict[str, List[KnowledgeItem]] = {}
+        pending = []
+        for query in dict.fromkeys(queries):
+            cached = cache.results.get((query, category or "", top_k)) if cache is not None else None
+            if cached is not None:
+                found[query] = [KnowledgeItem(**item) for item in cached]
+            else:
+                pending.append(query)
+
+        if pending:
+            results, cacheable = self._search(pending, category, top_k, cache)
+            for query, items in zip(pending, results):
+                found[query] = items
+                if cache is not None and cacheable:
+                    cache.put_results((query, category or "", top_k), [asdict(item) for item in items])
+        return [list(found[query]) for query in queries]
+
+    def _search(self, queries: List[str], category: Optional[str], top_k: int,
+                cache: Optional[RetrievalCache]) -> Tuple[List[List[KnowledgeItem]], bool]:
+        """Runs the batch; the flag is False for a fallback answer after a failed Chroma query."""
         # Try DB first
         if self.collection:
             try:
+                embeddings = self._embed(queries, cache)
                 results = self.collection.query(
-                    query_texts=[query],
+                    **({"query_embeddings": embeddings} if embeddings is not None else {"query_texts": queries}),
                     n_results=top_k,
                     where={"category": category} if category else None
                 )
                 
-                items = []
                 if results['documents']:
-                    # Chroma returns list of lists (batch queries)
-                    docs = results['documents'][0]
-                    metas = results['metadatas'][0]
-                    
-                    for doc, meta in zip(docs, metas):
-                        items.append(KnowledgeItem(
-                            category=meta.get("category", "General"),
-                            title=meta.get("source", "Book Excerpt"),  # Use filename as title
-                            author="Inferred from source",
-                            content=doc,
-                            tags=[]
-                        ))
-                    return items
+                    # Chroma returns one list of documents (and metadatas) per query
+                    return [
+                        [
+                            KnowledgeItem(
+                                category=meta.get("category", "General"),
+                                title=meta.get("source", "Book Excerpt"),  # Use filename as title
+                                author="Inferred from source",
+                                content=doc,
+                                tags=[]
+                            )
+                            for doc, meta in zip(docs, metas)
+                        ]
+                        for docs, metas in zip(results['documents'], results['metadatas'])
+                    ], True
             except Exception as e:
                 logger.error(f"ChromaDB query failed: {e}")
+                logger.info("Falling back to in-memory BM25 search.")
+                return self._keyword_search(queries, category, top_k), False
         
-        # Fallback to simple keyword search
-        logger.info("Falling back to in-memory keyword search.")
-        results = []
-        query_terms = set(query.lower().split())
-        
-        for item in self.knowledge_base:
-            if category and item.category != category:
-                continue
-                
-            score = 0
-            content_lower = item.content.lower()
-            title_lower = item.title.lower()
-            
-            for term in query_terms:
-                if term in title_lower:
-                    score += 3
-                elif term in content_lower:
-                    score += 1
-                elif term in [t.lower() for t in item.tags]:
-                    score += 2
-            
-            if score > 0:
-                results.append((score, item))
-        
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [item for _, item in results[:top_k]]
+        # Fallback to BM25 keyword search
+        logger.info("Falling back to in-memory BM25 search.")
+        return self._keyword_search(queries, category, top_k), True
+
+    def _keyword_search(self, queries: List[str], category: Optional[str], top_k: int) -> List[List[KnowledgeItem]]:
+        return [[item for _, item in hits] for hits in self.bm25.search_many(queries, category=category, top_k=top_k)]
 
     def format_context(self, items: List[KnowledgeItem]) -> str:
         """Formats retrieved items into a string for the context window."""
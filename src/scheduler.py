@@ -0,0 +1,241 @@
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .config import Config
+from .tracing import event, span
+from .utils import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: budgets are only shared between threads
+    fcntl = None
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is still rate limited after every retry attempt."""
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status
+
+def is_retryable(error: Exception) -> bool:
+    """429s, 5xx responses, timeouts and dropped connections are worth retrying."""
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    name = type(error).__name__
+    return "RateLimit" in name or "Timeout" in name or "Connection" in name
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Reads the server's requested delay (retry-after-ms / retry-after) in seconds."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RequestScheduler:
+    """
+    Token-bucket scheduler for LLM calls.
+    Every model has a requests-per-minute and a tokens-per-minute bucket. Bucket
+    state lives in a small JSON file guarded by an flock, so concurrent productions
+    in separate processes on the same host draw from one shared budget.
+    A 429 pauses the model for everyone until its retry-after has elapsed.
+    """
+
+    def __init__(self, state_dir: Path = None, max_attempts: int = None,
+                 backoff_base: float = None, backoff_max: float = None):
+        self.state_dir = Path(state_dir or Config.LLM_RATE_LIMIT_DIR)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts or Config.LLM_MAX_ATTEMPTS
+        self.backoff_base = Config.LLM_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = Config.LLM_BACKOFF_MAX if backoff_max is None else backoff_max
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock_files: Dict[str, Any] = {}
+        self._registry_lock = threading.Lock()
+
+    # --- Shared bucket state ---
+
+    def _slug(self, model: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+
+    def _thread_lock(self, model: str) -> threading.Lock:
+        with self._registry_lock:
+            if model not in self._locks:
+                self._locks[model] = threading.Lock()
+                if fcntl:
+                    self._lock_files[model] = open(self.state_dir / f"{self._slug(model)}.lock", "a+")
+            return self._locks[model]
+
+    def _update(self, model: str, rpm: int, tpm: int, fn: Callable[[Dict[str, float], float], Any]) -> Any:
+        """Runs fn(state, now) under both the thread and the file lock, then persists state."""
+        path = self.state_dir / f"{self._slug(model)}.json"
+        with self._thread_lock(model):
+            lock_file = self._lock_files.get(model)
+            if lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                try:
+                    with open(path, "r") as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {"requests": float(rpm), "tokens": float(tpm), "updated": now, "blocked_until": 0.0}
+
+                # Refill both buckets for the time elapsed since the last update
+                elapsed = max(0.0, now - state["updated"])
+                state["requests"] = min(float(rpm), state["requests"] + elapsed * rpm / 60.0)
+                state["tokens"] = min(float(tpm), state["tokens"] + elapsed * tpm / 60.0)
+                state["updated"] = now
+
+                result = fn(state, now)
+
+                tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, path)
+                return result
+            finally:
+                if lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _try_acquire(self, model: str, rpm: int, tpm: int, tokens: int) -> float:
+        """Takes one request and `tokens` from the buckets. Returns 0 on success, else seconds to wait."""
+        tokens = min(tokens, tpm)  # A single oversized request must still be admissible
+
+        def take(state, now):
+            if state.get("blocked_until", 0.0) > now:
+                return state["blocked_until"] - now
+            if state["requests"] >= 1 and state["tokens"] >= tokens:
+                state["requests"] -= 1
+                state["tokens"] -= tokens
+                return 0.0
+            wait_requests = (1 - state["requests"]) * 60.0 / rpm if state["requests"] < 1 else 0.0
+            wait_tokens = (tokens - state["tokens"]) * 60.0 / tpm if state["tokens"] < tokens else 0.0
+            return max(wait_requests, wait_tokens, 0.01)
+
+        return self._update(model, rpm, tpm, take)
+
+    def acquire(self, model: str, rpm: int, tpm: int, tokens: int):
+        wait = self._try_acquire(model, rpm, tpm, tokens)
+        if wait <= 0:
+            return
+        with span("rate_limit_wait", "llm", model=model, tokens=tokens):
+            while wait > 0:
+                time.sleep(wait)
+                wait = self._try_acquire(model, rpm, tpm, tokens)
+
+    async def aacquire(self, model: str, rpm: int, tpm: int, tokens: int):
+        while True:
+            wait = await asyncio.to_thread(self._try_acquire, model, rpm, tpm, tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def reconcile(self, model: str, rpm: int, tpm: int, estimated: int, actual: int):
+        """Refunds (or charges) the difference between the estimated and reported token usage."""
+        def adjust(state, now):
+            state["tokens"] = min(float(tpm), state["tokens"] + estimated - actual)
+        self._update(model, rpm, tpm, adjust)
+
+    def _block(self, model: str, rpm: int, tpm: int, seconds: float):
+        def block(state, now):
+            state["blocked_until"] = max(state.get("blocked_until", 0.0), now + seconds)
+            state["requests"] = 0.0
+        self._update(model, rpm, tpm, block)
+
+    # --- Retry policy ---
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's retry-after."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        server_delay = retry_after(error)
+        if server_delay is not None:
+            delay = max(delay, server_delay + random.uniform(0, self.backoff_base))
+        return delay
+
+    def _after_response(self, model: str, rpm: int, tpm: int, tokens: int, response: Any):
+        usage = getattr(response, "usage", None)
+        total = getattr(usage, "total_tokens", None)
+        if isinstance(total, int):
+            self.reconcile(model, rpm, tpm, tokens, total)
+
+    def _on_error(self, model: str, rpm: int, tpm: int, attempt: int, error: Exception) -> float:
+        if not is_retryable(error) or attempt + 1 >= self.max_attempts:
+            raise error
+        delay = self._backoff(attempt, error)
+        if _status_code(error) == 429 or "RateLimit" in type(error).__name__:
+            self._block(model, rpm, tpm, delay)
+        logger.warning(f"{model} request failed ({error}); retry {attempt + 1}/{self.max_attempts - 1} in {delay:.1f}s")
+        event("llm_retry", "llm", model=model, attempt=attempt + 1, delay=round(delay, 3), error=type(error).__name__)
+        return delay
+
+    def run(self, model: str, rpm: int, tpm: int, tokens: int, call: Callable[[], Any]) -> Any:
+        """Runs call() once the model's budget allows it, retrying transient failures."""
+        for attempt in range(self.max_attempts):
+            self.acquire(model, rpm, tpm, tokens)
+            try:
+                response = call()
+            except Exception as e:
+                time.sleep(self._on_error(model, rpm, tpm, attempt, e))
+                continue
+            self._after_response(model, rpm, tpm, tokens, response)
+            return response
+        raise RateLimitExceeded(f"{model}: retries exhausted")
+
+    async def arun(self, model: str, rpm: int, tpm: int, tokens: int, call: Callable[[], Any]) -> Any:
+        """Async variant of run(); call() must return an awaitable."""
+        for attempt in range(self.max_attempts):
+            await self.aacquire(model, rpm, tpm, tokens)
+            try:
+                response = await call()
+            except Exception as e:
+                await asyncio.sleep(self._on_error(model, rpm, tpm, attempt, e))
+                continue
+            await asyncio.to_thread(self._after_response, model, rpm, tpm, tokens, response)
+            return response
+        raise RateLimitExceeded(f"{model}: retries exhausted")
+
+def estimate_tokens(prompt: str, system_prompt: str, max_tokens: Optional[int] = None) -> int:
+    """Rough budget reservation: ~4 characters per prompt token plus the completion allowance."""
+    completion = max_tokens or Config.LLM_COMPLETION_TOKEN_ESTIMATE
+    return (len(prompt) + len(system_prompt)) // 4 + completion
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> RequestScheduler:
+    """Returns the process-wide scheduler shared by every provider."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
@@ -1,9 +1,14 @@
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from typing import List, Dict, Any, Optional
 import json
 from pathlib import Path
+from .journal import Event, Journal
+from .tracing import event as trace_event
 from .utils import logger
 
+# Bump when the serialized layout of ProjectState changes
+STATE_SCHEMA_VERSION = 2
+
 @dataclass
 class IdentityProfile:
     name: str
@@ -23,13 +28,6 @@ class SceneNode:
     characters_present: List[str]
     status: str = "pending" # pending, scripted, visualized, filmed
 
-@dataclass
-class Event:
-    timestamp: str
-    agent: str
-    action: str
-    details: str
-
 @dataclass
 class ProjectState:
     """
@@ -46,20 +44,17 @@ class ProjectState:
     shot_history: List[Dict[str, Any]] = field(default_factory=list)
     unresolved_arcs: List[str] = field(default_factory=list)
     
-    # Metadata
-    history: List[Event] = field(default_factory=list)
+    # Metadata (bounded in-memory tail; the full log is journaled to disk once attached)
+    history: Journal = field(default_factory=Journal)
     
     def log_event(self, agent: str, action: str, details: str = ""):
-        from datetime import datetime
-        details_str = str(details)
-        event = Event(
-            timestamp=datetime.now().isoformat(),
-            agent=agent,
-            action=action,
-            details=details_str
-        )
-        self.history.append(event)
-        logger.info(f"[{agent}] {action}: {details_str[:50]}...")
+        self.history.append(agent, action, str(details))
+        trace_event(action, "state", agent=agent)
+        logger.info("[%s] %s: %.50s...", agent, action, details)
+
+    def events(self, agent: str = None, action: str = None, limit: int = None) -> List[Event]:
+        """Project events filtered by agent and/or action, served from the journal."""
+        return self.history.query(agent=agent, action=action, limit=limit)
 
     def get_identity(self, name: str) -> Optional[IdentityProfile]:
         return self.identities.get(name)
@@ -68,12 +63,43 @@ class ProjectState:
         self.identities[profile.name] = profile
         self.log_event("IdentityManager", "registered_identity", profile.name)
 
-    def save(self, path: Path):
-        # Simple serialization
-        data = {
+    def to_dict(self) -> Dict[str, Any]:
+        """Full, versioned serialization of the project."""
+        return {
+            "schema_version": STATE_SCHEMA_VERSION,
             "title": self.title,
-            "identities": {k: v.__dict__ for k, v in self.identities.items()},
-            # ... complete serialization would go here
+            "logline": self.logline,
+            "genre": self.genre,
+            # Shallow copies first: other pipeline threads may be appending concurrently
+            "identities": {k: asdict(v) for k, v in dict(self.identities).items()},
+            "scene_graph": [asdict(node) for node in list(self.scene_graph)],
+            "shot_history": list(self.shot_history),
+            "unresolved_arcs": list(self.unresolved_arcs),
+            "history": self.history.to_list(),
+            "journal": str(self.history.path) if self.history.path else None,
         }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProjectState":
+        version = data.get("schema_version", 0)
+        if version > STATE_SCHEMA_VERSION:
+            raise ValueError(f"ProjectState schema v{version} is newer than supported v{STATE_SCHEMA_VERSION}.")
+        return cls(
+            title=data.get("title", "Untitled"),
+            logline=data.get("logline", ""),
+            genre=data.get("genre", "Unknown"),
+            identities={k: IdentityProfile(**v) for k, v in data.get("identities", {}).items()},
+            scene_graph=[SceneNode(**node) for node in data.get("scene_graph", [])],
+            shot_history=list(data.get("shot_history", [])),
+            unresolved_arcs=list(data.get("unresolved_arcs", [])),
+            history=Journal(Event(**event) for event in data.get("history", [])),
+        )
+
+    def save(self, path: Path):
         with open(path, "w") as f:
-            json.dump(data, f, indent=2)
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: Path) -> "ProjectState":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
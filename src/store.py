@@ -0,0 +1,272 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import Config
+from .state import IdentityProfile, ProjectState, SceneNode
+from .utils import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id  TEXT PRIMARY KEY,
+    concept     TEXT NOT NULL DEFAULT '',
+    title       TEXT NOT NULL DEFAULT '',
+    logline     TEXT NOT NULL DEFAULT '',
+    genre       TEXT NOT NULL DEFAULT '',
+    status      TEXT NOT NULL DEFAULT 'active',
+    arcs        TEXT NOT NULL DEFAULT '[]',
+    created     REAL NOT NULL,
+    updated     REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS identities (
+    project_id  TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    data        TEXT NOT NULL,
+    PRIMARY KEY (project_id, name)
+);
+CREATE TABLE IF NOT EXISTS scenes (
+    project_id  TEXT NOT NULL,
+    scene_id    TEXT NOT NULL,
+    position    INTEGER NOT NULL,
+    status      TEXT NOT NULL,
+    data        TEXT NOT NULL,
+    updated     REAL NOT NULL,
+    PRIMARY KEY (project_id, scene_id)
+);
+CREATE TABLE IF NOT EXISTS shots (
+    project_id  TEXT NOT NULL,
+    shot_id     TEXT NOT NULL,
+    scene_id    TEXT NOT NULL DEFAULT '',
+    status      TEXT NOT NULL,
+    anchor_frame TEXT,
+    video_clip  TEXT,
+    data        TEXT NOT NULL DEFAULT '{}',
+    updated     REAL NOT NULL,
+    PRIMARY KEY (project_id, shot_id)
+);
+CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status, updated);
+CREATE INDEX IF NOT EXISTS idx_scenes_status ON scenes (project_id, status);
+CREATE INDEX IF NOT EXISTS idx_shots_status ON shots (project_id, status);
+CREATE INDEX IF NOT EXISTS idx_shots_scene ON shots (project_id, scene_id, status);
+"""
+
+SHOT_UPSERT = """
+INSERT INTO shots (project_id, shot_id, scene_id, status, anchor_frame, video_clip, data, updated)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (project_id, shot_id) DO UPDATE SET
+    scene_id = excluded.scene_id, status = excluded.status, anchor_frame = excluded.anchor_frame,
+    video_clip = excluded.video_clip, data = excluded.data, updated = excluded.updated
+"""
+
+def scene_of(shot_id: str) -> str:
+    """Feature-mode shot ids are '<scene_id>/<shot_id>'; single-scene runs have no scene."""
+    return shot_id.rsplit("/", 1)[0] if "/" in shot_id else ""
+
+class StateStore:
+    """
+    SQLite (WAL) store for ProjectState, queryable per project, scene and shot
+    without loading whole project blobs.
+
+    One writer lock serializes this process's writes; shot updates are buffered
+    and committed in batches (one transaction per batch), and a background timer
+    commits a partial batch once it is flush_interval old. WAL mode lets any
+    number of readers, in this or other processes, query progress while a
+    producer is writing. Connections are per thread.
+    """
+
+    def __init__(self, path: Path = None, batch_size: int = None, flush_interval: float = None):
+        self.path = Path(path or Config.STATE_DB_PATH)
+        self.batch_size = Config.STATE_DB_BATCH_SIZE if batch_size is None else batch_size
+        self.flush_interval = Config.STATE_DB_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._pending: List[Tuple] = []
+        self._pending_since = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._write_lock, self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=OFF")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        with self._write_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        self.flush()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- Writes ---
+
+    def save_state(self, project_id: str, state: ProjectState, concept: str = None, status: str = None):
+        """Upserts the project row, identities and scene graph (plus buffered shots) in one transaction."""
+        now = time.time()
+        identities = [(project_id, name, json.dumps(asdict(profile))) for name, profile in dict(state.identities).items()]
+        scenes = [
+            (project_id, node.scene_id, position, node.status, json.dumps(asdict(node)), now)
+            for position, node in enumerate(list(state.scene_graph))
+        ]
+        with self._write_lock, self._connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO projects (project_id, concept, title, logline, genre, status, arcs, created, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (project_id) DO UPDATE SET
+                    concept = COALESCE(NULLIF(?, ''), concept), title = excluded.title, logline = excluded.logline,
+                    genre = excluded.genre, status = COALESCE(?, status), arcs = excluded.arcs, updated = excluded.updated
+                """,
+                (project_id, concept or "", state.title, state.logline, state.genre, status or "active",
+                 json.dumps(list(state.unresolved_arcs)), now, now, concept or "", status),
+            )
+            conn.executemany(
+                "INSERT INTO identities (project_id, name, data) VALUES (?, ?, ?) "
+                "ON CONFLICT (project_id, name) DO UPDATE SET data = excluded.data",
+                identities,
+            )
+            # The scene graph is replaced wholesale (an outline can be regenerated)
+            conn.execute("DELETE FROM scenes WHERE project_id = ?", (project_id,))
+            conn.executemany("INSERT INTO scenes VALUES (?, ?, ?, ?, ?, ?)", scenes)
+            self._flush_locked(conn)
+
+    def set_project_status(self, project_id: str, status: str):
+        with self._write_lock, self._connection() as conn:
+            conn.execute("UPDATE projects SET status = ?, updated = ? WHERE project_id = ?", (status, time.time(), project_id))
+            self._flush_locked(conn)
+
+    def record_shot(self, project_id: str, shot_id: str, status: str, result: Dict[str, Any] = None):
+        """Buffers a shot status update; committed once the batch fills or ages past the flush interval."""
+        result = result or {}
+        row = (project_id, str(shot_id), scene_of(str(shot_id)), status, result.get("anchor_frame"),
+               result.get("video_clip"), json.dumps(result.get("shot_metadata", {}), default=str), time.time())
+        with self._write_lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.append(row)
+            due = len(self._pending) >= self.batch_size or time.monotonic() - self._pending_since >= self.flush_interval
+            if due:
+                with self._connection() as conn:
+                    self._flush_locked(conn)
+            elif self._flush_timer is None:
+                # Without it the last partial batch would wait for the next write
+                self._flush_timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        with self._write_lock:
+            if self._pending:
+                with self._connection() as conn:
+                    self._flush_locked(conn)
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"State store flush failed: {e}")
+        finally:
+            conn = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.close()
+                self._local.conn = None
+
+    def _flush_locked(self, conn: sqlite3.Connection):
+        if self._flush_timer is not None and self._flush_timer is not threading.current_thread():
+            self._flush_timer.cancel()
+        self._flush_timer = None
+        if self._pending:
+            conn.executemany(SHOT_UPSERT, self._pending)
+            self._pending = []
+
+    # --- Reads ---
+
+    def projects(self, status: str = None) -> List[Dict[str, Any]]:
+        query = "SELECT project_id, concept, title, status, created, updated FROM projects"
+        rows = self._connection().execute(query + (" WHERE status = ?" if status else "") + " ORDER BY updated DESC",
+                                          (status,) if status else ()).fetchall()
+        return [dict(row) for row in rows]
+
+    def progress(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Project row plus scene and shot counts per status, straight from the indexes."""
+        conn = self._connection()
+        project = conn.execute("SELECT project_id, concept, title, status, updated FROM projects WHERE project_id = ?",
+                               (project_id,)).fetchone()
+        if project is None:
+            return None
+        scenes = conn.execute("SELECT status, COUNT(*) FROM scenes WHERE project_id = ? GROUP BY status", (project_id,)).fetchall()
+        shots = conn.execute("SELECT status, COUNT(*) FROM shots WHERE project_id = ? GROUP BY status", (project_id,)).fetchall()
+        return {**dict(project), "scenes": dict(scenes), "shots": dict(shots)}
+
+    def scenes(self, project_id: str, status: str = None) -> List[Dict[str, Any]]:
+        query = "SELECT data, status FROM scenes WHERE project_id = ?"
+        params: Tuple = (project_id,)
+        if status:
+            query, params = query + " AND status = ?", params + (status,)
+        rows = self._connection().execute(query + " ORDER BY position", params).fetchall()
+        return [{**json.loads(row["data"]), "status": row["status"]} for row in rows]
+
+    def shots(self, project_id: str, status: str = None, scene_id: str = None) -> List[Dict[str, Any]]:
+        query = "SELECT shot_id, scene_id, status, anchor_frame, video_clip, updated FROM shots WHERE project_id = ?"
+        params: Tuple = (project_id,)
+        if scene_id is not None:
+            query, params = query + " AND scene_id = ?", params + (scene_id,)
+        if status:
+            query, params = query + " AND status = ?", params + (status,)
+        return [dict(row) for row in self._connection().execute(query + " ORDER BY updated", params).fetchall()]
+
+    def load_state(self, project_id: str) -> Optional[ProjectState]:
+        """Rebuilds a ProjectState (without event history; that lives in the journal)."""
+        conn = self._connection()
+        project = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        if project is None:
+            return None
+        identities = conn.execute("SELECT name, data FROM identities WHERE project_id = ?", (project_id,)).fetchall()
+        shots = conn.execute("SELECT data, anchor_frame, video_clip, status FROM shots WHERE project_id = ? ORDER BY updated",
+                             (project_id,)).fetchall()
+        return ProjectState(
+            title=project["title"],
+            logline=project["logline"],
+            genre=project["genre"],
+            identities={row["name"]: IdentityProfile(**json.loads(row["data"])) for row in identities},
+            scene_graph=[SceneNode(**scene) for scene in self.scenes(project_id)],
+            shot_history=[
+                {"shot_metadata": json.loads(row["data"]), "anchor_frame": row["anchor_frame"],
+                 "video_clip": row["video_clip"], "status": row["status"]}
+                for row in shots
+            ],
+            unresolved_arcs=json.loads(project["arcs"]),
+        )
+
+_store: Optional[StateStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> Optional[StateStore]:
+    """The process-wide StateStore, or None when AIFLIX_STATE_DB=0."""
+    global _store
+    if not Config.STATE_DB_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = StateStore()
+            except Exception as e:
+                logger.error(f"State store unavailable ({Config.STATE_DB_PATH}): {e}")
+                Config.STATE_DB_ENABLED = False
+                return None
+        return _store
@@ -0,0 +1,256 @@
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import Config
+
+# Innermost open span on the current thread / task, for parent links
+_current_span: ContextVar[Optional["Span"]] = ContextVar("aiflix_current_span", default=None)
+
+class Span:
+    """One timed operation. Times are perf_counter seconds; export converts them to microseconds."""
+
+    __slots__ = ("name", "cat", "span_id", "parent_id", "start", "end", "tid", "thread", "args")
+
+    def __init__(self, name: str, cat: str, span_id: int, parent_id: Optional[int], args: Dict[str, Any]):
+        self.name = name
+        self.cat = cat
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.tid = threading.get_ident()
+        self.thread = threading.current_thread().name
+        self.args = args
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+class _SpanContext:
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any], activate: bool = True):
+        self._tracer = tracer
+        self._name = name
+        self._cat = cat
+        self._args = args
+        self._activate = activate
+        self._token = None
+        self.span: Optional[Span] = None
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        self.span = Span(self._name, self._cat, next(self._tracer._ids), parent.span_id if parent else None, self._args)
+        if self._activate:
+            self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter()
+        if exc_type is not None:
+            self.span.args["error"] = exc_type.__name__
+        if self._token is not None:
+            _current_span.reset(self._token)
+        self._tracer._record(self.span)
+        return False
+
+class _NullSpanContext:
+    """Returned while tracing is off, so instrumented code costs one attribute check."""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpanContext()
+
+class Tracer:
+    """
+    Collects spans (timed, nested operations) and instant events (cache hits,
+    retries, hedges) from every thread, and exports them as Chrome trace JSON
+    (chrome://tracing, Perfetto) or as a flat per-phase latency summary.
+    """
+
+    def __init__(self):
+        self.enabled = Config.TRACE_ENABLED
+        self.trace_id = uuid.uuid4().hex
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self.events: List[Dict[str, Any]] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def reset(self):
+        with self._lock:
+            self.trace_id = uuid.uuid4().hex
+            self.origin = time.perf_counter()
+            self.spans = []
+            self.events = []
+
+    def span(self, name: str, cat: str = "", **attrs):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _SpanContext(self, name, cat, attrs)
+
+    def event(self, name: str, cat: str = "", **attrs):
+        """Records a zero-duration marker (e.g. a cache hit) inside the current span."""
+        if not self.enabled:
+            return
+        parent = _current_span.get()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ts": time.perf_counter(),
+            "tid": threading.get_ident(),
+            "parent_id": parent.span_id if parent else None,
+            "args": attrs,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def _record(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def _us(self, seconds: float) -> float:
+        return round((seconds - self.origin) * 1e6, 1)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+            events = list(self.events)
+        pid = os.getpid()
+        trace_events = []
+        threads = {}
+        for span in spans:
+            threads[span.tid] = span.thread
+            trace_events.append({
+                "name": span.name,
+                "cat": span.cat,
+                "ph": "X",
+                "ts": self._us(span.start),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": pid,
+                "tid": span.tid,
+                "args": {**span.args, "span_id": span.span_id, "parent_id": span.parent_id},
+            })
+        for event in events:
+            trace_events.append({
+                "name": event["name"],
+                "cat": event["cat"],
+                "ph": "i",
+                "s": "t",
+                "ts": self._us(event["ts"]),
+                "pid": pid,
+                "tid": event["tid"],
+                "args": {**event["args"], "parent_id": event["parent_id"]},
+            })
+        for tid, thread_name in threads.items():
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms", "otherData": {"trace_id": self.trace_id}}
+
+    def export_chrome(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Latency per (category, span name), slowest total first."""
+        with self._lock:
+            spans = list(self.spans)
+            events = list(self.events)
+        groups: Dict[tuple, List[float]] = {}
+        for span in spans:
+            groups.setdefault((span.cat, span.name), []).append(span.duration)
+        marker_counts: Dict[str, int] = {}
+        for event in events:
+            marker_counts[event["name"]] = marker_counts.get(event["name"], 0) + 1
+
+        rows = []
+        for (cat, name), durations in groups.items():
+            durations.sort()
+            rows.append({
+                "cat": cat,
+                "name": name,
+                "count": len(durations),
+                "total": sum(durations),
+                "mean": sum(durations) / len(durations),
+                "p50": durations[len(durations) // 2],
+                "p95": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                "max": durations[-1],
+            })
+        rows.sort(key=lambda r: r["total"], reverse=True)
+        if marker_counts:
+            rows.append({"cat": "events", "name": "counts", "events": marker_counts})
+        return rows
+
+    def format_summary(self) -> str:
+        lines = [f"{'category':<10} {'span':<40} {'count':>6} {'total':>9} {'mean':>8} {'p95':>8} {'max':>8}"]
+        for row in self.summary():
+            if row["cat"] == "events":
+                lines.append("events: " + ", ".join(f"{k}={v}" for k, v in sorted(row["events"].items())))
+                continue
+            lines.append(
+                f"{row['cat']:<10} {row['name'][:40]:<40} {row['count']:>6} {row['total']:>8.2f}s "
+                f"{row['mean']:>7.2f}s {row['p95']:>7.2f}s {row['max']:>7.2f}s"
+            )
+        return "\n".join(lines)
+
+_tracer = Tracer()
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def span(name: str, cat: str = "", **attrs):
+    """`with span("image_gen", "media", shot_id=3): ...` — a no-op unless tracing is enabled."""
+    return _tracer.span(name, cat, **attrs)
+
+def event(name: str, cat: str = "", **attrs):
+    _tracer.event(name, cat, **attrs)
+
+def traced(name: str = None, cat: str = "") -> Callable:
+    """Decorator: wraps each call (sync, async or generator) of the function in a span."""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not _tracer.enabled:
+                    return await fn(*args, **kwargs)
+                with _tracer.span(span_name, cat):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if not _tracer.enabled:
+                    return (yield from fn(*args, **kwargs))
+                # Spans the whole iteration, but is never made current: between items the
+                # generator is suspended and its consumer's own spans must not nest under it
+                with _SpanContext(_tracer, span_name, cat, {}, activate=False):
+                    return (yield from fn(*args, **kwargs))
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return fn(*args, **kwargs)
+            with _tracer.span(span_name, cat):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
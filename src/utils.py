@@ -1,6 +1,13 @@
+import json
 import logging
+import re
 import sys
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Standard library decoder
+    orjson = None
 
 def setup_logging(name: str = "AiFlix", level: int = logging.INFO) -> logging.Logger:
     """Configures and returns a logger instance."""
@@ -17,28 +24,201 @@ def setup_logging(name: str = "AiFlix", level: int = logging.INFO) -> logging.Lo
 
 logger = setup_logging()
 
+# One JSON string literal (unrolled loop: no per-character alternation)
+_JSON_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+# Characters that can change object nesting outside of strings
+_JSON_STRUCTURAL = re.compile(r'[{}"]')
+_raw_decoder = json.JSONDecoder()
+
+class JSONExtractionError(ValueError):
+    """An LLM response held no decodable JSON object. `position` is the character offset of the failure."""
+
+    def __init__(self, message: str, position: int = -1):
+        super().__init__(message)
+        self.position = position
+
+def json_loads(text: str) -> Any:
+    """json.loads, backed by orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def _object_end(text: str, start: int) -> int:
+    """End of the brace group opening at `start`, skipping braces inside strings; -1 if it never closes."""
+    depth = 0
+    pos = start
+    while True:
+        match = _JSON_STRUCTURAL.search(text, pos)
+        if match is None:
+            return -1
+        i = match.start()
+        if text[i] == '"':
+            string = _JSON_STRING.match(text, i)
+            if string is None:
+                return -1
+            pos = string.end()
+            continue
+        depth += 1 if text[i] == '{' else -1
+        if depth == 0:
+            return i + 1
+        pos = i + 1
+
+def extract_json_objects(text: str, limit: int = None) -> List[Dict[str, Any]]:
+    """
+    Every top-level JSON object in an LLM response, in order. Prose, markdown
+    fences and brace groups that are not JSON are skipped.
+
+    A response holding a single object (the common case, fenced or not) costs
+    one decode of the text between its outermost braces. Otherwise each
+    candidate '{' is decoded in place, which also finds where it ends, so
+    well-formed text is read once. A candidate that fails is skipped as a
+    whole; one that never closes (a truncated response) ends the scan rather
+    than returning its nested objects. Raises JSONExtractionError, with the
+    position of the first failure, if nothing decodes.
+    """
+    first = text.find("{")
+    last = text.rfind("}")
+    if first == -1:
+        raise JSONExtractionError("No JSON object found in response", -1)
+    if last > first:
+        try:
+            value = json_loads(text[first:last + 1])
+            if isinstance(value, dict):
+                return [value]
+        except ValueError:
+            pass
+
+    objects = []
+    error: Optional[JSONExtractionError] = None
+    start = first
+    while start != -1:
+        try:
+            value, end = _raw_decoder.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            error = error or JSONExtractionError(f"{e.msg} at char {e.pos}", e.pos)
+            end = _object_end(text, start)
+            if end == -1:
+                break  # Never closes: the rest of the text belongs to this broken object
+            start = text.find("{", end)
+            continue
+        if isinstance(value, dict):
+            objects.append(value)
+            if limit and len(objects) >= limit:
+                break
+        start = text.find("{", end)
+    if not objects:
+        raise error or JSONExtractionError("No JSON object found in response", -1)
+    return objects
+
+def extract_json(text: str) -> Dict[str, Any]:
+    """The first decodable JSON object in an LLM response; raises JSONExtractionError."""
+    return extract_json_objects(text, limit=1)[0]
+
 def safe_json_parse(response: str) -> Dict[str, Any]:
-    """Helper to safely parse JSON from LLM responses (handling potential markdown code blocks)."""
-    import json
-    import re
-    
-    # Strip markdown code blocks if present
-    cleaned = re.sub(r"```json\s*", "", response)
-    cleaned = re.sub(r"```", "", cleaned)
-    
-    # regex to find the outer-most JSON object
-    # This is a simple heuristic: find first { and last }
-    start = cleaned.find('{')
-    end = cleaned.rfind('}')
-    
-    if start != -1 and end != -1:
-        cleaned = cleaned[start:end+1]
-    
-    cleaned = cleaned.strip()
-    
+    """Helper to safely parse JSON from LLM responses (prose, markdown code blocks, several objects)."""
     try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError as e:
+        return extract_json(response)
+    except JSONExtractionError as e:
         logger.error(f"Failed to parse JSON: {e}")
-        # logger.debug(f"Offending content: {cleaned}")
         return {}
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object as it streams in from an LLM and emits every element of
+    the selected top-level arrays (e.g. "shots", "scene_beats") as soon as it closes.
+    Text before the first '{' (prose, markdown fences) is ignored.
+    Only the unconsumed tail (at most the element being parsed) is kept as one
+    string; the full response is kept as a list of chunks, joined on demand.
+    """
+
+    def __init__(self, keys=("shots", "scene_beats")):
+        self.keys = set(keys)
+        self._chunks: List[str] = []
+        self._buffer = ""  # Response text from absolute offset _base on
+        self._base = 0
+        self._pos = 0
+        self._started = False
+        self._stack = []          # [(opening char, key the container is stored under)]
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string = None  # Most recent string literal, a candidate object key
+        self._pending_key = None
+        self._element_start = -1
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consumes a text fragment and returns any (key, element) pairs completed by it."""
+        self._chunks.append(chunk)
+        # Drop text already scanned, except an open string or element that is still needed
+        keep = self._pos
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        if self._element_start != -1:
+            keep = min(keep, self._element_start)
+        text = self._buffer[keep - self._base:] + chunk
+        self._buffer, self._base = text, keep
+        base = keep
+        completed = []
+
+        while self._pos < base + len(text):
+            i = self._pos
+            ch = text[i - base]
+            self._pos += 1
+
+            if not self._started:
+                if ch == '{':
+                    self._started = True
+                    self._stack.append(('{', None))
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start - base:i - base]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif ch == ':':
+                self._pending_key = self._last_string
+            elif ch in '{[':
+                key = self._pending_key if self._stack and self._stack[-1][0] == '{' else None
+                if self._in_target_array():
+                    self._element_start = i
+                self._stack.append((ch, key))
+                self._pending_key = None
+            elif ch in '}]':
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if self._in_target_array() and self._element_start != -1:
+                    key = self._stack[-1][1]
+                    raw = text[self._element_start - base:i + 1 - base]
+                    self._element_start = -1
+                    try:
+                        completed.append((key, json.loads(raw)))
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping malformed streamed '{key}' element: {e}")
+            elif ch == ',':
+                self._pending_key = None
+
+        return completed
+
+    def _in_target_array(self) -> bool:
+        # Root object at depth 1, the target array at depth 2.
+        return len(self._stack) == 2 and self._stack[-1][0] == '[' and self._stack[-1][1] in self.keys
+
+    @property
+    def text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def result(self) -> Dict[str, Any]:
+        """Parses the full accumulated response once the stream has finished."""
+        return safe_json_parse(self.text)
@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import Config
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Points every runtime path at tmp_path and turns off background state, sleeps and caches."""
+    overrides = {
+        "OUTPUT_DIR": tmp_path / "output",
+        "CHECKPOINT_DIR": tmp_path / "output" / "checkpoints",
+        "STATE_DB_ENABLED": False,
+        "STATE_DB_PATH": tmp_path / "output" / "aiflix.db",
+        "LLM_CACHE_ENABLED": False,
+        "LLM_CACHE_DIR": tmp_path / "llm_cache",
+        "LLM_RATE_LIMIT_DIR": tmp_path / "ratelimits",
+        "RAG_CACHE_DIR": tmp_path / "rag_cache",
+        "RAG_WARMUP": False,
+        "SHOT_RETRY_DELAY": 0,
+        "MOCK_LLM_LATENCY": 0,
+        "MOCK_IMAGE_LATENCY": 0,
+        "MOCK_VIDEO_LATENCY": 0,
+    }
+    for name, value in overrides.items():
+        monkeypatch.setattr(Config, name, value)
+    return tmp_path
@@ -0,0 +1,80 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from src.rag.bm25 import TAG_WEIGHT, TITLE_WEIGHT, BM25Index, tokenize
+from src.rag.data import SEED_KNOWLEDGE, KnowledgeItem
+
+CATEGORIES = ["Cinematography", "Screenwriting", "General"]
+
+def corpus(docs: int = 300, seed: int = 7):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(400)]
+    return [
+        KnowledgeItem(
+            category=rng.choice(CATEGORIES),
+            title=" ".join(rng.choices(vocab, k=3)),
+            author="test",
+            content=" ".join(rng.choices(vocab, k=rng.randint(20, 120))),
+            tags=rng.choices(vocab, k=2),
+        )
+        for _ in range(docs)
+    ]
+
+def reference_search(items, query, category=None, top_k=3, k1=1.2, b=0.75):
+    """Textbook BM25, document by document, with the index's field weights."""
+    freqs = []
+    for item in items:
+        tf = Counter(tokenize(item.content))
+        for token in tokenize(item.title):
+            tf[token] += TITLE_WEIGHT
+        for token in tokenize(" ".join(item.tags)):
+            tf[token] += TAG_WEIGHT
+        freqs.append(tf)
+    avg_length = sum(sum(tf.values()) for tf in freqs) / len(items)
+    terms = set(tokenize(query))
+    scored = []
+    for item, tf in zip(items, freqs):
+        if category is not None and item.category != category:
+            continue
+        norm = k1 * (1 - b + b * sum(tf.values()) / avg_length)
+        score = 0.0
+        for term in terms:
+            if tf[term]:
+                df = sum(1 for other in freqs if other[term])
+                idf = math.log1p((len(items) - df + 0.5) / (df + 0.5))
+                score += idf * tf[term] * (k1 + 1) / (tf[term] + norm)
+        if score > 0:
+            scored.append((score, item))
+    scored.sort(key=lambda pair: -pair[0])
+    return scored[:top_k]
+
+def assert_same_ranking(actual, expected):
+    assert [score for score, _ in actual] == pytest.approx([score for score, _ in expected], rel=1e-4)
+    assert [item.title for _, item in actual] == [item.title for _, item in expected]
+
+QUERIES = ["term1 term2 term3", "term42", "term7 term7 term300 unknown", "nothing matches here"]
+
+@pytest.mark.parametrize("category", [None, "Cinematography", "General"])
+@pytest.mark.parametrize("query", QUERIES)
+def test_ranking_matches_reference_bm25(query, category):
+    items = corpus()
+    index = BM25Index.build(items)
+    assert_same_ranking(index.search(query, category=category, top_k=5),
+                        reference_search(items, query, category=category, top_k=5))
+
+def test_search_many_matches_search():
+    index = BM25Index.build(corpus())
+    for category in (None, "Screenwriting", "Missing"):
+        batched = index.search_many(QUERIES, category=category, top_k=4)
+        for query, results in zip(QUERIES, batched):
+            assert_same_ranking(results, index.search(query, category=category, top_k=4))
+
+def test_saved_index_ranks_the_same(tmp_path):
+    index = BM25Index.build(SEED_KNOWLEDGE)
+    index.save(tmp_path / "index.npz")
+    loaded = BM25Index.load(tmp_path / "index.npz")
+    for query in ("lighting camera angle cinematic", "hero journey", "three act structure"):
+        assert_same_ranking(loaded.search(query, top_k=3), index.search(query, top_k=3))
@@ -0,0 +1,97 @@
+import sys
+import types
+
+import pytest
+
+from src import cassette
+from src.agents.orchestrator import Orchestrator
+from src.config import Config
+from src.llm import MockLLM
+from src.media.engine import VisualEngine
+from src.media.image_gen import ImageGenerator
+
+CONCEPT = "A lighthouse keeper finds a map in a bottle"
+
+class FakeResponse:
+    status_code = 200
+    headers = {"content-type": "application/octet-stream"}
+
+    def __init__(self, url: str):
+        self.content = f"bytes of {url}".encode()
+
+def install_media_apis(monkeypatch, calls):
+    """Fake replicate and requests modules that answer like the real APIs."""
+    replicate = types.ModuleType("replicate")
+
+    def run(model, input):
+        calls.append(model)
+        return ["https://media.test/anchor.png"] if "flux" in model else "https://media.test/clip.mp4"
+
+    replicate.run = run
+    requests = types.ModuleType("requests")
+    requests.get = lambda url, **kwargs: FakeResponse(url)
+    monkeypatch.setitem(sys.modules, "replicate", replicate)
+    monkeypatch.setitem(sys.modules, "requests", requests)
+
+def remove_media_apis(monkeypatch):
+    """Replacements that fail the test if replay reaches the network."""
+    def offline(*args, **kwargs):
+        raise AssertionError("replay made a network call")
+
+    for name, attrs in (("replicate", ("run",)), ("requests", ("get", "post"))):
+        module = types.ModuleType(name)
+        for attr in attrs:
+            setattr(module, attr, offline)
+        monkeypatch.setitem(sys.modules, name, module)
+
+@pytest.fixture(autouse=True)
+def no_cassette():
+    yield
+    cassette.close_cassette()
+
+def produce(max_shots: int = 2):
+    orchestrator = Orchestrator(llm_provider=MockLLM(latency=0), visual_engine=VisualEngine())
+    return orchestrator.run_pipeline(CONCEPT, max_shots=max_shots)
+
+def test_replay_produces_shots_without_api_keys(workspace, monkeypatch):
+    tape = workspace / "project.cassette"
+    calls = []
+
+    install_media_apis(monkeypatch, calls)
+    monkeypatch.setattr(Config, "REPLICATE_API_TOKEN", "r8-test")
+    monkeypatch.setattr(Config, "HF_TOKEN", None)
+    cassette.use_cassette(tape, "record")
+    recorded = produce()
+    cassette.close_cassette()
+    assert len(recorded["produced_content"]) == 2
+    assert calls
+
+    # No keys for the recorded backend, and a key that would pick a different one
+    remove_media_apis(monkeypatch)
+    monkeypatch.setattr(Config, "REPLICATE_API_TOKEN", None)
+    monkeypatch.setattr(Config, "HF_TOKEN", "hf-test")
+    monkeypatch.setattr(Config, "OUTPUT_DIR", workspace / "replay")
+    monkeypatch.setattr(Config, "CHECKPOINT_DIR", workspace / "replay" / "checkpoints")
+    cassette.use_cassette(tape, "replay")
+    replayed = produce()
+
+    shots = replayed["produced_content"]
+    assert [r["status"] for r in shots] == ["success", "success"]
+    for result in shots:
+        assert str(workspace / "replay") in result["video_clip"]
+        with open(result["video_clip"], "rb") as f:
+            assert f.read() == b"bytes of https://media.test/clip.mp4"
+    assert cassette.get_cassette().misses == 0
+
+def test_replay_restores_recorded_backend(workspace, monkeypatch):
+    tape = workspace / "engine.cassette"
+    monkeypatch.setattr(Config, "REPLICATE_API_TOKEN", "r8-test")
+    monkeypatch.setattr(Config, "HF_TOKEN", None)
+    cassette.use_cassette(tape, "record")
+    assert isinstance(VisualEngine().image_gen, ImageGenerator)
+    cassette.close_cassette()
+
+    monkeypatch.setattr(Config, "REPLICATE_API_TOKEN", None)
+    monkeypatch.setattr(Config, "HF_TOKEN", "hf-test")
+    cassette.use_cassette(tape, "replay")
+    assert isinstance(VisualEngine().image_gen, ImageGenerator)
@@ -0,0 +1,64 @@
+import json
+
+from src.agents.orchestrator import Orchestrator
+from src.checkpoint import CheckpointStore
+from src.config import Config
+from src.llm import MockLLM
+from src.media.engine import VisualEngine
+from src.state import ProjectState
+
+CONCEPT = "Two rival chefs share a food truck"
+
+def failing_shot(engine: VisualEngine, shot_file: str):
+    """Makes the video stage fail for one shot, like a backend outage mid-run."""
+    generate = engine.video_gen.generate
+
+    def video(image_path, prompt, output_path):
+        if output_path.name.startswith(shot_file):
+            return None
+        return generate(image_path, prompt, output_path)
+
+    engine.video_gen.generate = video
+
+def test_resume_skips_finished_phases_and_shots(workspace, monkeypatch):
+    monkeypatch.setattr(Config, "SHOT_RETRIES", 0)
+    first_llm = MockLLM(latency=0, shot_count=3)
+    first_engine = VisualEngine(provider="mock")
+    failing_shot(first_engine, "shot_2_")
+    first = Orchestrator(llm_provider=first_llm, visual_engine=first_engine).run_pipeline(CONCEPT)
+    assert len(first["produced_content"]) == 2
+
+    llm = MockLLM(latency=0, shot_count=3)
+    engine = VisualEngine(provider="mock")
+    resumed = Orchestrator(llm_provider=llm, visual_engine=engine).run_pipeline(resume=first["project_id"])
+
+    assert llm.calls == 0  # Identity, screenplay and shot planning all restored
+    assert engine.image_gen.calls == 0  # Shot 2's anchor is reused from the render manifest
+    assert engine.video_gen.calls == 1  # Only the failed clip is rendered again
+    assert [r["shot_metadata"]["shot_id"] for r in resumed["produced_content"]] == [1, 2, 3]
+
+def test_shot_log_survives_a_torn_line(workspace):
+    checkpoint = CheckpointStore("torn")
+    checkpoint.start("concept", ProjectState(title="t", logline="l", genre="g"))
+    for shot_id in ("1", "2"):
+        checkpoint.record_shot(shot_id, {"video_clip": __file__, "anchor_frame": __file__})
+    checkpoint.mark("screenplay", {"title": "t"})
+    with open(checkpoint.shots_path, "a") as f:
+        f.write('["3", {"video_cl')  # Crashed mid-write
+
+    restored = CheckpointStore.load("torn")
+    assert restored.completed("screenplay")
+    assert restored.produced_shot("1") and restored.produced_shot("2")
+    assert restored.produced_shot("3") is None
+    assert "shots" not in json.loads(checkpoint.path.read_text())
+
+def test_v1_checkpoint_shots_are_migrated(workspace):
+    Config.CHECKPOINT_DIR.mkdir(parents=True)
+    legacy = {"version": 1, "project_id": "old", "concept": "c", "phases": {"identity": []},
+              "shots": {"1": {"video_clip": __file__, "anchor_frame": __file__}}, "state": None}
+    (Config.CHECKPOINT_DIR / "old.json").write_text(json.dumps(legacy))
+
+    CheckpointStore.load("old").mark("retrieval", {})
+    restored = CheckpointStore.load("old")
+    assert restored.produced_shot("1")
+    assert restored.phases() == ["identity", "retrieval"]
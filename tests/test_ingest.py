@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from ingest_books import CHUNK_OVERLAP, CHUNK_SIZE, MIN_CHUNK, iter_chunks
+
+def legacy_chunks(pages, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """The chunker iter_chunks replaced: slices of the whole concatenated text."""
+    text = "".join(pages)
+    chunks = []
+    for i in range(0, len(text), chunk_size - overlap):
+        chunk = text[i:i + chunk_size]
+        if len(chunk) < MIN_CHUNK:
+            continue
+        chunks.append((i, chunk))
+    return chunks
+
+def random_pages(seed: int):
+    rng = random.Random(seed)
+    # Empty pages, pages shorter than one step and pages spanning several windows
+    return [
+        "".join(rng.choices("abcdefgh \n", k=rng.choice([0, 1, 37, 799, 800, 1000, 1001, 2500, 4000])))
+        + "\n"
+        for _ in range(rng.randint(0, 12))
+    ]
+
+@pytest.mark.parametrize("seed", range(40))
+def test_iter_chunks_matches_legacy_chunker(seed):
+    pages = random_pages(seed)
+    assert list(iter_chunks(pages)) == legacy_chunks(pages)
+
+@pytest.mark.parametrize("chunk_size,overlap", [(10, 3), (50, 0), (64, 63)])
+def test_iter_chunks_matches_legacy_with_other_windows(chunk_size, overlap):
+    pages = random_pages(1) + random_pages(2)
+    assert list(iter_chunks(pages, chunk_size, overlap)) == legacy_chunks(pages, chunk_size, overlap)
+
+def test_iter_chunks_edge_cases():
+    assert list(iter_chunks([])) == []
+    assert list(iter_chunks(["x" * (MIN_CHUNK - 1)])) == []
+    assert list(iter_chunks(["x" * MIN_CHUNK])) == [(0, "x" * MIN_CHUNK)]
@@ -0,0 +1,67 @@
+import json
+import os
+import time
+
+from src.llm import LLMProvider
+from src.llm_cache import CachedLLM, ResponseCache
+
+class EchoLLM(LLMProvider):
+    def __init__(self, reply: str = "ok"):
+        self.model = "echo"
+        self.reply = reply
+        self.calls = 0
+
+    def generate(self, prompt: str, system_prompt: str = "", **kwargs) -> str:
+        self.calls += 1
+        return self.reply
+
+def test_key_covers_every_request_field():
+    base = ResponseCache.make_key("P", "m", "sys", "prompt", {"temperature": 0.7, "max_tokens": 10})
+    # kwargs order does not matter...
+    assert base == ResponseCache.make_key("P", "m", "sys", "prompt", {"max_tokens": 10, "temperature": 0.7})
+    # ...but every field does
+    for args in [("Q", "m", "sys", "prompt"), ("P", "n", "sys", "prompt"),
+                 ("P", "m", "", "prompt"), ("P", "m", "sys", "prompt!")]:
+        assert ResponseCache.make_key(*args, {"temperature": 0.7, "max_tokens": 10}) != base
+    assert ResponseCache.make_key("P", "m", "sys", "prompt", {"temperature": 0.2, "max_tokens": 10}) != base
+
+def test_cached_llm_hits_and_skips_errors(tmp_path):
+    provider = EchoLLM()
+    llm = CachedLLM(provider, ResponseCache(tmp_path))
+    assert llm.generate("a") == "ok" and llm.generate("a") == "ok"
+    assert "".join(llm.stream("a")) == "ok"
+    assert provider.calls == 1
+    assert llm.stats()["hits"] == 2
+
+    failing = EchoLLM("Error: rate limited")
+    llm = CachedLLM(failing, ResponseCache(tmp_path))
+    llm.generate("b")
+    llm.generate("b")
+    assert failing.calls == 2
+
+def test_expired_entries_are_evicted_even_if_recently_read(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=10 ** 6, max_age=60)
+    cache.put("aa" + "0" * 62, "old")
+    old = cache._path("aa" + "0" * 62)
+    old.write_text(json.dumps({"created": time.time() - 3600, "response": "old"}))
+    os.utime(old, None)  # Read a moment ago: mtime alone would keep it
+
+    cache.max_bytes = 1  # Force an eviction pass on the next write
+    cache.put("bb" + "0" * 62, "new")
+    assert not old.exists()
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=10 ** 6, max_age=0)
+    keys = [f"{i:02d}" + "0" * 62 for i in range(5)]
+    for i, key in enumerate(keys):
+        cache.put(key, "x" * 100)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    assert cache.get(keys[0]) is not None  # Touched: now the most recently used
+
+    entry_size = cache._path(keys[0]).stat().st_size
+    cache.max_bytes = entry_size * 4
+    cache.put("99" + "0" * 62, "x" * 100)
+    remaining = [key for key in keys if cache._path(key).exists()]
+    # Trimmed to 90% of max_bytes: three entries stay, the oldest untouched ones go
+    assert remaining == [keys[0], keys[4]]
+    assert cache._path("99" + "0" * 62).exists()
@@ -0,0 +1,51 @@
+import json
+import random
+
+import pytest
+
+from src.utils import IncrementalJSONParser
+
+RESPONSE = "Here is the plan:\n```json\n" + json.dumps({
+    "title": "A {tricky} \"title\" with [brackets]",
+    "shots": [
+        {"shot_id": i, "description": f"Shot {i}: a \"quoted\" {{brace}} and ] bracket \\ slash",
+                     "camera": {"lens": 35, "moves": ["pan", "tilt"]}}
+        for i in range(1, 8)
+    ],
+    "notes": {"shots": [{"not": "a target"}]},
+}, indent=2) + "\n```"
+
+def feed_in_pieces(parser, text, seed):
+    rng = random.Random(seed)
+    completed, i = [], 0
+    while i < len(text):
+        size = rng.choice([1, 2, 3, 7, 40, 500])
+        completed.extend(parser.feed(text[i:i + size]))
+        i += size
+    return completed
+
+@pytest.mark.parametrize("seed", range(20))
+def test_streamed_elements_match_full_parse(seed):
+    parser = IncrementalJSONParser()
+    completed = feed_in_pieces(parser, RESPONSE, seed)
+    expected = json.loads(RESPONSE[RESPONSE.index("{"):RESPONSE.rindex("}") + 1])
+
+    # Only top-level target arrays are streamed, each element once and in order
+    assert completed == [("shots", shot) for shot in expected["shots"]]
+    assert parser.text == RESPONSE
+    assert parser.result() == expected
+
+def test_buffer_holds_only_the_open_element():
+    parser = IncrementalJSONParser()
+    peak = 0
+    for ch in RESPONSE:
+        parser.feed(ch)
+        peak = max(peak, len(parser._buffer))
+    # Never more than one shot element (plus the current character), not the whole response
+    longest_shot = max(len(json.dumps(shot, indent=2)) for shot in json.loads(RESPONSE[RESPONSE.index("{"):RESPONSE.rindex("}") + 1])["shots"])
+    assert peak < 2 * longest_shot < len(RESPONSE)
+
+def test_malformed_element_is_skipped():
+    parser = IncrementalJSONParser()
+    completed = parser.feed('{"shots": [{"shot_id": 1}, {"shot_id": 2,}, {"shot_id": 3}]}')
+    assert completed == [("shots", {"shot_id": 1}), ("shots", {"shot_id": 3})]